@@ -0,0 +1,320 @@
+# ai/cooperative.py
+"""
+Windowed Hierarchical Cooperative A* (WHCA*, Silver 2005) for many chasers
+sharing one target.
+
+Agents are planned one after another, in priority order (closest to the
+target first), through space-time: a state is (cell, step), every action,
+waiting included, takes one step, and each finished plan goes into a shared
+ReservationTable that later agents must route around. No two agents are
+planned onto the same cell at the same step, or to swap cells head-on.
+
+Only WINDOW steps are searched and reserved; past the window the exact
+remaining distance comes from one BFS from the target (a FlowField),
+shared by all agents, so it costs one sweep per target move, not one per
+agent. Plans roll: an agent re-plans when half its window is used up, when
+it is off its plan, or some steps after the target moved. Window lengths
+are staggered at batch planning so those re-plans spread over ticks.
+
+Time is one planner-wide tick that the caller advance()s once per
+simulation tick. Each agent's pace, the ticks between its next_cell()
+calls, is learned as it goes; its plan holds every cell for that many
+ticks, so a slow agent's reservations cover the whole time it stands
+still, and agents of different speeds (or ones rejoining after forget())
+plan against the same timeline.
+"""
+import heapq
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from .flowfield import UNREACHED, FlowField
+from .grid import Grid
+from .search import INF
+
+WINDOW = 16       # steps searched and reserved ahead per agent
+REPLAN_EVERY = 4  # steps a plan is still followed after the target moved
+EXPAND_LIMIT = 24  # per window step; a boxed-in agent settles for its deepest state by then
+
+
+class ReservationTable:
+    """
+    Which agent holds which cell over which ticks, as half-open [t_from, t_to)
+    spans per cell, plus (tick, from, to) moves so agents can't swap cells
+    head-on.
+    """
+    def __init__(self):
+        self._cells: Dict[int, List[tuple]] = {}  # cell -> [(t_from, t_to, agent)]
+        self._moves: Dict[tuple, Any] = {}
+        self._owned: Dict[Any, List[tuple]] = {}  # agent -> its (cell, span) and move keys
+
+    def __len__(self) -> int:
+        return sum(len(spans) for spans in self._cells.values())
+
+    def holder(self, t: int, cell: int) -> Any:
+        for a, b, agent in self._cells.get(cell, ()):
+            if a <= t < b:
+                return agent
+        return None
+
+    def is_free(self, agent: Any, cell: int, t_from: int, t_to: int) -> bool:
+        """Whether no other agent holds 'cell' at any tick in [t_from, t_to)."""
+        return _free(self._cells.get(cell), agent, t_from, t_to)
+
+    def can_move(self, agent: Any, t: int, frm: int, to: int, period: int = 1) -> bool:
+        """Whether 'agent' may step from 'frm' onto 'to' at tick t and stay there 'period' ticks."""
+        if not self.is_free(agent, to, t, t + period):
+            return False
+        if frm != to:
+            other = self._moves.get((t, to, frm))
+            if other is not None and other != agent:
+                return False
+        return True
+
+    def reserve(self, agent: Any, t0: int, cells: Sequence[int], period: int = 1) -> None:
+        """
+        cells[k] held from tick t0 + k * period for 'period' ticks (a wait
+        extends the span); the last one until the agent is released, since
+        it stands there until it plans again.
+        """
+        owned = self._owned.setdefault(agent, [])
+        n = len(cells)
+        k = 0
+        while k < n:
+            c = cells[k]
+            j = k
+            while j + 1 < n and cells[j + 1] == c:
+                j += 1
+            span = (t0 + k * period, t0 + (j + 1) * period if j + 1 < n else INF, agent)
+            self._cells.setdefault(c, []).append(span)
+            owned.append((c, span))
+            if j + 1 < n:
+                move = (t0 + (j + 1) * period, c, cells[j + 1])
+                self._moves[move] = agent
+                owned.append(move)
+            k = j + 1
+
+    def release(self, agent: Any) -> None:
+        for key in self._owned.pop(agent, ()):
+            if len(key) == 2:
+                cell, span = key
+                spans = self._cells.get(cell)
+                if spans and span in spans:
+                    spans.remove(span)
+                    if not spans:
+                        del self._cells[cell]
+            elif self._moves.get(key) == agent:
+                del self._moves[key]
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._moves.clear()
+        self._owned.clear()
+
+
+def _free(spans, agent: Any, t_from: int, t_to: int) -> bool:
+    if spans:
+        for a, b, other in spans:
+            if a < t_to and t_from < b and other != agent:
+                return False
+    return True
+
+
+def windowed_search(grid: Grid, start: int, t0: int, dist, table: ReservationTable,
+                    agent: Any, window: int = WINDOW, period: int = 1):
+    """
+    Space-time A* for an agent that entered 'start' at tick t0 and takes
+    'period' ticks per step (or wait), for up to 'window' steps, avoiding
+    other agents' reservations. h is dist[cell] (exact distance to the
+    target), so a state's f is steps so far plus steps still needed.
+    Returns (cells, expanded): cells[k] is where the agent is from tick
+    t0 + k * period for 'period' ticks, ending on the target or at the
+    window edge; just [start] if every move is reserved; None if the target
+    can't be reached at all.
+    In a crowd, after EXPAND_LIMIT * window expansions the deepest state
+    reached so far (nearest the target among those) ends the plan instead.
+    """
+    if dist[start] == UNREACHED:
+        return None, 0
+    steps, masks = grid.steps, grid.masks
+    span = window + 1
+    parent = {start * span: -1}  # state (cell * span + depth) -> parent state
+    open_list = [(dist[start], 0, start)]  # (f, -depth, cell); f ties go to the deeper state
+    push, pop = heapq.heappush, heapq.heappop
+    held, moving = table._cells, table._moves  # can_move(), inlined
+    closed = set()
+    expanded = 0
+    limit = EXPAND_LIMIT * window
+    end = None
+    best, best_key = start * span, (0, -dist[start])
+
+    while open_list:
+        _, nd, cur = pop(open_list)
+        depth = -nd
+        state = cur * span + depth
+        if state in closed:
+            continue
+        closed.add(state)
+        expanded += 1
+        if dist[cur] == 0 or depth == window:
+            end = state
+            break
+        if (depth, -dist[cur]) > best_key:
+            best, best_key = state, (depth, -dist[cur])
+        if expanded >= limit:
+            end = best
+            break
+        d1 = depth + 1
+        t = t0 + d1 * period  # when the next cell is entered, held until t_end
+        t_end = t + period
+        ns = cur * span + d1  # wait here
+        if ns not in parent and _free(held.get(cur), agent, t, t_end):
+            parent[ns] = state
+            push(open_list, (d1 + dist[cur], -d1, cur))
+        for d in steps[masks[cur]]:
+            nxt = cur + d
+            ns = nxt * span + d1
+            if ns in parent:
+                continue
+            if not _free(held.get(nxt), agent, t, t_end):
+                continue
+            other = moving.get((t, nxt, cur))
+            if other is not None and other != agent:
+                continue
+            parent[ns] = state
+            push(open_list, (d1 + dist[nxt], -d1, nxt))
+
+    if end is None:
+        return [start], expanded
+    cells = []
+    while end != -1:
+        cells.append(end // span)
+        end = parent[end]
+    cells.reverse()
+    return cells, expanded
+
+
+class _Plan:
+    __slots__ = ("cells", "t0", "goal", "period")
+
+    def __init__(self, cells: List[int], t0: int, goal: int, period: int):
+        self.cells = cells
+        self.t0 = t0  # tick cells[0] was entered; cells[k] from t0 + k * period
+        self.goal = goal
+        self.period = period
+
+    def step_at(self, t: int) -> int:
+        """Index of the cell due to be entered at tick t (nearest step)."""
+        return (t - self.t0 + self.period // 2) // self.period
+
+    def cell(self, k: int) -> int:
+        return self.cells[k] if k < len(self.cells) else self.cells[-1]
+
+    def left(self, k: int) -> int:
+        return len(self.cells) - 1 - k
+
+
+class CooperativePlanner:
+    def __init__(self, grid: Grid, window: int = WINDOW):
+        self.grid = grid
+        self.window = window
+        self.version = grid.version
+        self.table = ReservationTable()
+        self._field = FlowField(grid)
+        self._plans: Dict[Any, _Plan] = {}
+        self.now = 0  # shared tick: advance() once per simulation tick
+        self._last: Dict[Any, int] = {}    # agent -> tick of its latest step
+        self._period: Dict[Any, int] = {}  # agent -> ticks between its steps, as last seen
+        # stats
+        self.expanded = 0
+        self.replans = 0
+        self.last_ms = 0.0
+
+    def _sync(self, goal: int) -> None:
+        if self.version != self.grid.version:
+            self.table.clear()
+            self._plans.clear()
+            self.version = self.grid.version
+        if not self._field.is_current(goal):
+            self._field.build(goal)
+
+    def advance(self, ticks: int = 1) -> None:
+        """Move the shared clock on; call once per simulation tick."""
+        self.now += ticks
+
+    def _pace(self, agent: Any, period: Optional[int]) -> int:
+        """Ticks per step: as seen between its calls, else the caller's hint, else 1."""
+        return self._period.get(agent) or period or 1
+
+    def _plan(self, agent: Any, start: int, goal: int, period: int,
+              window: Optional[int] = None) -> Optional[_Plan]:
+        # 'start' counts as entered one period ago, so the first step is due now
+        self.table.release(agent)
+        window = window or self.window
+        t0 = self.now - period
+        cells, expanded = windowed_search(self.grid, start, t0, self._field.dist, self.table,
+                                          agent, window, period)
+        self.expanded += expanded
+        self.replans += 1
+        if cells is None:
+            self._plans.pop(agent, None)
+            return None
+        self.table.reserve(agent, t0, cells, period)
+        plan = self._plans[agent] = _Plan(cells, t0, goal, period)
+        return plan
+
+    def plan_all(self, agents: Sequence[Any], starts: Sequence[int], goal: int,
+                 periods: Optional[Sequence[Optional[int]]] = None) -> List[Optional[List[int]]]:
+        """
+        Plan every agent afresh, closest to 'goal' first, each against the
+        reservations of those before it. Returns each agent's windowed cells.
+        'periods' are the agents' ticks per step where known (see next_cell).
+        """
+        t0 = time.perf_counter()
+        self._sync(goal)
+        dist = self._field.dist
+        order = sorted(range(len(agents)),
+                       key=lambda j: dist[starts[j]] if dist[starts[j]] != UNREACHED else len(dist))
+        for a in agents:
+            self.table.release(a)
+        half = max(1, self.window // 2)
+        out: List[Optional[List[int]]] = [None] * len(agents)
+        for rank, j in enumerate(order):
+            agent = agents[j]
+            # a shorter first window shifts this agent's re-plans off the others' ticks
+            period = self._pace(agent, periods[j] if periods else None)
+            plan = self._plan(agent, starts[j], goal, period, self.window - rank % half)
+            out[j] = list(plan.cells) if plan is not None else None
+        self.last_ms = (time.perf_counter() - t0) * 1000.0
+        return out
+
+    def next_cell(self, agent: Any, start: int, goal: int, period: Optional[int] = None) -> Optional[int]:
+        """
+        Take one step for 'agent' standing on 'start': the cell its plan has
+        for the next step (possibly 'start' again, to wait), re-planning first
+        when needed. None if 'goal' can't be reached. 'period' is how many
+        ticks the agent takes per step, until its calls have shown that.
+        """
+        t0 = time.perf_counter()
+        self._sync(goal)
+        now = self.now
+        last = self._last.get(agent)
+        if last is not None and now > last:
+            self._period[agent] = now - last
+        self._last[agent] = now
+        pace = self._pace(agent, period)
+        plan = self._plans.get(agent)
+        k = plan.step_at(now) if plan is not None else 0
+        if plan is None or k < 1 or plan.cell(k - 1) != start or plan.left(k) < self.window // 2 or \
+                plan.period != pace or (plan.goal != goal and k > REPLAN_EVERY):
+            plan = self._plan(agent, start, goal, pace)
+            k = 1
+        self.last_ms = (time.perf_counter() - t0) * 1000.0
+        if plan is None:
+            return None
+        return plan.cell(k)
+
+    def forget(self, agent: Any) -> None:
+        """Drop the agent's plan and reservations; it rejoins on the shared clock."""
+        self.table.release(agent)
+        self._plans.pop(agent, None)
+        self._last.pop(agent, None)  # the gap until it rejoins isn't its pace
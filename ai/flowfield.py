@@ -0,0 +1,96 @@
+# ai/flowfield.py
+"""
+Shared reverse distance map ("flow field") towards one target cell.
+
+One BFS from the target fills dist[i] = steps from cell i to the target for
+the whole grid; after that any number of chasers read their next step in
+O(1) instead of each running its own search.
+"""
+from array import array
+from typing import Optional
+
+from .grid import Grid
+
+UNREACHED = -1
+
+
+class FlowField:
+    def __init__(self, grid: Grid):
+        self.grid = grid
+        self.target = -1
+        self.version = -1           # grid.version the field was built against
+        self.expanded = 0           # cells visited by the last build
+        self._blank = array("i", [UNREACHED]) * grid.size
+        self.dist = array("i", self._blank)
+
+    def is_current(self, target: int) -> bool:
+        return self.target == target and self.version == self.grid.version
+
+    def build(self, target: int) -> None:
+        """
+        Level-by-level BFS from 'target' over the grid's neighbour table.
+        """
+        self.build_many((target,))
+        self.target = target
+
+    def build_many(self, targets) -> None:
+        """
+        One BFS from several cells at once: dist[i] = steps from i to the
+        nearest of them (e.g. back onto a patrol loop). 'target' is -1 after.
+        """
+        grid = self.grid
+        steps, masks = grid.steps, grid.masks
+        dist = self.dist = array("i", self._blank)  # memcpy, not a Python loop
+        self.target = -1
+        self.version = grid.version
+        walls = grid.walls
+        frontier = [t for t in dict.fromkeys(targets) if not walls[t]]
+        if not frontier:
+            self.expanded = 0
+            return
+
+        for t in frontier:
+            dist[t] = 0
+        d = 0
+        count = len(frontier)
+        while frontier:
+            d += 1
+            nxt_frontier = []
+            add = nxt_frontier.append
+            for cur in frontier:
+                for off in steps[masks[cur]]:
+                    nxt = cur + off
+                    if dist[nxt] == UNREACHED:
+                        dist[nxt] = d
+                        add(nxt)
+            count += len(nxt_frontier)
+            frontier = nxt_frontier
+        self.expanded = count
+
+    def adopt(self, target: int, dist) -> None:
+        """
+        Use a precomputed distance map in this layout (e.g. the distance-to-exit
+        field of the level pack) instead of running build().
+        """
+        self.dist = array("i")
+        self.dist.frombytes(memoryview(dist).cast("B"))
+        self.target = target
+        self.version = self.grid.version
+        self.expanded = 0
+
+    def distance(self, cell: int) -> int:
+        return self.dist[cell]
+
+    def next_cell(self, cell: int) -> Optional[int]:
+        """
+        Neighbour of 'cell' one step closer to the target (first match in
+        DIRS order), the cell itself when already there, None if unreachable.
+        """
+        d = self.dist[cell]
+        if d <= 0:
+            return cell if d == 0 else None
+        dist = self.dist
+        for off in self.grid.steps[self.grid.masks[cell]]:
+            if dist[cell + off] == d - 1:
+                return cell + off
+        return None
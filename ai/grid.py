@@ -0,0 +1,124 @@
+# ai/grid.py
+"""
+Compact wall grid shared by game/world.py and the search code.
+
+Walls live in one flat bytearray with a one-cell wall border around the
+level, so the 4 neighbours of cell i are i + offset with no bounds checks.
+Cell index of (x, y) is (y + 1) * stride + (x + 1).
+"""
+from typing import List, Optional, Tuple
+
+GridPos = Tuple[int, int]
+
+# neighbour bit k <-> direction, same order as World.neighbors_4
+DIRS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+# mask -> open directions, for callers that want (dx, dy) rather than offsets
+DIR_SETS = tuple(tuple(d for k, d in enumerate(DIRS) if mask >> k & 1) for mask in range(16))
+
+_FLOOR = bytes(1 - (b & 1) for b in range(256))  # wall byte -> floor byte
+
+CHANGE_LOG = 4096  # edits kept for changes_since(); older readers just rebuild
+
+
+class Grid:
+    """
+    walls[i] == 1 -> wall (border cells included), 0 -> floor
+    masks[i] has bit k set when neighbour k (see DIRS) is floor;
+    steps[masks[i]] is the tuple of index offsets to walk from cell i.
+    """
+    def __init__(self, width: int, height: int, tiles, walls=None):
+        """
+        'walls' may be an already bordered wall buffer in this layout (e.g. a
+        level pack view); it is copied in one go and 'tiles' is not read.
+        """
+        self.w = width
+        self.h = height
+        self.stride = width + 2
+        self.size = self.stride * (height + 2)
+
+        s = self.stride
+        if walls is not None:
+            self.walls = bytearray(walls)
+        else:
+            self.walls = bytearray(b"\x01") * self.size
+            for y, row in enumerate(tiles):
+                base = (y + 1) * s + 1
+                self.walls[base:base + width] = bytes(row)
+
+        self.offsets = tuple(dy * s + dx for dx, dy in DIRS)
+        self.steps = tuple(
+            tuple(off for k, off in enumerate(self.offsets) if mask >> k & 1)
+            for mask in range(16)
+        )
+        self.masks = self._build_masks()
+        self.version = 0  # bumped on every edit so cached searches can tell
+        self.changes: List[int] = []  # edited cells, oldest first
+        self._changes_base = 0        # version at changes[0]
+
+    # ---------- coordinates ----------
+    def index(self, x: int, y: int) -> int:
+        return (y + 1) * self.stride + x + 1
+
+    def pos(self, i: int) -> GridPos:
+        y, x = divmod(i, self.stride)
+        return x - 1, y - 1
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.w and 0 <= y < self.h
+
+    # ---------- queries ----------
+    def is_blocked(self, x: int, y: int) -> bool:
+        if x < 0 or y < 0 or x >= self.w or y >= self.h:
+            return True
+        return self.walls[(y + 1) * self.stride + x + 1] == 1
+
+    def neighbors(self, i: int) -> Tuple[int, ...]:
+        return tuple(i + d for d in self.steps[self.masks[i]])
+
+    def open_dirs(self, i: int) -> Tuple[GridPos, ...]:
+        return DIR_SETS[self.masks[i]]
+
+    # ---------- edits ----------
+    def set_wall(self, x: int, y: int, wall: bool) -> None:
+        i = self.index(x, y)
+        self.walls[i] = 1 if wall else 0
+        self.masks[i] = self._cell_mask(i)
+        for d in self.offsets:
+            self.masks[i + d] = self._cell_mask(i + d)
+        self.changes.append(i)
+        self.version += 1
+        if len(self.changes) > CHANGE_LOG:
+            drop = len(self.changes) // 2
+            del self.changes[:drop]
+            self._changes_base += drop
+
+    def changes_since(self, version: int) -> Optional[List[int]]:
+        """
+        Cells edited after 'version', or None if the log no longer reaches back
+        that far (the caller should then rebuild from scratch).
+        """
+        if version < self._changes_base:
+            return None
+        return self.changes[version - self._changes_base:]
+
+    # ---------- internals ----------
+    def _cell_mask(self, i: int) -> int:
+        walls = self.walls
+        if walls[i]:
+            return 0
+        m = 0
+        for k, d in enumerate(self.offsets):
+            if not walls[i + d]:
+                m |= 1 << k
+        return m
+
+    def _build_masks(self) -> bytearray:
+        # Whole-grid shifts on one big int instead of a per-cell Python loop:
+        # byte j of (o >> 8*d) is floor[j + d]. Bits never collide, so OR is safe.
+        s = self.stride
+        o = int.from_bytes(self.walls.translate(_FLOOR), "little")
+        m = (o >> 8) | (o << 9) | ((o >> (8 * s)) << 2) | (o << (8 * s + 3))
+        m &= o * 15  # walls get no neighbours
+        return bytearray(m.to_bytes(self.size, "little"))
+
@@ -0,0 +1,201 @@
+# ai/heuristics.py
+"""
+Distance estimates for the searches in ai/search.py, picked by name
+(Pathfinder.heuristic):
+
+  manhattan / euclidean / chebyshev   straight from the coordinates
+  alt           landmarks: exact BFS distances from k landmark cells and the
+                triangle inequality, |d(L, goal) - d(L, n)| <= d(n, goal)
+  differential  the same distance arrays, but one pivot per query (the one
+                that bounds start -> goal best), so one lookup per node
+
+Landmark estimates never drop below Manhattan (they take the max), stay
+admissible and consistent, and are far tighter around walls: on maze-like
+levels A* expands a fraction of the cells. The arrays are built once per
+grid version (k BFS sweeps) by landmarks_for(), which Pathfinder.prepare()
+calls at level load.
+
+estimate_many() evaluates one heuristic over a batch of cells at once,
+column by column, instead of a Python call per cell.
+"""
+import math
+import time
+import weakref
+from typing import Callable, List, Optional, Sequence
+
+from .flowfield import UNREACHED, FlowField
+from .grid import Grid
+
+BASIC = ("manhattan", "euclidean", "chebyshev")
+LANDMARK = ("alt", "differential")
+NAMES = BASIC + LANDMARK
+
+LANDMARK_COUNT = 8   # distance arrays kept per grid
+ACTIVE_LANDMARKS = 4  # of those, how many "alt" consults per query (best for start -> goal)
+
+
+# ---------- basic distances ----------
+def manhattan(grid: Grid, goal: int) -> Callable[[int], float]:
+    stride = grid.stride
+    gy, gx = divmod(goal, stride)
+
+    def h(i):
+        y, x = divmod(i, stride)
+        return abs(x - gx) + abs(y - gy)
+    return h
+
+
+def euclidean(grid: Grid, goal: int) -> Callable[[int], float]:
+    stride = grid.stride
+    gy, gx = divmod(goal, stride)
+
+    def h(i):
+        y, x = divmod(i, stride)
+        return math.hypot(x - gx, y - gy)
+    return h
+
+
+def chebyshev(grid: Grid, goal: int) -> Callable[[int], float]:
+    stride = grid.stride
+    gy, gx = divmod(goal, stride)
+
+    def h(i):
+        y, x = divmod(i, stride)
+        return max(abs(x - gx), abs(y - gy))
+    return h
+
+
+_BASIC_FNS = {"manhattan": manhattan, "euclidean": euclidean, "chebyshev": chebyshev}
+
+
+# ---------- landmarks ----------
+class Landmarks:
+    """
+    k landmark cells spread out by farthest-point selection (each new one is
+    the cell farthest, by walking distance, from all picked so far), with a
+    BFS distance array from each. Cells the sweeps never reach (other
+    components) keep UNREACHED and fall back to Manhattan.
+    """
+    def __init__(self, grid: Grid, k: int = LANDMARK_COUNT):
+        t0 = time.perf_counter()
+        self.grid = grid
+        self.k = k
+        self.version = grid.version
+        self.cells: List[int] = []
+        self.dist = []  # array("i") per landmark, FlowField layout
+        self._select(k)
+        self.build_ms = (time.perf_counter() - t0) * 1000.0
+
+    def _select(self, k: int) -> None:
+        grid = self.grid
+        seed = grid.walls.find(0)
+        if seed < 0:
+            return
+        ff = FlowField(grid)
+        ff.build(seed)
+        # nearest-landmark distance per cell; the seed sweep only places the first one
+        nearest = ff.dist
+        for _ in range(k):
+            far = max(range(grid.size), key=nearest.__getitem__)
+            if nearest[far] <= 0:
+                break  # every reachable cell is a landmark already
+            ff.build(far)
+            self.cells.append(far)
+            self.dist.append(ff.dist)
+            if len(self.cells) == 1:
+                nearest = ff.dist
+            else:
+                nearest = [a if a < b else b for a, b in zip(nearest, ff.dist)]
+
+    def is_current(self) -> bool:
+        return self.version == self.grid.version
+
+    def rank(self, goal: int, start: Optional[int] = None) -> List[int]:
+        """Landmark indices, best lower bound for start -> goal first (or farthest from goal)."""
+        order = []
+        for j, d in enumerate(self.dist):
+            dg = d[goal]
+            if dg == UNREACHED:
+                continue
+            ds = d[start] if start is not None else 0
+            order.append((abs(dg - ds) if ds != UNREACHED else -1, j))
+        order.sort(reverse=True)
+        return [j for _, j in order]
+
+    def alt(self, goal: int, start: Optional[int] = None,
+            active: int = ACTIVE_LANDMARKS) -> Callable[[int], float]:
+        pairs = [(self.dist[j], self.dist[j][goal]) for j in self.rank(goal, start)[:active]]
+        if not pairs:
+            return manhattan(self.grid, goal)
+        stride = self.grid.stride
+        gy, gx = divmod(goal, stride)
+
+        def h(i):
+            y, x = divmod(i, stride)
+            best = abs(x - gx) + abs(y - gy)
+            for d, dg in pairs:
+                di = d[i]
+                if di != UNREACHED:
+                    v = dg - di if dg > di else di - dg
+                    if v > best:
+                        best = v
+            return best
+        return h
+
+    def differential(self, goal: int, start: Optional[int] = None) -> Callable[[int], float]:
+        return self.alt(goal, start, active=1)
+
+    def estimate_many(self, cells: Sequence[int], goal: int, start: Optional[int] = None,
+                      active: int = ACTIVE_LANDMARKS) -> List[float]:
+        stride = self.grid.stride
+        gy, gx = divmod(goal, stride)
+        best = [abs(c % stride - gx) + abs(c // stride - gy) for c in cells]
+        for j in self.rank(goal, start)[:active]:
+            d = self.dist[j]
+            dg = d[goal]
+            col = [abs(dg - v) if v != UNREACHED else 0 for v in map(d.__getitem__, cells)]
+            best = list(map(max, best, col))
+        return best
+
+
+_landmarks = weakref.WeakKeyDictionary()
+
+
+def landmarks_for(grid: Grid, k: int = LANDMARK_COUNT) -> Landmarks:
+    """The grid's Landmarks, rebuilt after tile edits (stale distances aren't admissible)."""
+    lm = _landmarks.get(grid)
+    if lm is None or not lm.is_current() or lm.k != k:
+        lm = _landmarks[grid] = Landmarks(grid, k)
+    return lm
+
+
+# ---------- by name ----------
+def heuristic_fn(name: str, grid: Grid, goal: int, start: Optional[int] = None) -> Callable[[int], float]:
+    """
+    Estimate of the steps from a cell to 'goal'. 'start', when known, lets
+    the landmark heuristics pick the landmarks that matter for this query.
+    Unknown names fall back to Manhattan.
+    """
+    if name == "alt":
+        return landmarks_for(grid).alt(goal, start)
+    if name == "differential":
+        return landmarks_for(grid).differential(goal, start)
+    return _BASIC_FNS.get(name, manhattan)(grid, goal)
+
+
+def estimate_many(name: str, grid: Grid, cells: Sequence[int], goal: int,
+                  start: Optional[int] = None) -> List[float]:
+    """heuristic_fn(name, grid, goal, start) for every cell in 'cells', in order."""
+    if name == "alt":
+        return landmarks_for(grid).estimate_many(cells, goal, start)
+    if name == "differential":
+        return landmarks_for(grid).estimate_many(cells, goal, start, active=1)
+    stride = grid.stride
+    gy, gx = divmod(goal, stride)
+    dx = [abs(c % stride - gx) for c in cells]
+    dy = [abs(c // stride - gy) for c in cells]
+    if name == "euclidean":
+        return list(map(math.hypot, dx, dy))
+    if name == "chebyshev":
+        return list(map(max, dx, dy))
+    return [a + b for a, b in zip(dx, dy)]
@@ -0,0 +1,356 @@
+# ai/hpa.py
+"""
+Hierarchical pathfinding (HPA*) for big grids.
+
+The grid is cut into cluster_size x cluster_size clusters. Where two clusters
+share an open border, entrance cells are picked (one per short opening, one
+at each end of a long one) and linked across the border with cost 1. Inside
+each cluster the entrance cells are linked with their exact in-cluster
+distances. Queries run A* on that small abstract graph and only refine the
+abstract hops they actually need into cell paths.
+
+A tile edit only rebuilds the cluster it sits in (plus the neighbour across
+the border when the edit is on one).
+
+Run "python -m ai.hpa" for a preprocessing vs query-latency comparison.
+"""
+import heapq
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .flowfield import FlowField
+from .grid import Grid
+from .search import INF, SearchResult, search
+
+ENTRANCE_SPLIT = 6  # openings at least this wide get two entrances
+SEGMENT_CACHE = 256  # refined hops kept per cluster (LRU); query starts add new ones
+
+
+class HPAGraph:
+    def __init__(self, grid: Grid, cluster_size: int = 16):
+        t0 = time.perf_counter()
+        self.grid = grid
+        self.c = cluster_size
+        self.cw = (grid.w + cluster_size - 1) // cluster_size
+        self.ch = (grid.h + cluster_size - 1) // cluster_size
+
+        self.local: Dict[int, Grid] = {}                              # cluster -> its own small Grid
+        self.borders: Dict[Tuple[str, int, int], List[Tuple[int, int]]] = {}  # border -> entrance pairs
+        self.cross: Dict[int, List[int]] = {}                         # entrance -> cells across borders
+        self.intra: Dict[int, Dict[int, List[Tuple[int, int]]]] = {}  # cluster -> node -> [(node, dist)]
+        self.segments: Dict[int, "OrderedDict[Tuple[int, int], List[int]]"] = {}  # cluster -> refined hops
+
+        for cy in range(self.ch):
+            for cx in range(self.cw):
+                if cx + 1 < self.cw:
+                    self._build_border(("h", cx, cy))
+                if cy + 1 < self.ch:
+                    self._build_border(("v", cx, cy))
+        for cid in range(self.cw * self.ch):
+            self._build_cluster(cid)
+
+        self.version = grid.version
+        self.build_ms = (time.perf_counter() - t0) * 1000.0
+
+    # ---------- geometry ----------
+    def cluster_of(self, cell: int) -> int:
+        x, y = self.grid.pos(cell)
+        return (y // self.c) * self.cw + x // self.c
+
+    def _bounds(self, cid: int) -> Tuple[int, int, int, int]:
+        cy, cx = divmod(cid, self.cw)
+        x0, y0 = cx * self.c, cy * self.c
+        return x0, y0, min(x0 + self.c, self.grid.w), min(y0 + self.c, self.grid.h)
+
+    def _to_local(self, cid: int, cell: int) -> int:
+        x0, y0, _, _ = self._bounds(cid)
+        x, y = self.grid.pos(cell)
+        return self.local[cid].index(x - x0, y - y0)
+
+    def _to_global(self, cid: int, li: int) -> int:
+        x0, y0, _, _ = self._bounds(cid)
+        lx, ly = self.local[cid].pos(li)
+        return self.grid.index(x0 + lx, y0 + ly)
+
+    def _cluster_borders(self, cid: int):
+        cy, cx = divmod(cid, self.cw)
+        for key in (("h", cx, cy), ("h", cx - 1, cy), ("v", cx, cy), ("v", cx, cy - 1)):
+            if key in self.borders:
+                yield key
+
+    def _nodes(self, cid: int) -> List[int]:
+        nodes = set()
+        for key in self._cluster_borders(cid):
+            for a, b in self.borders[key]:
+                nodes.add(a if self.cluster_of(a) == cid else b)
+        return sorted(nodes)
+
+    # ---------- building ----------
+    def _build_border(self, key) -> None:
+        kind, cx, cy = key
+        grid, c = self.grid, self.c
+        if kind == "h":   # between (cx, cy) and (cx + 1, cy): walk down the shared edge
+            x = (cx + 1) * c - 1
+            cells = [(grid.index(x, y), grid.index(x + 1, y))
+                     for y in range(cy * c, min((cy + 1) * c, grid.h))]
+        else:             # between (cx, cy) and (cx, cy + 1): walk along it
+            y = (cy + 1) * c - 1
+            cells = [(grid.index(x, y), grid.index(x, y + 1))
+                     for x in range(cx * c, min((cx + 1) * c, grid.w))]
+
+        for a, b in self.borders.get(key, ()):
+            self.cross[a].remove(b)
+            self.cross[b].remove(a)
+
+        walls = grid.walls
+        pairs = []
+        run: List[Tuple[int, int]] = []
+        for a, b in cells + [(-1, -1)]:
+            if a >= 0 and not walls[a] and not walls[b]:
+                run.append((a, b))
+                continue
+            if run:
+                if len(run) < ENTRANCE_SPLIT:
+                    pairs.append(run[len(run) // 2])
+                else:
+                    pairs.extend((run[0], run[-1]))
+                run = []
+        self.borders[key] = pairs
+        for a, b in pairs:
+            self.cross.setdefault(a, []).append(b)
+            self.cross.setdefault(b, []).append(a)
+
+    def _build_cluster(self, cid: int) -> None:
+        x0, y0, x1, y1 = self._bounds(cid)
+        walls, s = self.grid.walls, self.grid.stride
+        rows = []
+        for y in range(y0, y1):
+            base = (y + 1) * s + 1
+            rows.append(walls[base + x0:base + x1])
+        local = self.local[cid] = Grid(x1 - x0, y1 - y0, rows)
+        self.segments[cid] = OrderedDict()
+
+        nodes = self._nodes(cid)
+        field = FlowField(local)
+        edges = {}
+        for u in nodes:
+            field.build(self._to_local(cid, u))
+            out = []
+            for v in nodes:
+                d = field.distance(self._to_local(cid, v))
+                if v != u and d > 0:
+                    out.append((v, d))
+            edges[u] = out
+        self.intra[cid] = edges
+
+    def refresh(self) -> int:
+        """
+        Bring the abstraction up to date with tile edits; only touched clusters
+        (and borders) are rebuilt. Returns the number of clusters rebuilt.
+        """
+        grid = self.grid
+        if self.version == grid.version:
+            return 0
+        changes = grid.changes_since(self.version)
+        if changes is None:
+            self.__init__(grid, self.c)
+            return self.cw * self.ch
+
+        clusters, borders = set(), set()
+        for cell in changes:
+            x, y = grid.pos(cell)
+            cx, cy = x // self.c, y // self.c
+            cid = cy * self.cw + cx
+            clusters.add(cid)
+            # edits on a cluster edge change that border's entrances, and so
+            # the intra-cluster edges on the far side as well
+            if x % self.c == self.c - 1 and cx + 1 < self.cw:
+                borders.add(("h", cx, cy))
+                clusters.add(cid + 1)
+            if x % self.c == 0 and cx > 0:
+                borders.add(("h", cx - 1, cy))
+                clusters.add(cid - 1)
+            if y % self.c == self.c - 1 and cy + 1 < self.ch:
+                borders.add(("v", cx, cy))
+                clusters.add(cid + self.cw)
+            if y % self.c == 0 and cy > 0:
+                borders.add(("v", cx, cy - 1))
+                clusters.add(cid - self.cw)
+        for key in borders:
+            self._build_border(key)
+        for cid in clusters:
+            self._build_cluster(cid)
+        self.version = grid.version
+        return len(clusters)
+
+    # ---------- queries ----------
+    def _local_edges(self, cid: int, cell: int) -> List[Tuple[int, int]]:
+        """
+        In-cluster distances from 'cell' to every entrance of its cluster.
+        """
+        field = FlowField(self.local[cid])
+        field.build(self._to_local(cid, cell))
+        out = []
+        for v in self._nodes(cid):
+            d = field.distance(self._to_local(cid, v))
+            if d >= 0:
+                out.append((v, d))
+        return out
+
+    def _refine(self, u: int, v: int) -> Tuple[List[int], int]:
+        """
+        Cells after u up to v for one abstract hop, plus nodes expanded.
+        """
+        if v in self.cross.get(u, ()):
+            return [v], 0
+        cid = self.cluster_of(u)
+        cache = self.segments[cid]
+        seg = cache.get((u, v))
+        if seg is not None:
+            cache.move_to_end((u, v))
+            return seg, 0
+        res = search("astar", self.local[cid], self._to_local(cid, u), self._to_local(cid, v))
+        seg = [self._to_global(cid, li) for li in res.path[1:]]
+        cache[(u, v)] = seg
+        if len(cache) > SEGMENT_CACHE:
+            cache.popitem(last=False)
+        return seg, res.expanded
+
+    def find_path(self, start: int, goal: int, max_hops: Optional[int] = None) -> SearchResult:
+        """
+        HPA* query between two grid cells. With 'max_hops' only that many
+        abstract hops are refined, so the path is a prefix (enough for an enemy
+        that only needs its next step).
+        """
+        t0 = time.perf_counter()
+        self.refresh()
+        grid = self.grid
+        if grid.walls[start] or grid.walls[goal]:
+            return SearchResult(None, INF, 0, 0.0)
+        if start == goal:
+            return SearchResult([start], 0, 0, 0.0)
+
+        cs, cg = self.cluster_of(start), self.cluster_of(goal)
+        start_edges = self._local_edges(cs, start)
+        goal_edges = {v: d for v, d in self._local_edges(cg, goal)}
+        if cs == cg:
+            direct = self._to_local(cs, start)
+            field = FlowField(self.local[cs])
+            field.build(self._to_local(cs, goal))
+            d = field.distance(direct)
+            if d >= 0:
+                start_edges.append((goal, d))
+
+        stride = grid.stride
+        gy, gx = divmod(goal, stride)
+
+        def h(cell):
+            y, x = divmod(cell, stride)
+            return abs(x - gx) + abs(y - gy)
+
+        g = {start: 0}
+        came_from = {}
+        closed = set()
+        open_list = [(h(start), start)]
+        expanded = 0
+        found = False
+        while open_list:
+            _, u = heapq.heappop(open_list)
+            if u in closed:
+                continue
+            closed.add(u)
+            expanded += 1
+            if u == goal:
+                found = True
+                break
+
+            gu = g[u]
+            if u == start:
+                nbrs = list(start_edges)
+            else:
+                nbrs = list(self.intra[self.cluster_of(u)].get(u, ()))
+            nbrs.extend((v, 1) for v in self.cross.get(u, ()))
+            if u in goal_edges:
+                nbrs.append((goal, goal_edges[u]))
+            for v, d in nbrs:
+                ng = gu + d
+                if v not in closed and ng < g.get(v, INF):
+                    g[v] = ng
+                    came_from[v] = u
+                    heapq.heappush(open_list, (ng + h(v), v))
+
+        if not found:
+            return SearchResult(None, INF, expanded, (time.perf_counter() - t0) * 1000.0)
+
+        hops = [goal]
+        while hops[-1] != start:
+            hops.append(came_from[hops[-1]])
+        hops.reverse()
+
+        path = [start]
+        refined = 0
+        for i, (u, v) in enumerate(zip(hops, hops[1:])):
+            if max_hops is not None and i >= max_hops:
+                break
+            seg, n = self._refine(u, v)
+            path.extend(seg)
+            refined += n
+        return SearchResult(path, g[goal], expanded + refined,
+                            (time.perf_counter() - t0) * 1000.0)
+
+
+# ---------- benchmark ----------
+def _bench_grid(size: int, seed: int) -> Grid:
+    """
+    Rooms-ish test map: walls on a coarse lattice with random doorways plus
+    some scattered rubble.
+    """
+    import random
+    rnd = random.Random(seed)
+    tiles = [[0] * size for _ in range(size)]
+    room = 12
+    for y in range(size):
+        for x in range(size):
+            on_wall = (x % room == 0) or (y % room == 0)
+            if on_wall and rnd.random() > 0.12:
+                tiles[y][x] = 1
+            elif not on_wall and rnd.random() < 0.05:
+                tiles[y][x] = 1
+    return Grid(size, size, tiles)
+
+
+def main(argv=None) -> None:
+    import argparse
+    import random
+    import statistics
+
+    ap = argparse.ArgumentParser(description="HPA* preprocessing vs query latency")
+    ap.add_argument("--size", type=int, nargs="+", default=[128, 256, 512])
+    ap.add_argument("--cluster", type=int, nargs="+", default=[8, 16, 32])
+    ap.add_argument("--queries", type=int, default=30)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    print(f"{'size':>5} {'cluster':>7} {'build ms':>9} {'hpa ms':>8} {'astar ms':>9} "
+          f"{'hpa exp':>8} {'astar exp':>9} {'len ratio':>9}")
+    for size in args.size:
+        grid = _bench_grid(size, args.seed)
+        rnd = random.Random(args.seed)
+        free = [i for i in range(grid.size) if not grid.walls[i]]
+        pairs = [(rnd.choice(free), rnd.choice(free)) for _ in range(args.queries)]
+        base = [search("astar", grid, a, b) for a, b in pairs]
+        for c in args.cluster:
+            hpa = HPAGraph(grid, c)
+            res = [hpa.find_path(a, b) for a, b in pairs]
+            ok = [(r, b) for r, b in zip(res, base) if r.path and b.path]
+            ratio = statistics.mean(len(r.path) / len(b.path) for r, b in ok) if ok else float("nan")
+            print(f"{size:>5} {c:>7} {hpa.build_ms:>9.1f} "
+                  f"{statistics.median(r.elapsed_ms for r in res):>8.2f} "
+                  f"{statistics.median(b.elapsed_ms for b in base):>9.2f} "
+                  f"{statistics.median(r.expanded for r in res):>8.0f} "
+                  f"{statistics.median(b.expanded for b in base):>9.0f} {ratio:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,892 @@
+# ai/search.py
+"""
+Grid search engine behind game/path_api.Pathfinder.
+
+Searches run directly on an ai.grid.Grid: cells are plain ints, neighbours
+come from the grid's precomputed step table (no bounds checks, no callbacks),
+the open list holds (priority, cell) pairs and g-costs / parent links live in
+flat lists. Every move costs 1 (4-connected, like Player.try_move).
+"""
+import heapq
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from array import array
+from typing import Callable, List, Optional, Sequence
+
+from .grid import Grid
+from .heuristics import LANDMARK, heuristic_fn
+
+INF = float("inf")
+
+MODES = ("greedy", "astar", "dijkstra", "bfs", "jps", "weighted", "ara")
+
+EPSILON = 2.0       # heuristic inflation for "weighted", and ARA*'s first pass
+EPSILON_STEP = 0.5  # ARA* lowers epsilon by this much after each solution
+
+
+@dataclass
+class SearchResult:
+    path: Optional[List[int]]  # cells from start to goal (inclusive), None if unreachable
+    cost: float
+    expanded: int              # nodes taken off the open list
+    elapsed_ms: float
+    bound: float = 1.0         # cost <= bound * optimal; INF if nothing was proven (greedy, out of budget)
+
+
+class Workspace:
+    """
+    Per-grid scratch arrays reused across queries. Instead of clearing them,
+    every query bumps 'tag': stamp[i] == tag means cell i was reached by the
+    current query (g / came_from valid), tag + 1 means it is also closed.
+    """
+    def __init__(self, size: int):
+        self.g = [INF] * size
+        self.came_from = [-1] * size
+        self.stamp = [0] * size
+        self.tag = 0
+
+    def next_tag(self) -> int:
+        self.tag += 2
+        return self.tag
+
+
+_local = threading.local()  # one set of workspaces per thread (path worker threads)
+
+
+def workspace_for(grid: Grid) -> Workspace:
+    spaces = getattr(_local, "spaces", None)
+    if spaces is None:
+        spaces = _local.spaces = weakref.WeakKeyDictionary()
+    ws = spaces.get(grid)
+    if ws is None:
+        ws = spaces[grid] = Workspace(grid.size)
+    return ws
+
+
+# ---------- helpers ----------
+def reconstruct(came_from: List[int], start: int, goal: int) -> List[int]:
+    path = [goal]
+    cur = goal
+    while cur != start:
+        cur = came_from[cur]
+        path.append(cur)
+    path.reverse()
+    return path
+
+
+# ---------- searches ----------
+def best_first(grid: Grid, start: int, goal: int, h: Optional[Callable[[int], float]],
+               g_weight: float = 1.0, h_weight: float = 1.0) -> SearchResult:
+    """
+    Shared loop for A*, greedy and Dijkstra. The open-list priority is
+    g_weight * g + h_weight * h(cell):
+      A*       -> (1, 1)
+      greedy   -> (0, 1)
+      Dijkstra -> (1, 0)  (h may be None)
+    """
+    t0 = time.perf_counter()
+    ws = workspace_for(grid)
+    g, came_from, stamp = ws.g, ws.came_from, ws.stamp
+    seen = ws.next_tag()
+    closed = seen + 1
+    steps, masks = grid.steps, grid.masks
+
+    # A* ties on f are broken towards deeper nodes; the offset stays below one
+    # step so it never reorders different integer path costs.
+    kg = g_weight
+    if g_weight and h_weight:
+        kg -= 1.0 / (grid.size + 1)
+    use_h = h_weight != 0
+
+    g[start] = 0
+    stamp[start] = seen
+    open_list = [(h_weight * h(start) if use_h else 0, start)]
+    push, pop = heapq.heappush, heapq.heappop
+    expanded = 0
+    found = False
+
+    while open_list:
+        _, cur = pop(open_list)
+        if stamp[cur] == closed:
+            continue
+        stamp[cur] = closed
+        expanded += 1
+        if cur == goal:
+            found = True
+            break
+
+        ng = g[cur] + 1
+        for d in steps[masks[cur]]:
+            nxt = cur + d
+            st = stamp[nxt]
+            if st == closed or (st == seen and ng >= g[nxt]):
+                continue
+            stamp[nxt] = seen
+            g[nxt] = ng
+            came_from[nxt] = cur
+            push(open_list, (kg * ng + h_weight * h(nxt) if use_h else ng, nxt))
+
+    path = reconstruct(came_from, start, goal) if found else None
+    return SearchResult(path, g[goal] if found else INF, expanded,
+                        (time.perf_counter() - t0) * 1000.0)
+
+
+def soft_best_first(grid: Grid, start: int, goal: int, h: Callable[[int], float],
+                    costs: Sequence[int], weight: float, h_weight: float = 1.0) -> SearchResult:
+    """
+    A* (or weighted A* with h_weight > 1) where entering cell i costs
+    1 + weight * costs[i]: e.g. costs = world.occupancy.counts makes other
+    agents soft obstacles, walked around when a detour of up to 'weight'
+    steps does it, walked through otherwise. The heuristic stays admissible
+    since costs only go up. result.cost includes the penalties.
+    """
+    t0 = time.perf_counter()
+    ws = workspace_for(grid)
+    g, came_from, stamp = ws.g, ws.came_from, ws.stamp
+    seen = ws.next_tag()
+    closed = seen + 1
+    steps, masks = grid.steps, grid.masks
+    kg = 1.0 - 1.0 / (grid.size + 1)
+
+    g[start] = 0
+    stamp[start] = seen
+    open_list = [(h_weight * h(start), start)]
+    push, pop = heapq.heappush, heapq.heappop
+    expanded = 0
+    found = False
+
+    while open_list:
+        _, cur = pop(open_list)
+        if stamp[cur] == closed:
+            continue
+        stamp[cur] = closed
+        expanded += 1
+        if cur == goal:
+            found = True
+            break
+
+        gc = g[cur] + 1
+        for d in steps[masks[cur]]:
+            nxt = cur + d
+            st = stamp[nxt]
+            if st == closed:
+                continue
+            c = costs[nxt]
+            ng = gc + weight * c if c else gc
+            if st == seen and ng >= g[nxt]:
+                continue
+            stamp[nxt] = seen
+            g[nxt] = ng
+            came_from[nxt] = cur
+            push(open_list, (kg * ng + h_weight * h(nxt), nxt))
+
+    path = reconstruct(came_from, start, goal) if found else None
+    return SearchResult(path, g[goal] if found else INF, expanded,
+                        (time.perf_counter() - t0) * 1000.0, max(h_weight, 1.0))
+
+
+def bfs(grid: Grid, start: int, goal: int) -> SearchResult:
+    t0 = time.perf_counter()
+    ws = workspace_for(grid)
+    came_from, stamp = ws.came_from, ws.stamp
+    seen = ws.next_tag()
+    steps, masks = grid.steps, grid.masks
+
+    stamp[start] = seen
+    frontier = deque([start])
+    expanded = 0
+    found = False
+
+    while frontier:
+        cur = frontier.popleft()
+        expanded += 1
+        if cur == goal:
+            found = True
+            break
+        for d in steps[masks[cur]]:
+            nxt = cur + d
+            if stamp[nxt] == seen:
+                continue
+            stamp[nxt] = seen
+            came_from[nxt] = cur
+            frontier.append(nxt)
+
+    path = reconstruct(came_from, start, goal) if found else None
+    return SearchResult(path, len(path) - 1 if found else INF, expanded,
+                        (time.perf_counter() - t0) * 1000.0)
+
+
+def search(mode: str, grid: Grid, start: int, goal: int, heuristic: str = "manhattan",
+           epsilon: float = EPSILON, deadline: Optional[float] = None,
+           max_nodes: Optional[int] = None) -> SearchResult:
+    """
+    Run one query between two grid cell indices. 'mode' is one of MODES;
+    "weighted" is A* with the heuristic inflated by 'epsilon', "ara" is
+    ARA* from 'epsilon' down to optimal.
+
+    'deadline' (a time.perf_counter() value) and 'max_nodes' cap the work:
+    "astar", "weighted" and "ara" then run as ARA* and return the best path
+    found in time, with result.bound saying how close to optimal it is.
+    Other modes ignore them.
+    """
+    if grid.walls[start] or grid.walls[goal]:
+        return SearchResult(None, INF, 0, 0.0)
+    if mode == "bfs":
+        return bfs(grid, start, goal)
+    if mode == "dijkstra":
+        return best_first(grid, start, goal, None, 1.0, 0.0)
+
+    h = heuristic_fn(heuristic, grid, goal, start)
+    budgeted = deadline is not None or max_nodes is not None
+    if mode == "ara" or (budgeted and mode in ("astar", "weighted")):
+        final = epsilon if mode == "weighted" else 1.0
+        return ara_star(grid, start, goal, h, epsilon, final, deadline, max_nodes)
+    if mode == "jps":
+        return jps(grid, start, goal, h)
+    if mode == "greedy":
+        res = best_first(grid, start, goal, h, 0.0, 1.0)
+        res.bound = INF
+        return res
+    if mode == "astar":
+        return best_first(grid, start, goal, h, 1.0, 1.0)
+    if mode == "weighted":
+        res = best_first(grid, start, goal, h, 1.0, max(epsilon, 1.0))
+        res.bound = max(epsilon, 1.0)
+        return res
+    raise ValueError(f"unknown search mode: {mode!r}")
+
+
+# ---------- anytime ----------
+def ara_star(grid: Grid, start: int, goal: int, h: Callable[[int], float],
+             epsilon: float = EPSILON, final_epsilon: float = 1.0,
+             deadline: Optional[float] = None, max_nodes: Optional[int] = None) -> SearchResult:
+    """
+    Anytime Repairing A* (Likhachev et al.): a weighted A* pass at 'epsilon',
+    then passes at epsilon - EPSILON_STEP ... down to 'final_epsilon', each
+    one reusing the previous g-values and re-expanding only the cells whose
+    cost went down (the INCONS list) instead of starting over.
+
+    Stops at 'deadline' (time.perf_counter()) or after 'max_nodes'
+    expansions and returns the last path found. result.bound is the
+    suboptimality proven for it: min(epsilon, cost / min(g + h) over the
+    open and inconsistent cells). INF with no path means time ran out first.
+    """
+    t0 = time.perf_counter()
+    ws = workspace_for(grid)
+    g, came_from, stamp = ws.g, ws.came_from, ws.stamp
+    seen = ws.next_tag()
+    steps, masks = grid.steps, grid.masks
+    kg = 1.0 - 1.0 / (grid.size + 1)  # same tie-break as best_first
+    push, pop = heapq.heappush, heapq.heappop
+    clock = time.perf_counter
+
+    eps = max(epsilon, final_epsilon, 1.0)
+    g[start] = 0
+    stamp[start] = seen
+    open_list = [(eps * h(start), start, 0)]  # (key, cell, g when pushed); outdated entries skipped
+    closed = set()
+    incons = set()
+    expanded = 0
+    path, cost, bound = None, INF, INF
+    check = SLICE_CHECK
+    out = False
+
+    while True:
+        # ---- improve path at eps ----
+        while open_list:
+            key, cur, gc = open_list[0]
+            if cur in closed or gc != g[cur]:
+                pop(open_list)
+                continue
+            if stamp[goal] == seen and kg * g[goal] <= key:
+                break
+            pop(open_list)
+            closed.add(cur)
+            expanded += 1
+            ng = gc + 1
+            for d in steps[masks[cur]]:
+                nxt = cur + d
+                if stamp[nxt] == seen and ng >= g[nxt]:
+                    continue
+                stamp[nxt] = seen
+                g[nxt] = ng
+                came_from[nxt] = cur
+                if nxt in closed:
+                    incons.add(nxt)
+                else:
+                    push(open_list, (kg * ng + eps * h(nxt), nxt, ng))
+            if max_nodes is not None and expanded >= max_nodes:
+                out = True
+                break
+            check -= 1
+            if not check:
+                check = SLICE_CHECK
+                if deadline is not None and clock() >= deadline:
+                    out = True
+                    break
+        if out:
+            break
+
+        if stamp[goal] != seen:
+            path, cost, bound = None, INF, 1.0  # everything reachable was searched
+            break
+        # later passes shorten the chain through came_from before g[goal]
+        # itself is lowered: the path is what was found, so cost comes from it
+        path = reconstruct(came_from, start, goal)
+        cost = len(path) - 1
+        frontier = {c for _, c, gc in open_list if gc == g[c] and c not in closed} | incons
+        lower = min((g[c] + h(c) for c in frontier), default=INF)
+        bound = max(1.0, min(eps, cost / lower if lower > 0 else eps))
+        if eps <= final_epsilon or bound <= final_epsilon:
+            break
+
+        # ---- next pass: lower eps, reopen the inconsistent cells ----
+        eps = max(final_epsilon, eps - EPSILON_STEP)
+        open_list = [(kg * g[c] + eps * h(c), c, g[c]) for c in frontier]
+        heapq.heapify(open_list)
+        closed = set()
+        incons = set()
+
+    return SearchResult(path, cost, expanded, (time.perf_counter() - t0) * 1000.0, bound)
+
+
+# ---------- resumable search ----------
+SLICE_CHECK = 64  # expansions between deadline checks in SearchJob.step
+
+_WEIGHTS = {"astar": (1.0, 1.0), "greedy": (0.0, 1.0), "dijkstra": (1.0, 0.0), "bfs": (1.0, 0.0),
+            "weighted": (1.0, EPSILON)}
+
+
+class SearchJob:
+    """
+    best_first() cut into slices: step(deadline) expands until the deadline
+    and returns False if it isn't done yet; call it again later to carry on.
+    "bfs" runs as Dijkstra (same path lengths on unit costs); "weighted"
+    inflates the heuristic by 'epsilon'.
+
+    The job keeps its stamps in 'ws', so it must not be the grid's shared
+    workspace (workspace_for) while the job is unfinished. Edits to the grid
+    in between slices are not tracked; check job.version and start over.
+    """
+    def __init__(self, grid: Grid, start: int, goal: int, mode: str = "astar",
+                 heuristic: str = "manhattan", ws: Optional[Workspace] = None,
+                 epsilon: float = EPSILON):
+        if mode not in _WEIGHTS:
+            raise ValueError(f"search mode {mode!r} can't be run in slices")
+        self.grid = grid
+        self.start = start
+        self.goal = goal
+        self.version = grid.version
+        self.result: Optional[SearchResult] = None
+        self.expanded = 0
+        self.slices = 0
+        self.elapsed_ms = 0.0
+        if grid.walls[start] or grid.walls[goal]:
+            self.result = SearchResult(None, INF, 0, 0.0)
+            return
+
+        g_weight, h_weight = _WEIGHTS[mode]
+        if mode == "weighted":
+            h_weight = max(epsilon, 1.0)
+        self.bound = INF if mode == "greedy" else h_weight or 1.0
+        self.h = heuristic_fn(heuristic, grid, goal, start) if h_weight else None
+        self.h_weight = h_weight
+        self.kg = g_weight - (1.0 / (grid.size + 1) if g_weight and h_weight else 0.0)
+        self.ws = ws if ws is not None else Workspace(grid.size)
+        self.seen = self.ws.next_tag()
+        self.ws.g[start] = 0
+        self.ws.stamp[start] = self.seen
+        self.open = [(h_weight * self.h(start) if self.h else 0, start)]
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def step(self, deadline: float) -> bool:
+        """Expand until done or time.perf_counter() passes 'deadline'. Returns done."""
+        if self.result is not None:
+            return True
+        t0 = time.perf_counter()
+        self.slices += 1
+        ws, grid = self.ws, self.grid
+        g, came_from, stamp = ws.g, ws.came_from, ws.stamp
+        seen, closed = self.seen, self.seen + 1
+        steps, masks = grid.steps, grid.masks
+        h, hw, kg, goal = self.h, self.h_weight, self.kg, self.goal
+        open_list = self.open
+        push, pop = heapq.heappush, heapq.heappop
+        clock = time.perf_counter
+        expanded = self.expanded
+        found = False
+        budget = SLICE_CHECK
+
+        while open_list:
+            _, cur = pop(open_list)
+            if stamp[cur] == closed:
+                continue
+            stamp[cur] = closed
+            expanded += 1
+            if cur == goal:
+                found = True
+                break
+
+            ng = g[cur] + 1
+            for d in steps[masks[cur]]:
+                nxt = cur + d
+                st = stamp[nxt]
+                if st == closed or (st == seen and ng >= g[nxt]):
+                    continue
+                stamp[nxt] = seen
+                g[nxt] = ng
+                came_from[nxt] = cur
+                push(open_list, (kg * ng + hw * h(nxt) if h else ng, nxt))
+
+            budget -= 1
+            if not budget:
+                budget = SLICE_CHECK
+                if clock() >= deadline:
+                    break
+
+        self.expanded = expanded
+        self.elapsed_ms += (clock() - t0) * 1000.0
+        if found or not open_list:
+            path = reconstruct(came_from, self.start, goal) if found else None
+            self.result = SearchResult(path, g[goal] if found else INF, expanded, self.elapsed_ms,
+                                       self.bound)
+            self.open = []
+            return True
+        return False
+
+
+# ---------- jump point search ----------
+class JumpTable:
+    """
+    Per-row horizontal jump data for 4-connected JPS, built once per grid
+    version (JPS+ style) so horizontal jumps are O(1):
+      run_r[i] / run_l[i] -> floor cells to the right / left of i before a wall
+      jp_r[i]  / jp_l[i]  -> steps to the first forced cell in that direction, 0 if none
+    A cell is forced when moving into it opens a vertical neighbour that the
+    cell behind it did not have; only there may a horizontal run turn vertical.
+    """
+    def __init__(self, grid: Grid):
+        self.grid = grid
+        n = grid.size
+        self.run_r = array("i", bytes(4 * n))
+        self.run_l = array("i", bytes(4 * n))
+        self.jp_r = array("i", bytes(4 * n))
+        self.jp_l = array("i", bytes(4 * n))
+        for y in range(grid.h):
+            self._build_row(y)
+        self.version = grid.version
+
+    def refresh(self) -> None:
+        grid = self.grid
+        if self.version == grid.version:
+            return
+        changes = grid.changes_since(self.version)
+        if changes is None:
+            rows = range(grid.h)
+        else:
+            # a tile decides forced cells in its own row and the rows beside it
+            rows = set()
+            for c in changes:
+                y = grid.pos(c)[1]
+                rows.update(r for r in (y - 1, y, y + 1) if 0 <= r < grid.h)
+        for y in rows:
+            self._build_row(y)
+        self.version = grid.version
+
+    def _build_row(self, y: int) -> None:
+        walls, s = self.grid.walls, self.grid.stride
+        lo = (y + 1) * s + 1
+        hi = lo + self.grid.w - 1
+        for step, run, jp, cells in ((1, self.run_r, self.jp_r, range(hi, lo - 1, -1)),
+                                     (-1, self.run_l, self.jp_l, range(lo, hi + 1))):
+            for c in cells:
+                nxt = c + step
+                if walls[c] or walls[nxt]:
+                    run[c] = jp[c] = 0
+                    continue
+                run[c] = run[nxt] + 1
+                if (walls[c - s] and not walls[nxt - s]) or (walls[c + s] and not walls[nxt + s]):
+                    jp[c] = 1
+                else:
+                    jp[c] = jp[nxt] + 1 if jp[nxt] else 0
+
+
+_jump_tables = weakref.WeakKeyDictionary()
+
+
+def jump_table_for(grid: Grid) -> JumpTable:
+    jt = _jump_tables.get(grid)
+    if jt is None:
+        jt = _jump_tables[grid] = JumpTable(grid)
+    else:
+        jt.refresh()
+    return jt
+
+
+def jps(grid: Grid, start: int, goal: int, h: Callable[[int], float]) -> SearchResult:
+    """
+    Jump Point Search for uniform-cost 4-connected grids.
+
+    Canonical paths only turn from horizontal to vertical at forced cells,
+    while vertical runs may turn horizontal anywhere (any shortest path can
+    be rewritten that way by moving vertical steps earlier). So:
+      * a horizontal jump stops at a forced cell, the goal, or a wall;
+      * a vertical jump stops where a horizontal jump from it would stop
+        somewhere, or at the goal;
+      * a node reached horizontally continues straight plus its forced
+        vertical(s); one reached vertically continues straight plus both
+        horizontals; the start tries all four.
+    Only jump points go on the open list. The returned path is expanded back
+    into contiguous cells.
+    """
+    t0 = time.perf_counter()
+    jt = jump_table_for(grid)
+    walls, s = grid.walls, grid.stride
+    run_r, run_l, jp_r, jp_l = jt.run_r, jt.run_l, jt.jp_r, jt.jp_l
+    goal_row = goal - goal % s
+
+    def jump_h(cur, d):
+        if d == 1:
+            jp, run = jp_r[cur], run_r[cur]
+        else:
+            jp, run = jp_l[cur], run_l[cur]
+        if goal_row <= cur < goal_row + s and 0 < (goal - cur) * d <= (jp or run):
+            return goal
+        return cur + d * jp if jp else -1
+
+    def jump_v(cur, d):
+        while True:
+            cur += d
+            if walls[cur]:
+                return -1
+            if cur == goal or jp_r[cur] or jp_l[cur]:
+                return cur
+            if goal_row <= cur < goal_row + s and (
+                    0 < goal - cur <= run_r[cur] or 0 < cur - goal <= run_l[cur]):
+                return cur
+
+    ws = workspace_for(grid)
+    g, came_from, stamp = ws.g, ws.came_from, ws.stamp
+    seen = ws.next_tag()
+    closed = seen + 1
+    arrive = {start: 0}  # jump point -> direction it was reached in (0 = start)
+    tie = 1.0 - 1.0 / (grid.size + 1)
+
+    g[start] = 0
+    stamp[start] = seen
+    open_list = [(h(start), start)]
+    push, pop = heapq.heappush, heapq.heappop
+    expanded = 0
+    found = False
+
+    while open_list:
+        _, cur = pop(open_list)
+        if stamp[cur] == closed:
+            continue
+        stamp[cur] = closed
+        expanded += 1
+        if cur == goal:
+            found = True
+            break
+
+        a = arrive[cur]
+        if a == 0:
+            dirs = (1, -1, s, -s)
+        elif a == 1 or a == -1:
+            dirs = [a]
+            if walls[cur - a - s] and not walls[cur - s]:
+                dirs.append(-s)
+            if walls[cur - a + s] and not walls[cur + s]:
+                dirs.append(s)
+        else:
+            dirs = (a, 1, -1)
+
+        gc = g[cur]
+        for d in dirs:
+            nxt = jump_h(cur, d) if (d == 1 or d == -1) else jump_v(cur, d)
+            if nxt < 0:
+                continue
+            ng = gc + (abs(nxt - cur) if (d == 1 or d == -1) else abs(nxt - cur) // s)
+            st = stamp[nxt]
+            if st == closed or (st == seen and ng >= g[nxt]):
+                continue
+            stamp[nxt] = seen
+            g[nxt] = ng
+            came_from[nxt] = cur
+            arrive[nxt] = d
+            push(open_list, (tie * ng + h(nxt), nxt))
+
+    path = None
+    if found:
+        points = reconstruct(came_from, start, goal)
+        path = [start]
+        for a, b in zip(points, points[1:]):
+            step = (1 if b > a else -1) if b // s == a // s else (s if b > a else -s)
+            path.extend(range(a + step, b + step, step))
+    return SearchResult(path, g[goal] if found else INF, expanded,
+                        (time.perf_counter() - t0) * 1000.0)
+
+
+# ---------- incremental replanning ----------
+class IncrementalPlanner:
+    """
+    Moving-target D* Lite for one chaser, kept alive between queries.
+
+    It is LPA* rooted at the chaser (start) with the heuristic anchored at the
+    player (goal), and repairs its previous search instead of starting over:
+      * goal moves  -> km += h(old goal, new goal); the queue is reused as-is
+      * tile edits  -> only edited cells and their neighbours are re-examined
+      * start moves -> the search subtree below the new start is kept and the
+                       rest cleared; kept g-values stay in the old root's frame
+                       and 'base' holds the new root's value in that frame
+    Anything else (first call, start off the tree, change log overflow) resets,
+    and so does a tile edit under a landmark heuristic (alt / differential):
+    its distance tables belong to the old tiles and may overestimate now.
+    """
+    def __init__(self, grid: Grid, heuristic: str = "manhattan"):
+        n = grid.size
+        self.grid = grid
+        self.heuristic = heuristic
+        self.g = [INF] * n
+        self.rhs = [INF] * n
+        self.parent = [-1] * n
+        self.okey = [None] * n   # key the cell is queued under, None if not queued
+        self.mark = [0] * n      # scratch for start moves
+        self._mtag = 0
+        self.open = []
+        self.touched: List[int] = []  # cells that ever got a finite value
+        self.start = -1
+        self.goal = -1
+        self.base = 0
+        self.km = 0
+        self.version = grid.version
+        self._h = None
+        self.expanded_total = 0
+        self.replans = 0
+
+    # ---- public ----
+    def plan(self, start: int, goal: int) -> SearchResult:
+        t0 = time.perf_counter()
+        grid = self.grid
+        if grid.walls[start] or grid.walls[goal]:
+            return SearchResult(None, INF, 0, 0.0)
+
+        changes = grid.changes_since(self.version) if self.version != grid.version else []
+        if self.start < 0 or changes is None or grid.walls[self.start] or \
+                (changes and self.heuristic in LANDMARK):
+            self._reset(start, goal)
+        else:
+            if start != self.start and not self._move_start(start):
+                self._reset(start, goal)
+            else:
+                if goal != self.goal:
+                    self._move_goal(goal)
+                for cell in changes:
+                    self._cell_changed(cell)
+        self.version = grid.version
+
+        expanded = self._compute()
+        self.expanded_total += expanded
+        self.replans += 1
+        path = self._extract()
+        cost = len(path) - 1 if path else INF
+        return SearchResult(path, cost, expanded, (time.perf_counter() - t0) * 1000.0)
+
+    # ---- LPA* core ----
+    def _key(self, s: int):
+        m = self.g[s]
+        r = self.rhs[s]
+        if r < m:
+            m = r
+        return (m + self._h(s) + self.km, m)
+
+    def _queue(self, s: int) -> None:
+        if self.g[s] != self.rhs[s]:
+            k = self._key(s)
+            if self.okey[s] != k:
+                self.okey[s] = k
+                heapq.heappush(self.open, (k[0], k[1], s))
+        else:
+            self.okey[s] = None
+
+    def _recompute_rhs(self, s: int) -> None:
+        if s == self.start:
+            return
+        g = self.g
+        best, par = INF, -1
+        for d in self.grid.steps[self.grid.masks[s]]:
+            v = g[s + d] + 1
+            if v < best:
+                best, par = v, s + d
+        if best < INF and self.rhs[s] == INF and g[s] == INF:
+            self.touched.append(s)
+        self.rhs[s] = best
+        self.parent[s] = par
+
+    def _compute(self) -> int:
+        g, rhs, parent, okey = self.g, self.rhs, self.parent, self.okey
+        steps, masks = self.grid.steps, self.grid.masks
+        open_list, touched = self.open, self.touched
+        pop, push = heapq.heappop, heapq.heappush
+        start, t = self.start, self.goal
+        expanded = 0
+
+        while open_list:
+            k1, k2, u = open_list[0]
+            if okey[u] != (k1, k2):
+                pop(open_list)  # stale entry
+                continue
+            if (k1, k2) >= self._key(t) and rhs[t] <= g[t]:
+                break
+            pop(open_list)
+            knew = self._key(u)
+            if (k1, k2) < knew:
+                okey[u] = knew
+                push(open_list, (knew[0], knew[1], u))
+                continue
+
+            expanded += 1
+            if g[u] > rhs[u]:
+                g[u] = rhs[u]
+                okey[u] = None
+                gu1 = g[u] + 1
+                for d in steps[masks[u]]:
+                    s = u + d
+                    if s != start and gu1 < rhs[s]:
+                        if rhs[s] == INF and g[s] == INF:
+                            touched.append(s)
+                        rhs[s] = gu1
+                        parent[s] = u
+                        self._queue(s)
+            else:
+                g[u] = INF
+                self._recompute_rhs(u)
+                self._queue(u)
+                for d in steps[masks[u]]:
+                    s = u + d
+                    if parent[s] == u:
+                        self._recompute_rhs(s)
+                        self._queue(s)
+        return expanded
+
+    def _extract(self) -> Optional[List[int]]:
+        g, steps, masks = self.g, self.grid.steps, self.grid.masks
+        cur = self.goal
+        # the goal may be left over-consistent; its rhs is exact
+        best = min(g[cur], self.rhs[cur])
+        if best == INF:
+            return None
+        path = [cur]
+        limit = best - self.base + 1
+        while cur != self.start:
+            if limit <= 0:
+                return None
+            limit -= 1
+            nxt, nbest = -1, INF
+            for d in steps[masks[cur]]:
+                v = g[cur + d]
+                if v < nbest:
+                    nxt, nbest = cur + d, v
+            if nxt < 0:
+                return None
+            cur = nxt
+            path.append(cur)
+        path.reverse()
+        return path
+
+    # ---- repairs ----
+    def _reset(self, start: int, goal: int) -> None:
+        g, rhs, parent, okey = self.g, self.rhs, self.parent, self.okey
+        for s in self.touched:
+            g[s] = rhs[s] = INF
+            parent[s] = -1
+            okey[s] = None
+        self.touched = [start]
+        self.open = []
+        self.start, self.goal = start, goal
+        self.base = 0
+        self.km = 0
+        self._h = heuristic_fn(self.heuristic, self.grid, goal)
+        rhs[start] = 0
+        self._queue(start)
+
+    def _move_goal(self, goal: int) -> None:
+        old = self.goal
+        self._h = heuristic_fn(self.heuristic, self.grid, goal)
+        self.km += self._h(old)
+        self.goal = goal
+
+    def _cell_changed(self, cell: int) -> None:
+        for s in (cell,) + tuple(cell + d for d in self.grid.offsets):
+            if s != self.start:
+                self._recompute_rhs(s)
+                self._queue(s)
+
+    def _move_start(self, start: int) -> bool:
+        """
+        Re-root at 'start' keeping its search subtree. False if 'start' is not
+        on the tree (caller resets instead).
+        """
+        g, rhs, parent, okey, mark = self.g, self.rhs, self.parent, self.okey, self.mark
+        if rhs[start] == INF:
+            return False
+
+        tag = self._mtag = self._mtag + 4
+        yes, no, walking, kept = tag, tag + 1, tag + 2, tag + 3
+        mark[start] = yes
+        old_touched = self.touched
+
+        # classify every touched cell by walking parent links (memoised)
+        for v in old_touched:
+            chain = []
+            u = v
+            while True:
+                m = mark[u]
+                if m == yes or m == no:
+                    res = m
+                    break
+                if m == walking:  # parent links can loop while inconsistent
+                    res = no
+                    break
+                mark[u] = walking
+                chain.append(u)
+                u = parent[u]
+                if u < 0:
+                    res = no
+                    break
+            for c in chain:
+                mark[c] = res
+
+        keep, dropped = [], []
+        for v in old_touched:
+            m = mark[v]
+            if m == yes:
+                keep.append(v)
+                mark[v] = kept
+            elif m == no:
+                dropped.append(v)
+                mark[v] = kept
+                g[v] = rhs[v] = INF
+                parent[v] = -1
+                okey[v] = None
+
+        self.touched = keep
+        self.start = start
+        self.base = rhs[start]
+        parent[start] = -1
+        for v in dropped:
+            self._recompute_rhs(v)
+        for v in dropped:
+            self._queue(v)
+        self._queue(start)
+
+        # drop stale heap entries along with the cleared cells
+        self.open = [(k[0], k[1], v) for v in self.touched if (k := okey[v]) is not None]
+        heapq.heapify(self.open)
+        return True
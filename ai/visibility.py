@@ -0,0 +1,214 @@
+# ai/visibility.py
+"""
+Line of sight and field of view on a Grid.
+
+  line_of_sight(grid, a, b)       Bresenham walk over cell indices, stops at
+                                  the first wall in between (the ends may be
+                                  walls: a wall can be seen)
+  field_of_view(grid, origin, r)  recursive shadowcasting, eight octants; the
+                                  cells (walls included) lit within radius r
+
+Visibility caches both per grid: FOV sets by (origin, radius) in an LRU,
+dropped only when an edited cell lies within that radius of the origin (a
+wall farther out can't shadow anything inside), and LOS answers by cell
+pair until the next edit. Enemies standing still ask the same question
+every tick, so most detection checks are a distance test and a dict hit.
+
+Explored is the cells a player has seen so far, one bit per cell; reveal()
+ORs in a FOV and queues just the newly seen cells, which is all a minimap
+needs to repaint (take_fresh()).
+"""
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Tuple
+
+from .grid import Grid
+
+GridPos = Tuple[int, int]
+
+FOV_CACHE = 512    # FOV sets kept per Visibility
+LOS_CACHE = 4096   # LOS answers kept between tile edits
+
+# octant transforms (xx, xy, yx, yy): grid dx, dy from row depth and column
+_OCTANTS = ((1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+            (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1))
+
+
+def line_of_sight(grid: Grid, a: GridPos, b: GridPos) -> bool:
+    """Whether no wall lies strictly between a and b on the Bresenham line."""
+    (x0, y0), (x1, y1) = a, b
+    walls, stride = grid.walls, grid.stride
+    dx, dy = abs(x1 - x0), -abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = stride if y0 < y1 else -stride
+    err = dx + dy
+    i, end = grid.index(x0, y0), grid.index(x1, y1)
+    if i == end:
+        return True
+    while True:
+        e2 = 2 * err
+        if e2 >= dy:
+            err += dy
+            i += sx
+        if e2 <= dx:
+            err += dx
+            i += sy
+        if i == end:
+            return True
+        if walls[i]:
+            return False
+
+
+def field_of_view(grid: Grid, origin: GridPos, radius: int) -> FrozenSet[int]:
+    """Cell indices visible from 'origin' within Euclidean 'radius' (origin included)."""
+    ox, oy = origin
+    lit = {grid.index(ox, oy)}
+    # bounds checks are only needed when the radius reaches past the level
+    inside = radius < min(ox, oy, grid.w - 1 - ox, grid.h - 1 - oy)
+    for oct_ in _OCTANTS:
+        _cast(grid, ox, oy, 1, 1.0, 0.0, radius, oct_, inside, lit)
+    return frozenset(lit)
+
+
+def _cast(grid: Grid, ox: int, oy: int, row: int, start: float, end: float,
+          radius: int, oct_, inside: bool, lit: set) -> None:
+    # Bergstrom's shadowcasting: scan rows outwards, each between slopes
+    # start..end; a run of walls narrows the scan and recurses past it.
+    if start < end:
+        return
+    xx, xy, yx, yy = oct_
+    walls, stride = grid.walls, grid.stride
+    w, h = grid.w, grid.h
+    o = grid.index(ox, oy)
+    col, depth = xx + yx * stride, xy + yy * stride  # index offsets per dx, dy
+    r2 = radius * radius
+    new_start = start
+    for j in range(row, radius + 1):
+        dx, dy = -j - 1, -j
+        blocked = False
+        while dx <= 0:
+            dx += 1
+            r_slope = (dx + 0.5) / (dy - 0.5)
+            if start < r_slope:
+                continue
+            l_slope = (dx - 0.5) / (dy + 0.5)
+            if end > l_slope:
+                break
+            if inside or 0 <= ox + dx * xx + dy * xy < w and 0 <= oy + dx * yx + dy * yy < h:
+                i = o + dx * col + dy * depth
+                wall = walls[i]
+                if dx * dx + dy * dy <= r2:
+                    lit.add(i)
+            else:
+                wall = 1  # the border and past it: nothing to see
+            if blocked:
+                if wall:
+                    new_start = r_slope
+                else:
+                    blocked = False
+                    start = new_start
+            elif wall and j < radius:
+                blocked = True
+                _cast(grid, ox, oy, j + 1, start, l_slope, radius, oct_, inside, lit)
+                new_start = r_slope
+        if blocked:
+            break
+
+
+class Visibility:
+    """Cached FOV and LOS queries on one grid (World.visibility)."""
+    def __init__(self, grid: Grid, cache_size: int = FOV_CACHE):
+        self.grid = grid
+        self.cache_size = cache_size
+        self.version = grid.version
+        self._fov: "OrderedDict[Tuple[int, int], FrozenSet[int]]" = OrderedDict()
+        self._los: Dict[Tuple[int, int], bool] = {}
+        # stats
+        self.fov_hits = 0
+        self.fov_misses = 0
+
+    def _sync(self) -> None:
+        grid = self.grid
+        if self.version == grid.version:
+            return
+        self._los.clear()
+        changed = grid.changes_since(self.version)
+        self.version = grid.version
+        if changed is None:
+            self._fov.clear()
+            return
+        stride = grid.stride
+        edits = [divmod(c, stride) for c in set(changed)]
+        for key in list(self._fov):
+            oy, ox = divmod(key[0], stride)
+            r = key[1]
+            if any(abs(ex - ox) <= r and abs(ey - oy) <= r for ey, ex in edits):
+                del self._fov[key]
+
+    def visible(self, pos: GridPos, radius: int) -> FrozenSet[int]:
+        """field_of_view(), recomputed only after a tile edit within 'radius' of pos."""
+        self._sync()
+        key = (self.grid.index(*pos), radius)
+        fov = self._fov.get(key)
+        if fov is not None:
+            self._fov.move_to_end(key)
+            self.fov_hits += 1
+            return fov
+        self.fov_misses += 1
+        fov = self._fov[key] = field_of_view(self.grid, pos, radius)
+        if len(self._fov) > self.cache_size:
+            self._fov.popitem(last=False)
+        return fov
+
+    def can_see(self, a: GridPos, b: GridPos, radius: int) -> bool:
+        """b within Euclidean 'radius' of a and in line of sight; out-of-range pairs cost one test."""
+        dx, dy = a[0] - b[0], a[1] - b[1]
+        if dx * dx + dy * dy > radius * radius:
+            return False
+        self._sync()
+        grid = self.grid
+        key = (grid.index(*a), grid.index(*b))
+        seen = self._los.get(key)
+        if seen is None:
+            if len(self._los) >= LOS_CACHE:
+                self._los.clear()
+            seen = self._los[key] = line_of_sight(grid, a, b)
+        return seen
+
+
+class Explored:
+    """Cells seen so far, one bit each in the grid's index layout."""
+    def __init__(self, grid: Grid):
+        self.grid = grid
+        self.bits = bytearray((grid.size + 7) >> 3)
+        self.count = 0
+        self.fresh: List[int] = []  # revealed since the last take_fresh()
+        self._last = None  # the set revealed last; a player standing still repeats it
+
+    def __contains__(self, i: int) -> bool:
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+    def reveal(self, cells) -> List[int]:
+        """Mark 'cells' explored; returns the ones that weren't yet."""
+        if cells is self._last:
+            return []
+        bits = self.bits
+        new = []
+        for i in cells:
+            byte, bit = i >> 3, 1 << (i & 7)
+            if not bits[byte] & bit:
+                bits[byte] |= bit
+                new.append(i)
+        self.count += len(new)
+        self.fresh.extend(new)
+        self._last = cells
+        return new
+
+    def take_fresh(self) -> List[int]:
+        fresh, self.fresh = self.fresh, []
+        return fresh
+
+    def clear(self) -> None:
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+        self.fresh = []
+        self._last = None
@@ -0,0 +1,460 @@
+# ai/visualize.py
+"""
+Search traces: what a query pushed, popped and relaxed, in order, for
+replaying over the board.
+
+    trace = Trace()
+    res = traced_search("astar", grid, start, goal, trace, "manhattan")
+    trace.save("query.trc")                      # python -m ai.visualize query.trc
+    replay = Replay(trace, speed=4000)           # events per second
+    replay.advance(dt); replay.draw(surf, offset, tile, view_cells)
+
+Tracing never touches ai/search.py: traced_search() runs its own copies of
+the best-first and BFS loops with the event writes inlined, so production
+queries pay nothing, not even a flag test per node; tests/test_visualize.py
+checks that the copies still match search(). Events go into preallocated
+arrays (kinds: bytearray, cells: array "i", values: array "f", g or
+priority), one slot each; a query that outgrows the buffer keeps running
+and only counts what it couldn't record (trace.dropped).
+
+A .trc file holds a header, the grid's walls and the three event arrays, in
+native byte order like the level pack.
+"""
+import argparse
+import heapq
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+from .grid import Grid
+from .heuristics import heuristic_fn
+from .search import EPSILON, INF, SearchResult, reconstruct, workspace_for
+
+try:
+    import pygame
+except ImportError:  # tracing and export work without it; only Replay.draw() and the viewer need it
+    pygame = None
+
+# event kinds
+PUSH, POP, RELAX, PATH = 0, 1, 2, 3
+KIND_NAMES = ("push", "pop", "relax", "path")
+
+TRACE_MODES = ("greedy", "astar", "dijkstra", "bfs", "weighted")
+CAPACITY = 1 << 20  # events per Trace by default (~9 MB of buffers)
+
+MAGIC = b"SRCHTRC1"
+_HEADER = struct.Struct("<8s16s16sHHiiIIIf")
+# magic, mode, heuristic, width, height, start, goal,
+# events recorded, events dropped, nodes expanded, elapsed ms
+
+
+class Trace:
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self.kinds = bytearray(capacity)
+        self.cells = array("i", [0]) * capacity
+        self.values = array("f", [0.0]) * capacity
+        self.n = 0
+        self.dropped = 0
+        # the query
+        self.mode = ""
+        self.heuristic = ""
+        self.width = self.height = 0
+        self.walls = b""
+        self.start = self.goal = -1
+        self.expanded = 0
+        self.elapsed_ms = 0.0
+
+    def __len__(self) -> int:
+        return self.n
+
+    def begin(self, grid: Grid, mode: str, heuristic: str, start: int, goal: int) -> None:
+        self.n = self.dropped = 0
+        self.mode, self.heuristic = mode, heuristic
+        self.width, self.height = grid.w, grid.h
+        self.walls = bytes(grid.walls)
+        self.start, self.goal = start, goal
+
+    def finish(self, res: SearchResult, n: int, dropped: int) -> None:
+        self.n, self.dropped = n, dropped
+        self.expanded = res.expanded
+        self.elapsed_ms = res.elapsed_ms
+
+    @property
+    def stride(self) -> int:
+        return self.width + 2
+
+    def pos(self, i: int) -> Tuple[int, int]:
+        y, x = divmod(i, self.stride)
+        return x - 1, y - 1
+
+    def counts(self):
+        """Events recorded per kind name."""
+        kinds = memoryview(self.kinds)[:self.n]
+        return {name: kinds.tobytes().count(k) for k, name in enumerate(KIND_NAMES)}
+
+    # ---------- binary export ----------
+    def save(self, path: str) -> None:
+        n = self.n
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, self.mode.encode("ascii"), self.heuristic.encode("ascii"),
+                                 self.width, self.height, self.start, self.goal,
+                                 n, self.dropped, self.expanded, self.elapsed_ms))
+            f.write(self.walls)
+            f.write(self.kinds[:n])
+            f.write(self.cells[:n].tobytes())
+            f.write(self.values[:n].tobytes())
+
+    @classmethod
+    def load(cls, path: str) -> "Trace":
+        with open(path, "rb") as f:
+            data = f.read()
+        (magic, mode, heuristic, width, height, start, goal,
+         n, dropped, expanded, elapsed_ms) = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a search trace")
+        trace = cls(max(n, 1))
+        trace.mode = mode.rstrip(b"\0").decode("ascii")
+        trace.heuristic = heuristic.rstrip(b"\0").decode("ascii")
+        trace.width, trace.height = width, height
+        trace.start, trace.goal = start, goal
+        trace.expanded, trace.elapsed_ms = expanded, elapsed_ms
+        pos = _HEADER.size
+        size = (width + 2) * (height + 2)
+        trace.walls = data[pos:pos + size]
+        pos += size
+        trace.kinds[:n] = data[pos:pos + n]
+        pos += n
+        trace.cells[:n] = array("i", data[pos:pos + 4 * n])
+        pos += 4 * n
+        trace.values[:n] = array("f", data[pos:pos + 4 * n])
+        trace.n, trace.dropped = n, dropped
+        return trace
+
+
+# ---------- traced searches ----------
+# Same loops as ai/search.py's best_first() and bfs(), plus the event writes.
+def _traced_best_first(grid: Grid, start: int, goal: int, h: Optional[Callable[[int], float]],
+                       g_weight: float, h_weight: float, trace: Trace) -> SearchResult:
+    t0 = time.perf_counter()
+    ws = workspace_for(grid)
+    g, came_from, stamp = ws.g, ws.came_from, ws.stamp
+    seen = ws.next_tag()
+    closed = seen + 1
+    steps, masks = grid.steps, grid.masks
+    kinds, cells, values, cap = trace.kinds, trace.cells, trace.values, trace.capacity
+    dropped = 0
+
+    kg = g_weight
+    if g_weight and h_weight:
+        kg -= 1.0 / (grid.size + 1)
+    use_h = h_weight != 0
+
+    g[start] = 0
+    stamp[start] = seen
+    f0 = h_weight * h(start) if use_h else 0
+    open_list = [(f0, start)]
+    kinds[0], cells[0], values[0] = PUSH, start, f0
+    n = 1
+    push, pop = heapq.heappush, heapq.heappop
+    expanded = 0
+    found = False
+
+    while open_list:
+        _, cur = pop(open_list)
+        if stamp[cur] == closed:
+            continue
+        stamp[cur] = closed
+        expanded += 1
+        if n < cap:
+            kinds[n], cells[n], values[n] = POP, cur, g[cur]
+            n += 1
+        else:
+            dropped += 1
+        if cur == goal:
+            found = True
+            break
+
+        ng = g[cur] + 1
+        for d in steps[masks[cur]]:
+            nxt = cur + d
+            st = stamp[nxt]
+            if st == closed or (st == seen and ng >= g[nxt]):
+                continue
+            kind = RELAX if st == seen else PUSH
+            stamp[nxt] = seen
+            g[nxt] = ng
+            came_from[nxt] = cur
+            f = kg * ng + h_weight * h(nxt) if use_h else ng
+            push(open_list, (f, nxt))
+            if n < cap:
+                kinds[n], cells[n], values[n] = kind, nxt, f
+                n += 1
+            else:
+                dropped += 1
+
+    path = reconstruct(came_from, start, goal) if found else None
+    res = SearchResult(path, g[goal] if found else INF, expanded,
+                       (time.perf_counter() - t0) * 1000.0)
+    return _close(trace, res, n, dropped)
+
+
+def _traced_bfs(grid: Grid, start: int, goal: int, trace: Trace) -> SearchResult:
+    t0 = time.perf_counter()
+    ws = workspace_for(grid)
+    came_from, stamp = ws.came_from, ws.stamp
+    seen = ws.next_tag()
+    steps, masks = grid.steps, grid.masks
+    kinds, cells, values, cap = trace.kinds, trace.cells, trace.values, trace.capacity
+    depth = {start: 0}
+
+    stamp[start] = seen
+    frontier = deque([start])
+    kinds[0], cells[0], values[0] = PUSH, start, 0
+    n, dropped = 1, 0
+    expanded = 0
+    found = False
+
+    while frontier:
+        cur = frontier.popleft()
+        expanded += 1
+        d0 = depth[cur]
+        if n < cap:
+            kinds[n], cells[n], values[n] = POP, cur, d0
+            n += 1
+        else:
+            dropped += 1
+        if cur == goal:
+            found = True
+            break
+        for d in steps[masks[cur]]:
+            nxt = cur + d
+            if stamp[nxt] == seen:
+                continue
+            stamp[nxt] = seen
+            came_from[nxt] = cur
+            depth[nxt] = d0 + 1
+            frontier.append(nxt)
+            if n < cap:
+                kinds[n], cells[n], values[n] = PUSH, nxt, d0 + 1
+                n += 1
+            else:
+                dropped += 1
+
+    path = reconstruct(came_from, start, goal) if found else None
+    res = SearchResult(path, len(path) - 1 if found else INF, expanded,
+                       (time.perf_counter() - t0) * 1000.0)
+    return _close(trace, res, n, dropped)
+
+
+def _close(trace: Trace, res: SearchResult, n: int, dropped: int) -> SearchResult:
+    kinds, cells, values, cap = trace.kinds, trace.cells, trace.values, trace.capacity
+    for k, c in enumerate(res.path or ()):
+        if n < cap:
+            kinds[n], cells[n], values[n] = PATH, c, k
+            n += 1
+        else:
+            dropped += 1
+    trace.finish(res, n, dropped)
+    return res
+
+
+def traced_search(mode: str, grid: Grid, start: int, goal: int, trace: Trace,
+                  heuristic: str = "manhattan", epsilon: float = EPSILON) -> SearchResult:
+    """
+    search() for the modes in TRACE_MODES, recording into 'trace' (which is
+    reset first). Same paths and expansion counts as the untraced search.
+    """
+    if mode not in TRACE_MODES:
+        raise ValueError(f"mode {mode!r} can't be traced, expected one of {TRACE_MODES}")
+    trace.begin(grid, mode, heuristic, start, goal)
+    if grid.walls[start] or grid.walls[goal]:
+        res = SearchResult(None, INF, 0, 0.0)
+        trace.finish(res, 0, 0)
+    elif mode == "bfs":
+        res = _traced_bfs(grid, start, goal, trace)
+    elif mode == "dijkstra":
+        res = _traced_best_first(grid, start, goal, None, 1.0, 0.0, trace)
+    else:
+        h = heuristic_fn(heuristic, grid, goal, start)
+        if mode == "greedy":
+            res = _traced_best_first(grid, start, goal, h, 0.0, 1.0, trace)
+            res.bound = INF
+        elif mode == "weighted":
+            res = _traced_best_first(grid, start, goal, h, 1.0, max(epsilon, 1.0), trace)
+            res.bound = max(epsilon, 1.0)
+        else:
+            res = _traced_best_first(grid, start, goal, h, 1.0, 1.0, trace)
+    return res
+
+
+# ---------- replay ----------
+OPEN_COLOR = (90, 170, 255, 110)
+CLOSED_COLOR = (255, 150, 60, 120)
+PATH_COLOR = (60, 200, 120, 200)
+ENDS_COLOR = (255, 255, 255)
+
+# cell states while replaying
+_NONE, _OPEN, _CLOSED, _PATH = 0, 1, 2, 3
+_STATE_OF = (_OPEN, _CLOSED, _OPEN, _PATH)  # by event kind
+
+
+class Replay:
+    """
+    Steps through a Trace at 'speed' events per second, keeping each cell's
+    latest state (open, closed, on the path). draw() only visits the cells
+    in view, so a 200k-event trace draws as fast as a small one.
+    """
+    def __init__(self, trace: Trace, speed: float = 2000.0):
+        self.trace = trace
+        self.speed = speed
+        self.paused = False
+        self.pos = 0        # events applied
+        self._carry = 0.0   # fractional events owed by advance()
+        self.state = bytearray((trace.width + 2) * (trace.height + 2))
+        self._tiles = {}    # (tile, state) -> translucent overlay
+
+    @property
+    def done(self) -> bool:
+        return self.pos >= self.trace.n
+
+    def advance(self, dt: float) -> int:
+        """Apply the events due after dt seconds; returns how many."""
+        if self.paused or self.done:
+            return 0
+        self._carry += dt * self.speed
+        k = int(self._carry)
+        self._carry -= k
+        return self.seek(self.pos + k)
+
+    def seek(self, pos: int) -> int:
+        """Jump to event 'pos' (forwards applies events, backwards replays from the start)."""
+        trace = self.trace
+        pos = min(max(pos, 0), trace.n)
+        if pos < self.pos:
+            self.state = bytearray(len(self.state))
+            self.pos = 0
+        state, kinds, cells = self.state, trace.kinds, trace.cells
+        for e in range(self.pos, pos):
+            state[cells[e]] = _STATE_OF[kinds[e]]
+        moved, self.pos = pos - self.pos, pos
+        return moved
+
+    def _overlay(self, tile: int, st: int):
+        surf = self._tiles.get((tile, st))
+        if surf is None:
+            surf = pygame.Surface((tile, tile), pygame.SRCALPHA)
+            surf.fill((OPEN_COLOR, CLOSED_COLOR, PATH_COLOR)[st - 1])
+            self._tiles[(tile, st)] = surf
+        return surf
+
+    def draw(self, surf, offset: Tuple[int, int], tile: int,
+             cells: Optional[Tuple[int, int, int, int]] = None) -> None:
+        """Overlay the replay on a board drawn at 'offset' with 'tile' px cells; 'cells' limits it to (x0, y0, x1, y1)."""
+        trace = self.trace
+        w, h, stride = trace.width, trace.height, trace.stride
+        x0, y0, x1, y1 = cells or (0, 0, w, h)
+        x0, y0, x1, y1 = max(0, x0), max(0, y0), min(w, x1), min(h, y1)
+        ox, oy = offset
+        state = self.state
+        overlays = {st: self._overlay(tile, st) for st in (_OPEN, _CLOSED, _PATH)}
+        blits = []
+        for y in range(y0, y1):
+            base = (y + 1) * stride + 1
+            row = state[base + x0:base + x1]
+            if not any(row):
+                continue
+            py = oy + y * tile
+            for x, st in enumerate(row, x0):
+                if st:
+                    blits.append((overlays[st], (ox + x * tile, py)))
+        surf.blits(blits, doreturn=False)
+        for c in (trace.start, trace.goal):
+            if c >= 0:
+                x, y = trace.pos(c)
+                pygame.draw.rect(surf, ENDS_COLOR, (ox + x * tile, oy + y * tile, tile, tile), 2)
+
+
+# ---------- standalone viewer ----------
+WALL_COLOR = (180, 50, 100)
+FLOOR_COLOR = (255, 240, 245)
+
+
+def view(trace: Trace, speed: float = 2000.0, size: Tuple[int, int] = (1000, 800)) -> None:
+    """
+    Window replaying 'trace' over its grid. SPACE pauses, [ and ] halve /
+    double the speed, LEFT / RIGHT step back / forward one event (paused),
+    HOME restarts, ESC quits.
+    """
+    if pygame is None:
+        raise RuntimeError("the trace viewer needs pygame")
+    pygame.init()
+    screen = pygame.display.set_mode(size)
+    pygame.display.set_caption(f"trace: {trace.mode}/{trace.heuristic}, {trace.n:,} events")
+    font = pygame.font.Font(None, 24)
+    tile = max(1, min((size[0] - 20) // trace.width, (size[1] - 50) // trace.height))
+    offset = (10, 40)
+
+    board = pygame.Surface((trace.width * tile, trace.height * tile)).convert()
+    board.fill(FLOOR_COLOR)
+    for i, wall in enumerate(trace.walls):
+        x, y = trace.pos(i)
+        if wall and 0 <= x < trace.width and 0 <= y < trace.height:
+            board.fill(WALL_COLOR, (x * tile, y * tile, tile, tile))
+
+    replay = Replay(trace, speed)
+    clock = pygame.time.Clock()
+    running = True
+    while running:
+        dt = clock.tick(60) / 1000.0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_SPACE:
+                    replay.paused = not replay.paused
+                elif event.key == pygame.K_LEFTBRACKET:
+                    replay.speed = max(1.0, replay.speed / 2)
+                elif event.key == pygame.K_RIGHTBRACKET:
+                    replay.speed *= 2
+                elif event.key == pygame.K_RIGHT:
+                    replay.seek(replay.pos + 1)
+                elif event.key == pygame.K_LEFT:
+                    replay.seek(replay.pos - 1)
+                elif event.key == pygame.K_HOME:
+                    replay.seek(0)
+        replay.advance(dt)
+
+        screen.fill((30, 20, 40))
+        screen.blit(board, offset)
+        replay.draw(screen, offset, tile)
+        status = (f"{replay.pos:,}/{trace.n:,} events  {replay.speed:,.0f}/s"
+                  f"{'  paused' if replay.paused else ''}  expanded {trace.expanded:,}"
+                  f"  dropped {trace.dropped:,}")
+        screen.blit(font.render(status, True, (240, 240, 240)), (10, 12))
+        pygame.display.flip()
+    pygame.quit()
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Replay a search trace (.trc) written by Trace.save()")
+    ap.add_argument("path")
+    ap.add_argument("--speed", type=float, default=2000.0, help="events per second")
+    ap.add_argument("--info", action="store_true", help="print a summary instead of opening a window")
+    args = ap.parse_args(argv)
+    trace = Trace.load(args.path)
+    if args.info:
+        print(f"{trace.mode}/{trace.heuristic} {trace.width}x{trace.height}: "
+              f"expanded {trace.expanded:,} in {trace.elapsed_ms:.2f} ms, "
+              f"{trace.n:,} events ({trace.dropped:,} dropped) {trace.counts()}")
+        return
+    view(trace, args.speed)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,106 @@
+# game/asset_cache.py
+"""
+Process-wide image cache. Each asset is read, decoded, converted and scaled
+once per (path, size); every Player, Enemy and menu after that gets the same
+Surface back, so restarting a level does no file I/O and no scaling.
+
+    sprite = asset_cache.image("cookie.png", (42, 42))
+    asset_cache.warm_up([("oven.png", (40, 40))], background=True)
+
+PNGs keep per-pixel alpha and are smooth-scaled; anything else (the JPEG
+menu background) is converted opaque and scaled plainly. Missing or broken
+files are cached as None, so callers keep their drawn fallbacks.
+"""
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import pygame
+except ImportError:  # headless runs never draw
+    pygame = None
+
+ASSET_DIR = os.path.join(os.path.dirname(__file__), "assets")
+
+Size = Optional[Tuple[int, int]]
+Key = Tuple[str, Size]
+
+_surfaces: Dict[Key, Optional["pygame.Surface"]] = {}
+_pending: Dict[Key, threading.Event] = {}  # keys some thread is loading right now
+_lock = threading.Lock()
+stats = {"loads": 0, "hits": 0}
+
+
+def _path(name: str) -> str:
+    return name if os.path.isabs(name) else os.path.join(ASSET_DIR, name)
+
+
+def _load(path: str, size: Size):
+    if pygame is None or not os.path.exists(path):
+        return None
+    try:
+        img = pygame.image.load(path)
+        alpha = path.lower().endswith(".png")
+        if pygame.display.get_surface() is not None:
+            img = img.convert_alpha() if alpha else img.convert()
+        if size is not None and img.get_size() != tuple(size):
+            scale = pygame.transform.smoothscale if alpha else pygame.transform.scale
+            img = scale(img, size)
+        return img
+    except Exception:
+        return None
+
+
+def image(name: str, size: Size = None):
+    """
+    The cached Surface for 'name' (relative to game/assets) at 'size', or None
+    if it can't be loaded. If the warm-up thread is already loading it, waits
+    for that instead of loading it twice.
+    """
+    key = (_path(name), tuple(size) if size else None)
+    while True:
+        with _lock:
+            if key in _surfaces:
+                stats["hits"] += 1
+                return _surfaces[key]
+            ev = _pending.get(key)
+            owner = ev is None
+            if owner:
+                ev = _pending[key] = threading.Event()
+        if owner:
+            break
+        ev.wait()
+
+    surf = _load(*key)
+    with _lock:
+        _surfaces[key] = surf
+        del _pending[key]
+        stats["loads"] += 1
+    ev.set()
+    return surf
+
+
+def warm_up(specs: Iterable[Tuple[str, Size]], background: bool = False):
+    """
+    Load every (name, size) up front. With background=True this happens on a
+    daemon thread (returned) while the caller goes on; call it after
+    display.set_mode() so the surfaces come out converted.
+    """
+    specs = list(specs)
+
+    def work():
+        for name, size in specs:
+            image(name, size)
+
+    if not background:
+        work()
+        return None
+    t = threading.Thread(target=work, name="asset-warm-up", daemon=True)
+    t.start()
+    return t
+
+
+def clear() -> None:
+    """Drop every cached Surface (e.g. after the display mode changes)."""
+    with _lock:
+        _surfaces.clear()
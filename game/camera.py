@@ -0,0 +1,80 @@
+# game/camera.py
+"""
+Viewport onto the board: which part of the level is on screen, at what zoom.
+
+The camera keeps the player centred inside 'view' (a screen rect), clamped
+so the board edge never scrolls into the middle of the view; a level that
+fits is simply drawn at 'home' as before. Everything the game draws for the
+level goes through it:
+
+    cam.follow(world, player.grid_pos())
+    world.draw(screen, cam)                 only the chunks cam.view touches
+    if cam.sees(e.grid_pos()): e.draw(screen, cam.offset, cam.tile)
+
+World.draw() renders the board in CHUNK x CHUNK tile pieces (game/world.py),
+so a frame costs about the same on a 20x15 level and a 256x256 one.
+"""
+from typing import Tuple
+
+from .world import BOARD_MARGIN, TILE
+
+GridPos = Tuple[int, int]
+
+ZOOMS = (0.5, 0.75, 1.0, 1.25, 1.5)  # multiples of TILE; index 2 is 1:1
+
+
+class Camera:
+    def __init__(self, view: Tuple[int, int, int, int], home: Tuple[int, int] = (40, 60)):
+        self.view = view  # (x, y, w, h) on screen
+        self.home = home  # board origin while the level fits
+        self.zoom_i = ZOOMS.index(1.0)
+        self.offset = home  # screen position of cell (0, 0)'s top-left corner
+
+    @property
+    def zoom(self) -> float:
+        return ZOOMS[self.zoom_i]
+
+    @property
+    def tile(self) -> int:
+        return round(TILE * self.zoom)
+
+    def zoom_by(self, step: int) -> bool:
+        """Step through ZOOMS; False when already at the end."""
+        i = min(max(self.zoom_i + step, 0), len(ZOOMS) - 1)
+        changed, self.zoom_i = i != self.zoom_i, i
+        return changed
+
+    def follow(self, world, pos: GridPos) -> None:
+        """Put 'pos' in the middle of the view, as far as the board allows."""
+        vx, vy, vw, vh = self.view
+        t = self.tile
+        self.offset = (self._axis(vx, vw, self.home[0], world.w * t, pos[0] * t + t // 2),
+                       self._axis(vy, vh, self.home[1], world.h * t, pos[1] * t + t // 2))
+
+    @staticmethod
+    def _axis(v0: int, vsize: int, home: int, size: int, at: int) -> int:
+        m = BOARD_MARGIN
+        if home - m >= v0 and home + size + m <= v0 + vsize:
+            return home  # fits where it always was
+        if size + 2 * m <= vsize:
+            return v0 + (vsize - size) // 2
+        o = v0 + vsize // 2 - at
+        return min(max(o, v0 + vsize - m - size), v0 + m)
+
+    # ---------- culling ----------
+    def cells(self) -> Tuple[int, int, int, int]:
+        """(x0, y0, x1, y1): the cell range, end exclusive, the view touches (unclamped)."""
+        vx, vy, vw, vh = self.view
+        ox, oy = self.offset
+        t = self.tile
+        return ((vx - ox) // t, (vy - oy) // t,
+                -((ox - vx - vw) // t), -((oy - vy - vh) // t))
+
+    def sees(self, pos: GridPos) -> bool:
+        x0, y0, x1, y1 = self.cells()
+        return x0 <= pos[0] < x1 and y0 <= pos[1] < y1
+
+    def to_screen(self, pos: GridPos) -> Tuple[int, int]:
+        """Screen pixel at the centre of cell 'pos'."""
+        t = self.tile
+        return self.offset[0] + pos[0] * t + t // 2, self.offset[1] + pos[1] * t + t // 2
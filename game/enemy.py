@@ -1,52 +1,95 @@
 # game/enemy.py
-import os
-import pygame
 from typing import Tuple, List
 
+from . import asset_cache
+from .patrol import CHASE_RADIUS, LOSE_RADIUS
+
+try:
+    import pygame
+except ImportError:  # headless runs (game/sim.py) don't need it
+    pygame = None
+
 TILE = 48
 RED = (255, 80, 100)
 SHADOW = (50, 0, 20)
 
 class Enemy:
     """
-    Static enemy for now (no movement). We just draw it and let Game check collision.
+    Chases the player one tile at a time, 'speed' tiles per second, asking the
+    Pathfinder for its next step, and keeps world.occupancy up to date.
+    With a 'route' (game/patrol.py) it walks that loop instead, for free, and
+    only chases once it sees the player within CHASE_RADIUS, until the
+    player is LOSE_RADIUS away.
+    Game checks collision.
     Uses assets/oven.png if available; falls back to a red circle.
     """
-    def __init__(self, start_grid: Tuple[int, int], speed: float = 3.0):
+    IMAGE = ("oven.png", (TILE - 8, TILE - 8))  # a little padding so it fits inside the tile
+
+    def __init__(self, start_grid: Tuple[int, int], speed: float = 3.0, route=None):
         self.gx, self.gy = start_grid
         self.speed = speed
-
-        # try to load oven image
+        self.route = route
+        self.route_i = -1  # index on route.cells, -1 while off the loop
+        self.chasing = route is None
+        self.cooldown = 1.0 / speed if speed > 0 else 0.0  # seconds until next step
         self.image = None
-        try:
-            here = os.path.dirname(__file__)
-            p = os.path.join(here, "assets", "oven.png")
-            if os.path.exists(p):
-                img = pygame.image.load(p).convert_alpha()
-                # a little padding so it fits nicely inside the tile
-                self.image = pygame.transform.smoothscale(img, (TILE - 8, TILE - 8))
-        except Exception:
-            self.image = None
+        self._image_tried = False  # image is fetched on first draw, never headless
+
+    def _load_image(self):
+        # oven image, shared by every Enemy through the asset cache
+        self._image_tried = True
+        self.image = asset_cache.image(*self.IMAGE)
 
     def grid_pos(self) -> Tuple[int, int]:
         return (self.gx, self.gy)
 
-    def update(self, dt: float, world, *args, **kwargs):
+    def update(self, dt: float, world, target=None, pathfinder=None):
         """
-        Intentionally does nothing for now — enemy is static.
-        Your teammate can add pathfinding later and move (gx, gy) here.
+        Step one tile towards 'target' whenever the cooldown runs out.
+        In "flow" mode next_step is an O(1) lookup in the shared flow field.
         """
-        return
+        if target is None or pathfinder is None or self.speed <= 0:
+            return
+        self.cooldown -= dt
+        if self.cooldown > 0:
+            return
+        self.cooldown = 1.0 / self.speed
+        if self.route is not None:
+            step = self._patrol_step(world, target, pathfinder)
+        else:
+            step = pathfinder.next_step(self.grid_pos(), target, world, agent=self)
+        if step is not None:
+            self.gx, self.gy = step
+            world.occupancy.move(self, step)
+
+    def _patrol_step(self, world, target, pathfinder):
+        pos = self.grid_pos()
+        d = abs(pos[0] - target[0]) + abs(pos[1] - target[1])
+        if self.chasing and d > LOSE_RADIUS:
+            self.chasing = False
+            pathfinder.forget(self)
+        elif not self.chasing and d <= CHASE_RADIUS and \
+                world.visibility.can_see(pos, target, CHASE_RADIUS):
+            self.chasing = True
+        if self.chasing:
+            return pathfinder.next_step(pos, target, world, agent=self)
+        step, self.route_i = self.route.follow(pos, self.route_i)
+        return step
 
-    def draw(self, surf, offset=(0, 0)):
-        x = self.gx * TILE + TILE // 2 + offset[0]
-        y = self.gy * TILE + TILE // 2 + offset[1]
+    def draw(self, surf, offset=(0, 0), tile=TILE):
+        if not self._image_tried:
+            self._load_image()
+        x = self.gx * tile + tile // 2 + offset[0]
+        y = self.gy * tile + tile // 2 + offset[1]
 
-        if self.image:
-            rect = self.image.get_rect(center=(x, y))
-            surf.blit(self.image, rect)
+        image = self.image
+        if image and tile != TILE:
+            image = asset_cache.image(self.IMAGE[0], (tile - 8, tile - 8))  # zoomed, cached per size
+        if image:
+            rect = image.get_rect(center=(x, y))
+            surf.blit(image, rect)
         else:
             # fallback: simple red cookie-cutter style
-            pygame.draw.circle(surf, SHADOW, (x + 2, y + 2), TILE // 2 - 8)
-            pygame.draw.circle(surf, RED, (x, y), TILE // 2 - 10)
+            pygame.draw.circle(surf, SHADOW, (x + 2, y + 2), tile // 2 - 8)
+            pygame.draw.circle(surf, RED, (x, y), tile // 2 - 10)
             pygame.draw.rect(surf, (0, 0, 0), (x - 6, y - 4, 12, 3), 0)
\ No newline at end of file
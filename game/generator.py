@@ -0,0 +1,409 @@
+# game/generator.py
+"""
+Seeded procedural levels for stress tests, from a few hundred tiles up to
+4096x4096.
+
+    lvl = generator.generate("caves", 1024, 1024, seed=7, enemies=20)
+    python -m game.generator --kind rooms --size 4096 --seed 1 --out big.json
+
+Kinds:
+    maze   DFS (recursive backtracker) perfect maze; built whole, then streamed
+    eller  perfect maze by Eller's algorithm, one row of cells at a time
+    rooms  rooms and L-shaped corridors on a block grid, linked Eller-style
+           (always connected, with some extra loops)
+    caves  cellular automaton (4-5 rule) on rows held as big-int bitsets,
+           plus a wandering tunnel from the spawn to the exit
+
+Output depends only on (kind, width, height, seed), never on the chunk size.
+RowStream yields the map in chunks of rows; eller, rooms and caves only hold
+a few rows (or one band of blocks) at a time, so huge maps can be written
+out without ever being in memory. generate() collects a stream into one
+bytearray and gives the Level memoryview rows into it (tiles[y][x] works as
+usual, without millions of Python ints).
+"""
+import argparse
+import json
+import random
+import time
+from itertools import permutations
+from typing import Iterator, List, Optional, Tuple
+
+from .level_loader import EnemySpawn, Level
+
+GridPos = Tuple[int, int]
+
+KINDS = ("maze", "eller", "rooms", "caves")
+MIN_SIZE = 12
+ROOM_BLOCK = 16       # rooms: one room (or corridor junction) per block
+CAVE_STEPS = 4        # caves: automaton generations
+WALL, FLOOR = 1, 0
+
+# byte of 8 packed bits (LSB first) -> 8 tile bytes
+_BITS = tuple(bytes((b >> k) & 1 for k in range(8)) for b in range(256))
+_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+class RowStream:
+    """
+    Iterate to get (y0, rows) chunks, each row a bytes of 'width' tiles
+    (1 = wall). player_start / exit_pos are set once the stream is exhausted.
+    """
+    def __init__(self, kind: str, width: int, height: int, seed: int = 0, chunk: int = 256):
+        if kind not in KINDS:
+            raise ValueError(f"unknown kind {kind!r}, expected one of {KINDS}")
+        if width < MIN_SIZE or height < MIN_SIZE:
+            raise ValueError(f"levels must be at least {MIN_SIZE}x{MIN_SIZE}")
+        self.kind = kind
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.chunk = max(1, chunk)
+        self.player_start: Optional[GridPos] = None
+        self.exit_pos: Optional[GridPos] = None
+
+    def __iter__(self) -> Iterator[Tuple[int, List[bytes]]]:
+        rows = _ROWS[self.kind](self, random.Random(self.seed))
+        y0 = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == self.chunk:
+                yield y0, chunk
+                y0 += len(chunk)
+                chunk = []
+        if chunk:
+            yield y0, chunk
+
+
+def generate(kind: str, width: int, height: int, seed: int = 0, enemies: int = 0,
+             enemy_speed: float = 2.0) -> Level:
+    """Build a whole Level; 'enemies' spawns go on random floor tiles away from the player."""
+    stream = RowStream(kind, width, height, seed)
+    cells = bytearray(width * height)
+    for y0, rows in stream:
+        cells[y0 * width:(y0 + len(rows)) * width] = b"".join(rows)
+    view = memoryview(cells)
+    tiles = [view[y * width:(y + 1) * width] for y in range(height)]
+    spawns = [EnemySpawn(pos, enemy_speed, [])
+              for pos in _enemy_spots(cells, width, height, stream.player_start, enemies, seed)]
+    return Level(width, height, tiles, stream.player_start, stream.exit_pos, spawns, 0)
+
+
+def _enemy_spots(cells, w: int, h: int, start: GridPos, n: int, seed: int) -> List[GridPos]:
+    rnd = random.Random(seed + 1)
+    keep_away = min(w, h) // 4
+    spots = []
+    for _ in range(n * 200):
+        if len(spots) == n:
+            break
+        x, y = rnd.randrange(w), rnd.randrange(h)
+        if cells[y * w + x] == FLOOR and abs(x - start[0]) + abs(y - start[1]) >= keep_away:
+            spots.append((x, y))
+    return spots
+
+
+# ---------- maze: recursive backtracker ----------
+def _maze_rows(st: RowStream, rnd: random.Random):
+    w, h = st.width, st.height
+    tiles = bytearray(b"\x01") * (w * h)
+    # cells sit on odd (x, y); 'free' has two padding rows each side so
+    # t +- 2w never wraps, and only in-range cells start out free
+    pad = 2 * w
+    free = bytearray(w * (h + 4))
+    xmax = w - 2 if (w - 2) % 2 else w - 3
+    ymax = h - 2 if (h - 2) % 2 else h - 3
+    n_cells = (xmax + 1) // 2
+    for y in range(1, ymax + 1, 2):
+        free[pad + y * w + 1:pad + y * w + xmax + 1:2] = b"\x01" * n_cells
+    orders = tuple(permutations((2, -2, 2 * w, -2 * w)))
+    pick = rnd.randbytes(len(free) // 2 + 16)  # one shuffled order per visit
+    k = 0
+
+    start = w + 1
+    tiles[start] = FLOOR
+    free[pad + start] = 0
+    stack = [start]
+    push, pop = stack.append, stack.pop
+    while stack:
+        t = stack[-1]
+        for d in orders[pick[k] % 24]:
+            n = t + d
+            if free[pad + n]:
+                free[pad + n] = 0
+                tiles[n] = tiles[t + d // 2] = FLOOR
+                push(n)
+                break
+        else:
+            pop()
+        k += 1
+        if k == len(pick):
+            pick, k = rnd.randbytes(len(pick)), 0
+
+    st.player_start = (1, 1)
+    st.exit_pos = (xmax, ymax)
+    view = memoryview(tiles)
+    for y in range(h):
+        yield bytes(view[y * w:(y + 1) * w])
+
+
+# ---------- Eller's algorithm (shared by eller and rooms) ----------
+def _eller(cols: int, rows: int, rnd: random.Random, loop_chance: float = 0.0):
+    """
+    Yield (east, down) per row of a cols x rows cell grid: east[i] links cell
+    i to i + 1, down[i] links it to the row below. Every cell ends up
+    connected; 'loop_chance' also links some cells that already are.
+    """
+    ids = list(range(cols))
+    next_id = cols
+    loop = int(loop_chance * 256)
+    for r in range(rows):
+        last = r == rows - 1
+        parent = {}
+
+        def find(a):
+            while parent.get(a, a) != a:
+                parent[a] = parent.get(parent[a], parent[a])
+                a = parent[a]
+            return a
+
+        bits = rnd.randbytes(2 * cols)
+        east = bytearray(cols)
+        for i in range(cols - 1):
+            a, b = find(ids[i]), find(ids[i + 1])
+            if a != b:
+                if last or bits[i] & 1:
+                    parent[a] = b
+                    east[i] = 1
+            elif bits[i] < loop:
+                east[i] = 1
+        ids = [find(s) for s in ids]
+
+        down = bytearray(cols)
+        if not last:
+            has_down = set()
+            last_of = {}
+            for i, s in enumerate(ids):
+                if bits[cols + i] & 1 or (bits[cols + i] >> 1) < loop // 2:
+                    down[i] = 1
+                    has_down.add(s)
+                last_of[s] = i
+            for s, i in last_of.items():
+                if s not in has_down:
+                    down[i] = 1
+            # cells without a link from above start a set of their own
+            nxt = []
+            for i, s in enumerate(ids):
+                if down[i]:
+                    nxt.append(s)
+                else:
+                    nxt.append(next_id)
+                    next_id += 1
+            ids = nxt
+        yield east, down
+
+
+def _eller_rows(st: RowStream, rnd: random.Random):
+    w, h = st.width, st.height
+    cols, rows = (w - 1) // 2, (h - 1) // 2
+    solid = b"\x01" * w
+    yield solid
+    for east, down in _eller(cols, rows, rnd):
+        row = bytearray(solid)
+        row[1:2 * cols:2] = bytes(cols)
+        for i in range(cols - 1):
+            if east[i]:
+                row[2 * i + 2] = FLOOR
+        yield bytes(row)
+        below = bytearray(solid)
+        for i in range(cols):
+            if down[i]:
+                below[2 * i + 1] = FLOOR
+        yield bytes(below)
+    for _ in range(h - 1 - 2 * rows):
+        yield solid
+    st.player_start = (1, 1)
+    st.exit_pos = (2 * cols - 1, 2 * rows - 1)
+
+
+# ---------- rooms and corridors ----------
+def _rooms_rows(st: RowStream, rnd: random.Random):
+    w, h = st.width, st.height
+    B = min(ROOM_BLOCK, (min(w, h) - 2) // 2, (max(w, h) - 2) // 2)  # at least two blocks
+    cols, rows = (w - 2) // B, (h - 2) // B
+    solid = b"\x01" * w
+
+    def place(by):
+        """Rooms for block row 'by': list of (x0, y0, x1, y1, cx, cy), band-local y."""
+        out = []
+        for bx in range(cols):
+            ox = 1 + bx * B
+            if rnd.random() < 0.15:  # corridor junction instead of a room
+                cx, cy = ox + rnd.randrange(1, B - 1), rnd.randrange(1, B - 1)
+                out.append((cx, cy, cx + 1, cy + 1, cx, cy))
+                continue
+            rw, rh = rnd.randrange(3, B - 1), rnd.randrange(3, B - 1)
+            x0, y0 = ox + rnd.randrange(1, B - rw), rnd.randrange(1, B - rh)
+            out.append((x0, y0, x0 + rw, y0 + rh, x0 + rw // 2, y0 + rh // 2))
+        return out
+
+    def hline(band, y, xa, xb):
+        a, b = min(xa, xb), max(xa, xb)
+        band[y * w + a:y * w + b + 1] = bytes(b - a + 1)
+
+    def vline(band, x, ya, yb):
+        a, b = min(ya, yb), max(ya, yb)
+        band[a * w + x:b * w + x + 1:w] = bytes(b - a + 1)
+
+    links = _eller(cols, rows, rnd, loop_chance=0.1)
+    yield solid
+    band = bytearray(solid * B)
+    rooms = place(0)
+    first = last = None
+    for by in range(rows):
+        east, down = next(links)
+        for x0, y0, x1, y1, _, _ in rooms:
+            for y in range(y0, y1):
+                band[y * w + x0:y * w + x1] = bytes(x1 - x0)
+        for i in range(cols - 1):
+            if east[i]:
+                (*_, ax, ay), (*_, bx, bcy) = rooms[i], rooms[i + 1]
+                hline(band, ay, ax, bx)
+                vline(band, bx, ay, bcy)
+        if by == 0:
+            first = rooms[0][4:]
+        if by == rows - 1:
+            last = (rooms[-1][4], rooms[-1][5] + 1 + by * B)
+
+        nxt_band = bytearray(solid * B)
+        nxt_rooms = place(by + 1) if by + 1 < rows else None
+        for i in range(cols):
+            if down[i]:
+                # down the column of this room's center, across the band edge,
+                # then along the next band to the room below
+                ax, ay = rooms[i][4:]
+                bx, bcy = nxt_rooms[i][4:]
+                vline(band, ax, ay, B - 1)
+                vline(nxt_band, ax, 0, bcy)
+                hline(nxt_band, bcy, ax, bx)
+        yield from (bytes(band[y * w:(y + 1) * w]) for y in range(B))
+        band, rooms = nxt_band, nxt_rooms
+    for _ in range(h - 1 - rows * B):
+        yield solid
+    st.player_start = (first[0], first[1] + 1)
+    st.exit_pos = last
+
+
+# ---------- caves ----------
+def _caves_rows(st: RowStream, rnd: random.Random):
+    w, h = st.width, st.height
+    full = (1 << w) - 1
+    edges = 1 | (1 << (w - 1))
+    top = 1 << (w - 1)
+
+    def noise():
+        yield full
+        for _ in range(h - 2):
+            a, b, c, d = (rnd.getrandbits(w) for _ in range(4))
+            yield (a & (b | c | d)) | edges   # ~44% walls
+        yield full
+
+    def add3(a, b, c):
+        t = a ^ b
+        return t ^ c, (a & b) | (t & c)
+
+    def step(rows):
+        """One 4-5 generation over a row stream, with walls past every edge."""
+        it = iter(rows)
+        up, cur = full, next(it)
+        for down in _with_tail(it, full):
+            yield _ca_row(up, cur, down)
+            up, cur = cur, down
+
+    def _ca_row(up, cur, down):
+        s, c = [], []
+        for r in (up, cur, down):
+            si, ci = add3(((r << 1) | 1) & full, r, (r >> 1) | top)
+            s.append(si)
+            c.append(ci)
+        ones, carry = add3(*s)
+        t1, fours = add3(*c)
+        twos = t1 ^ carry
+        fours2 = t1 & carry
+        four = fours ^ fours2
+        eight = fours & fours2
+        return (eight | (four & (ones | twos))) | edges
+
+    rows = noise()
+    for _ in range(CAVE_STEPS):
+        rows = step(rows)
+
+    # a tunnel wandering from (1, 1) to (w - 2, h - 2) keeps the exit reachable
+    x_prev = 1
+    nbytes = (w + 7) // 8
+    for y, bits in enumerate(rows):
+        if y == 0 or y == h - 1:
+            bits = full
+        else:
+            if y == h - 2:
+                x = w - 2
+            else:
+                aim = 1 + (w - 3) * (y - 1) // max(1, h - 3)
+                x = min(w - 2, max(1, aim + rnd.randrange(-6, 7)))
+            lo, hi = min(x, x_prev), max(x, x_prev)
+            bits &= ~(((1 << (hi - lo + 1)) - 1) << lo)
+            x_prev = x
+        packed = bits.to_bytes(nbytes, "little")
+        yield b"".join(_BITS[b] for b in packed)[:w]
+    st.player_start = (1, 1)
+    st.exit_pos = (w - 2, h - 2)
+
+
+def _with_tail(it, tail):
+    yield from it
+    yield tail
+
+
+_ROWS = {"maze": _maze_rows, "eller": _eller_rows, "rooms": _rooms_rows, "caves": _caves_rows}
+
+
+# ---------- CLI ----------
+def write_json(path: str, kind: str, width: int, height: int, seed: int = 0, chunk: int = 256) -> None:
+    """Stream a generated level straight into a level JSON file."""
+    stream = RowStream(kind, width, height, seed, chunk)
+    with open(path, "w") as f:
+        f.write(f'{{\n  "width": {width},\n  "height": {height},\n  "tiles": [\n')
+        sep = "    "
+        for _, rows in stream:
+            for row in rows:
+                f.write(sep + "[" + ",".join(row.translate(_DIGITS).decode()) + "]")
+                sep = ",\n    "
+        f.write("\n  ],\n")
+        f.write(f'  "player_start": {json.dumps(stream.player_start)},\n')
+        f.write(f'  "exit_pos": {json.dumps(stream.exit_pos)},\n')
+        f.write('  "enemies": []\n}\n')
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Generate procedural levels")
+    ap.add_argument("--kind", default="rooms", choices=KINDS)
+    ap.add_argument("--size", type=int, default=256, help="width (and height unless --height)")
+    ap.add_argument("--height", type=int)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="write a level JSON, streamed row chunk by row chunk")
+    args = ap.parse_args(argv)
+    w, h = args.size, args.height or args.size
+
+    t0 = time.perf_counter()
+    if args.out:
+        write_json(args.out, args.kind, w, h, args.seed)
+        print(f"wrote {args.out} ({args.kind} {w}x{h}, seed {args.seed}) "
+              f"in {time.perf_counter() - t0:.2f}s")
+        return
+    lvl = generate(args.kind, w, h, args.seed)
+    floor = sum(row.tobytes().count(0) for row in lvl.tiles)
+    print(f"{args.kind} {w}x{h} seed {args.seed}: {time.perf_counter() - t0:.2f}s, "
+          f"{floor / (w * h):.0%} floor, start {lvl.player_start}, exit {lvl.exit_pos}")
+
+
+if __name__ == "__main__":
+    main()
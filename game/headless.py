@@ -0,0 +1,159 @@
+# game/headless.py
+"""
+Run the game core (game/sim.py) without pygame, as fast as the CPU allows.
+
+    python -m game.headless --level 3 --ticks 1000000 --mode flow --bot exit
+    python -m game.headless --all-levels --bot script --script "ddssddss"
+
+The player is driven by a bot or a WASD script instead of the keyboard;
+every run ends when the player is caught or escapes, and the level restarts.
+Prints ticks per second and run outcomes.
+"""
+import argparse
+import random
+import time
+from typing import Optional, Tuple
+
+from ai.flowfield import FlowField
+from .path_api import Pathfinder
+from .path_workers import PathWorkers
+from .sim import Simulation, PLAYING, CAUGHT, ESCAPED
+
+DIRS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+KEYS = {"d": (1, 0), "a": (-1, 0), "s": (0, 1), "w": (0, -1)}
+
+Move = Optional[Tuple[int, int]]
+
+
+# ---------- bots ----------
+class RandomBot:
+    def __init__(self, seed: int = 0):
+        self.rnd = random.Random(seed)
+
+    def reset(self, sim: Simulation) -> None:
+        pass
+
+    def next_move(self, sim: Simulation) -> Move:
+        return self.rnd.choice(DIRS)
+
+
+class ExitBot:
+    """Walks the shortest route to the exit, ignoring enemies."""
+    def __init__(self):
+        self.field = None
+
+    def reset(self, sim: Simulation) -> None:
+        grid = sim.world.grid
+        self.field = FlowField(grid)
+        exit_cell = grid.index(*sim.level.exit_pos)
+        analysis = sim.world.analysis
+        if analysis is not None and analysis.dist is not None:
+            self.field.adopt(exit_cell, analysis.dist)  # baked into the level pack
+        else:
+            self.field.build(exit_cell)
+
+    def next_move(self, sim: Simulation) -> Move:
+        grid = sim.world.grid
+        cur = grid.index(*sim.player.grid_pos())
+        nxt = self.field.next_cell(cur)
+        if nxt is None or nxt == cur:
+            return None
+        (x0, y0), (x1, y1) = grid.pos(cur), grid.pos(nxt)
+        return x1 - x0, y1 - y0
+
+
+class ScriptBot:
+    """Replays a WASD string over and over; '.' waits one move slot."""
+    def __init__(self, script: str):
+        self.script = [KEYS.get(c) for c in script.lower() if c in KEYS or c == "."] or [None]
+        self.i = 0
+
+    def reset(self, sim: Simulation) -> None:
+        self.i = 0
+
+    def next_move(self, sim: Simulation) -> Move:
+        move = self.script[self.i % len(self.script)]
+        self.i += 1
+        return move
+
+
+# ---------- runner ----------
+def run(sim: Simulation, bot, levels, ticks: int, dt: float, moves_per_sec: float) -> dict:
+    outcomes = {CAUGHT: 0, ESCAPED: 0}
+    move_every = 1.0 / moves_per_sec if moves_per_sec > 0 else float("inf")
+    li = 0
+    sim.load_level(levels[li])
+    bot.reset(sim)
+    clock = 0.0
+
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        clock += dt
+        if clock >= move_every:
+            clock -= move_every
+            move = bot.next_move(sim)
+            if move is not None:
+                sim.move_player(*move)
+        if sim.status == PLAYING:
+            sim.tick(dt)
+        if sim.status != PLAYING:
+            outcomes[sim.status] += 1
+            li = (li + 1) % len(levels)
+            sim.load_level(levels[li])
+            bot.reset(sim)
+            clock = 0.0
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "ticks": ticks,
+        "seconds": elapsed,
+        "ticks_per_sec": ticks / elapsed if elapsed > 0 else float("inf"),
+        "caught": outcomes[CAUGHT],
+        "escaped": outcomes[ESCAPED],
+    }
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Headless Cookie Run simulation")
+    ap.add_argument("--level", type=int, default=1)
+    ap.add_argument("--all-levels", action="store_true", help="cycle through levels 1..10")
+    ap.add_argument("--ticks", type=int, default=100_000)
+    ap.add_argument("--dt", type=float, default=1 / 60, help="simulated seconds per tick")
+    ap.add_argument("--mode", default="astar", choices=Pathfinder.MODES)
+    ap.add_argument("--heuristic", default="manhattan")
+    ap.add_argument("--bot", default="exit", choices=("exit", "random", "script"))
+    ap.add_argument("--script", default="dddsss", help="WASD moves for --bot script")
+    ap.add_argument("--moves-per-sec", type=float, default=6.0, help="player move rate")
+    ap.add_argument("--cluster", type=int, default=None,
+                    help="HPA* cluster size (default: the Pathfinder's own, built on first hpa query)")
+    ap.add_argument("--budget-ms", type=float, default=0.0,
+                    help="per-tick search budget through the path scheduler (0 = search on the spot)")
+    ap.add_argument("--workers", default="",
+                    help="search off the main thread: thread:N or process:N (implies the scheduler)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    workers = None
+    if args.workers:
+        kind, _, n = args.workers.partition(":")
+        workers = PathWorkers(kind, int(n or 2))
+    sim = Simulation(Pathfinder(args.mode, args.heuristic, workers=workers), cluster_size=args.cluster,
+                     budget_ms=args.budget_ms or None)
+    if args.bot == "exit":
+        bot = ExitBot()
+    elif args.bot == "random":
+        bot = RandomBot(args.seed)
+    else:
+        bot = ScriptBot(args.script)
+    levels = list(range(1, 11)) if args.all_levels else [args.level]
+
+    stats = run(sim, bot, levels, args.ticks, args.dt, args.moves_per_sec)
+    if workers is not None:
+        workers.shutdown()
+    print(f"{stats['ticks']} ticks in {stats['seconds']:.2f}s -> "
+          f"{stats['ticks_per_sec']:,.0f} ticks/s "
+          f"(caught {stats['caught']}, escaped {stats['escaped']}, mode {args.mode})")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 import json
 import os
 from dataclasses import dataclass
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 
 GridPos = Tuple[int, int]
 
@@ -21,6 +21,7 @@ class Level:
     exit_pos: GridPos
     enemies: List[EnemySpawn]
     jelly_count: int  # optional collectibles per level (for flavor)
+    analysis: Optional[Any] = None  # level_pack.LevelInfo when opened from the compiled pack
 
 def load_level(level_path: str) -> Level:
     with open(level_path, "r") as f:
@@ -0,0 +1,345 @@
+# game/level_pack.py
+"""
+Compiled level pack: every game/levels/*.json in one binary file, with the
+load-time analysis baked in, opened through mmap.
+
+    python -m game.level_pack              # (re)compile game/levels/levels.pack
+    lvl = level_pack.load(3)               # Level for level03, from the pack
+
+Per level the pack holds the walls in Grid's bordered layout (ai/grid.py),
+spawn/exit/enemy data, a connected-component label per cell, whether the
+exit is reachable from the spawn, and (unless compiled with --no-dist) the
+BFS distance from every cell to the exit in FlowField's layout. Walls,
+labels and distances are memoryviews straight into the mapping: opening a
+level copies nothing but its tile rows, and "can a reach b?" is a label
+compare instead of a search.
+
+load() recompiles the pack first whenever a JSON file is newer than it (or
+one was added or removed), so edits made while the game runs are picked up,
+and falls back to plain JSON if the pack can't be built or written. Each
+load only stats the levels directory; the file-by-file check runs when its
+mtime moved (files added, removed, or saved through a rename, as editors
+do). A compile that failed isn't retried until the directory changes.
+"""
+import argparse
+import glob
+import mmap
+import os
+import struct
+from array import array
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from ai.flowfield import FlowField
+from ai.grid import Grid
+from .level_loader import EnemySpawn, Level, load_level, level_path_for
+
+GridPos = Tuple[int, int]
+
+LEVELS_DIR = os.path.join(os.path.dirname(__file__), "levels")
+PACK_PATH = os.path.join(LEVELS_DIR, "levels.pack")
+
+MAGIC = b"CRLVPACK"
+FORMAT_VERSION = 1
+NO_LABEL = -1  # wall cells
+
+# flags
+EXIT_REACHABLE = 1  # exit is in the player spawn's component
+HAS_DIST = 2        # distance-to-exit field included
+
+_HEADER = struct.Struct("<8sII")      # magic, format version, level count
+NAME_MAX = 32                         # bytes of ASCII per level name
+_ENTRY = struct.Struct(f"<{NAME_MAX}sQ")  # level name (file stem), record offset
+_RECORD = struct.Struct("<HHhhhhHHiiI")
+# width, height, spawn x/y, exit x/y, enemy count, jelly count,
+# component count, exit label, flags
+_ENEMY = struct.Struct("<hhdH")       # x, y, speed, patrol point count
+_POINT = struct.Struct("<hh")
+
+
+class LevelInfo:
+    """
+    Baked analysis of one level, viewing straight into the pack's mmap.
+    walls / labels / dist are indexed like Grid cells: (y + 1) * stride + x + 1.
+    """
+    def __init__(self, name, width, height, walls, labels, dist, components, exit_label, flags):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.stride = width + 2
+        self.walls = walls            # memoryview of bytes, 1 = wall
+        self.labels = labels          # memoryview of int32, NO_LABEL on walls
+        self.dist = dist              # memoryview of int32 or None, -1 = can't reach the exit
+        self.components = components
+        self.exit_label = exit_label
+        self.flags = flags
+
+    @property
+    def exit_reachable(self) -> bool:
+        return bool(self.flags & EXIT_REACHABLE)
+
+    def label(self, x: int, y: int) -> int:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return NO_LABEL
+        return self.labels[(y + 1) * self.stride + x + 1]
+
+    def connected(self, a: GridPos, b: GridPos) -> bool:
+        """O(1): both cells are floor and in the same component."""
+        la = self.label(*a)
+        return la != NO_LABEL and la == self.label(*b)
+
+    def distance_to_exit(self, x: int, y: int) -> Optional[int]:
+        """Steps to the exit, -1 if unreachable, None if the pack has no field."""
+        if self.dist is None:
+            return None
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return -1
+        return self.dist[(y + 1) * self.stride + x + 1]
+
+
+# ---------- compiling ----------
+def _components(grid: Grid):
+    """Label every floor cell with its 4-connected component; walls get NO_LABEL."""
+    labels = [NO_LABEL] * grid.size
+    steps, masks, walls = grid.steps, grid.masks, grid.walls
+    count = 0
+    for i in range(grid.size):
+        if walls[i] or labels[i] != NO_LABEL:
+            continue
+        labels[i] = count
+        queue = deque((i,))
+        while queue:
+            cur = queue.popleft()
+            for off in steps[masks[cur]]:
+                nxt = cur + off
+                if labels[nxt] == NO_LABEL:
+                    labels[nxt] = count
+                    queue.append(nxt)
+        count += 1
+    return labels, count
+
+
+def _validate(name: str, level: Level) -> List[str]:
+    """Raise on levels the game can't run; return warnings for odd but playable ones."""
+    w, h = level.width, level.height
+    if not (0 < w < 32768 and 0 < h < 32768):
+        raise ValueError(f"{name}: bad size {w}x{h}")
+    if len(level.tiles) != h or any(len(row) != w for row in level.tiles):
+        raise ValueError(f"{name}: tiles are not {w}x{h}")
+    warnings = []
+    spots = [("player_start", level.player_start), ("exit_pos", level.exit_pos)]
+    spots += [(f"enemy {k}", e.pos) for k, e in enumerate(level.enemies)]
+    for what, (x, y) in spots:
+        if not (0 <= x < w and 0 <= y < h):
+            raise ValueError(f"{name}: {what} {(x, y)} is outside the map")
+        if level.tiles[y][x]:
+            warnings.append(f"{name}: {what} {(x, y)} is on a wall")
+    return warnings
+
+
+def _pad(buf: bytearray, align: int = 8) -> None:
+    buf += bytes(-len(buf) % align)
+
+
+def _record(level: Level, with_dist: bool) -> Tuple[bytes, int]:
+    grid = Grid(level.width, level.height, level.tiles)
+    labels, count = _components(grid)
+    spawn = labels[grid.index(*level.player_start)]
+    exit_label = labels[grid.index(*level.exit_pos)]
+    flags = HAS_DIST if with_dist else 0
+    if exit_label != NO_LABEL and spawn == exit_label:
+        flags |= EXIT_REACHABLE
+
+    buf = bytearray(_RECORD.pack(level.width, level.height, *level.player_start, *level.exit_pos,
+                                 len(level.enemies), level.jelly_count, count, exit_label, flags))
+    for e in level.enemies:
+        buf += _ENEMY.pack(*e.pos, e.speed, len(e.patrol))
+        for p in e.patrol:
+            buf += _POINT.pack(*p)
+    _pad(buf)
+    buf += grid.walls
+    _pad(buf)
+    buf += array("i", labels).tobytes()
+    if with_dist:
+        field = FlowField(grid)
+        field.build(grid.index(*level.exit_pos))
+        buf += field.dist.tobytes()
+    return bytes(buf), flags
+
+
+def compile_pack(levels_dir: str = LEVELS_DIR, out_path: str = PACK_PATH,
+                 with_dist: bool = True) -> List[str]:
+    """
+    Compile every level*.json under 'levels_dir' into 'out_path'. Returns the
+    validation warnings; raises ValueError for broken levels. The file is
+    written next to the target and renamed into place.
+    """
+    paths = sorted(glob.glob(os.path.join(levels_dir, "level*.json")))
+    warnings = []
+    records = []
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if not name.isascii() or len(name) > NAME_MAX:
+            raise ValueError(f"{name}: level names must be ASCII, at most {NAME_MAX} characters")
+        level = load_level(path)
+        warnings += _validate(name, level)
+        rec, flags = _record(level, with_dist)
+        if not flags & EXIT_REACHABLE:
+            warnings.append(f"{name}: exit is not reachable from the player start")
+        records.append((name, rec))
+
+    out = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, len(records)))
+    offset = len(out) + _ENTRY.size * len(records)
+    offset += -offset % 8
+    for name, rec in records:
+        out += _ENTRY.pack(name.encode("ascii"), offset)
+        offset += len(rec) + (-len(rec) % 8)
+    for _, rec in records:
+        _pad(out)
+        out += rec
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(out)
+    os.replace(tmp, out_path)
+    return warnings
+
+
+def is_stale(levels_dir: str = LEVELS_DIR, pack_path: str = PACK_PATH) -> bool:
+    """True if the pack is missing, older than any JSON, or lists other levels."""
+    try:
+        built = os.path.getmtime(pack_path)
+        with open(pack_path, "rb") as f:
+            magic, version, count = _HEADER.unpack(f.read(_HEADER.size))
+            names = {f.read(_ENTRY.size)[:NAME_MAX].rstrip(b"\0").decode("ascii") for _ in range(count)}
+    except (OSError, struct.error, UnicodeDecodeError):
+        return True
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return True
+    paths = glob.glob(os.path.join(levels_dir, "level*.json"))
+    if {os.path.splitext(os.path.basename(p))[0] for p in paths} != names:
+        return True
+    return any(os.path.getmtime(p) > built for p in paths)
+
+
+# ---------- reading ----------
+class LevelPack:
+    """Read-only view of a compiled pack; levels are decoded on demand."""
+    def __init__(self, path: str = PACK_PATH):
+        self.path = path
+        self.mtime = os.path.getmtime(path)  # of the file mapped; open_pack() reopens a newer one
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        magic, version, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path}: not a level pack (or an old format)")
+        self.offsets: Dict[str, int] = {}
+        for k in range(count):
+            raw, off = _ENTRY.unpack_from(self._mm, _HEADER.size + k * _ENTRY.size)
+            self.offsets[raw.rstrip(b"\0").decode("ascii")] = off
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.offsets
+
+    def info(self, name: str) -> LevelInfo:
+        return self._decode(name)[1]
+
+    def level(self, name: str) -> Level:
+        """The Level, with its LevelInfo attached as level.analysis."""
+        return self._decode(name)[0]
+
+    def _decode(self, name: str):
+        mm, view = self._mm, self._view
+        pos = self.offsets[name]
+        (w, h, sx, sy, ex, ey, n_enemies, jelly,
+         components, exit_label, flags) = _RECORD.unpack_from(mm, pos)
+        pos += _RECORD.size
+        enemies = []
+        for _ in range(n_enemies):
+            x, y, speed, n_patrol = _ENEMY.unpack_from(mm, pos)
+            pos += _ENEMY.size
+            patrol = [_POINT.unpack_from(mm, pos + k * _POINT.size) for k in range(n_patrol)]
+            pos += n_patrol * _POINT.size
+            enemies.append(EnemySpawn(pos=(x, y), speed=speed, patrol=patrol))
+        pos += -pos % 8
+
+        stride = w + 2
+        size = stride * (h + 2)
+        walls = view[pos:pos + size]
+        pos += size + (-size % 8)
+        labels = view[pos:pos + 4 * size].cast("i")
+        pos += 4 * size
+        dist = view[pos:pos + 4 * size].cast("i") if flags & HAS_DIST else None
+
+        info = LevelInfo(name, w, h, walls, labels, dist, components, exit_label, flags)
+        tiles = [list(walls[(y + 1) * stride + 1:(y + 1) * stride + 1 + w]) for y in range(h)]
+        level = Level(w, h, tiles, (sx, sy), (ex, ey), enemies, jelly, analysis=info)
+        return level, info
+
+
+_pack: Optional[LevelPack] = None
+_fresh: Optional[Tuple[str, str, float]] = None  # (levels_dir, pack_path, dir mtime) when the pack was last found up to date
+_failed: Optional[Tuple[str, str, float, int]] = None  # (levels_dir, pack_path, dir mtime, JSON count) after the last failed compile
+
+
+def _dir_key(levels_dir: str, pack_path: str) -> Tuple[str, str, float, int]:
+    count = len(glob.glob(os.path.join(levels_dir, "level*.json")))
+    return levels_dir, pack_path, os.path.getmtime(levels_dir), count
+
+
+def open_pack(levels_dir: str = LEVELS_DIR, pack_path: str = PACK_PATH) -> Optional[LevelPack]:
+    """
+    The process-wide pack, recompiled (and reopened) first if any JSON changed
+    since it was built. None if it can't be compiled or written (callers use
+    JSON then). Levels already handed out keep viewing the old mapping.
+    """
+    global _pack, _fresh, _failed
+    try:
+        stamp = os.path.getmtime(levels_dir)
+        if _fresh != (levels_dir, pack_path, stamp):
+            if _failed == _dir_key(levels_dir, pack_path):
+                return None
+            if is_stale(levels_dir, pack_path):
+                try:
+                    compile_pack(levels_dir, pack_path)
+                except (OSError, ValueError):
+                    _failed = _dir_key(levels_dir, pack_path)  # after any .tmp it left behind
+                    raise
+                _pack = None
+                stamp = os.path.getmtime(levels_dir)  # renaming the pack in moved it
+            _fresh, _failed = (levels_dir, pack_path, stamp), None
+        if _pack is None or _pack.path != pack_path or _pack.mtime != os.path.getmtime(pack_path):
+            _pack = LevelPack(pack_path)
+    except (OSError, ValueError):
+        return None
+    return _pack
+
+
+def load(index: int) -> Level:
+    """Level 'index' (1 => level01) from the pack, or from its JSON file if there is none."""
+    name = f"level{index:02d}"
+    pack = open_pack()
+    if pack is not None and name in pack:
+        return pack.level(name)
+    return load_level(level_path_for(index))
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Compile game/levels/*.json into a level pack")
+    ap.add_argument("--levels", default=LEVELS_DIR)
+    ap.add_argument("--out", default=PACK_PATH)
+    ap.add_argument("--no-dist", action="store_true", help="leave out the distance-to-exit fields")
+    args = ap.parse_args(argv)
+
+    for warning in compile_pack(args.levels, args.out, with_dist=not args.no_dist):
+        print("warning:", warning)
+    pack = LevelPack(args.out)
+    print(f"wrote {args.out}: {len(pack)} levels, {os.path.getsize(args.out):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
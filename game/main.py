@@ -1,15 +1,28 @@
 # game/main.py
 import pygame, sys, time, os
-from .level_loader import load_level, level_path_for
-from .world import World
+from . import asset_cache
+from .ui import UI
+from .camera import Camera
+from .profiler import FrameProfiler
+from ai.visualize import TRACE_MODES, Replay, Trace, traced_search
 from .player import Player
 from .enemy import Enemy
-from .ui import UI
 from .path_api import Pathfinder
+from .path_workers import PathWorkers
+from .sim import Simulation, CAUGHT, ESCAPED, SIGHT_RADIUS
 
 SCREEN_W = 1400
 SCREEN_H = 800
 
+HPA_CLUSTER = 8  # cluster size for the HPA* abstraction, built when [C] HPA* is first used
+PATH_BUDGET_MS = 2.0  # per-frame pathfinding budget (game/path_scheduler.py)
+PATH_WORKERS = ("thread", 1)  # (kind, count) searching off the main thread; None = in the frame budget
+DIRTY_RECTS = False  # playing scene: only repaint tiles that entities moved off/onto
+REPLAY_SPEED = 400.0  # search trace events per second at [H]
+PROFILE_REFRESH = 15  # frames between profiler HUD updates [F3]
+PROFILE_DUMP = "frame_profile"  # [F4] writes .csv here, [Shift+F4] .json
+STATUS_SECONDS = 4.0  # how long a sidebar notice (e.g. F4's) stays up
+
 BG_GRAD_TOP = (255, 230, 240)
 BG_GRAD_BOTTOM = (240, 255, 250)
 
@@ -24,39 +37,61 @@ class Game:
         self.level_index = 1
         self.total_levels = 10
         self.unlocked_to = 1
-        self.offset = (40, 60)
         self.running = True
         self.scene = "main_menu"
         self.ui = UI(SCREEN_W, SCREEN_H)
+        # the board area left of the sidebar; scrolls with the player on big levels
+        self.camera = Camera((0, 0, SCREEN_W - self.ui.panel_w, SCREEN_H), home=(40, 60))
 
-        # menu background
-        self.menu_bg = None
-        try:
-            bg_path = os.path.join("game", "assets", "menu-bg.jpg")
-            if os.path.exists(bg_path):
-                img = pygame.image.load(bg_path).convert()
-                self.menu_bg = pygame.transform.scale(img, (SCREEN_W, SCREEN_H))
-        except Exception:
-            self.menu_bg = None
+        # menu background now (first thing on screen), sprites on a background thread
+        self.menu_bg = asset_cache.image("menu-bg.jpg", (SCREEN_W, SCREEN_H))
+        asset_cache.warm_up([Player.SPRITE, Enemy.IMAGE], background=True)
 
         self.play_btn_rect = pygame.Rect(0, 0, 220, 68)
         self.back_btn_rect = None   # sidebar Back-to-Menu rect (set by UI)
-
-        # ai control (placeholder toggles for teammate later)
-        self.pathfinder = Pathfinder(mode="greedy", heuristic="manhattan")
+        self.show_minimap = False   # [M]
+        self.replay = None          # [H] search trace being replayed over the board
+        self.show_profile = False   # [F3] phase timings in the sidebar
+        self.profiler = FrameProfiler()
+        self._profile_lines = None  # what the sidebar shows, refreshed every PROFILE_REFRESH frames
+        self._status = (None, 0.0)  # sidebar notice and when it goes (time.monotonic())
+        self._trace = None          # its buffers, allocated on first use
+
+        # dirty-rect drawing: what the last full frame showed
+        self.dirty_rects = DIRTY_RECTS
+        self._frame_state = None
+        self._drawn_cells = []
+
+        # render caches: gradient background, overlays per alpha
+        self._bg = None
+        self._overlays = {}
+
+        # ai control (mode / heuristic toggles on the keyboard)
+        workers = PathWorkers(*PATH_WORKERS) if PATH_WORKERS else None
+        self.pathfinder = Pathfinder(mode="greedy", heuristic="manhattan", workers=workers)
+
+        # rules and level state live in the headless core (game/sim.py)
+        self.sim = Simulation(self.pathfinder, cluster_size=HPA_CLUSTER, budget_ms=PATH_BUDGET_MS)
 
         # load first level
         self.load_level(self.level_index)
 
     # --- level ---
     def load_level(self, i: int):
-        lvl = load_level(level_path_for(i))
-        self.world = World(lvl)
-        self.player = Player(lvl.player_start)
-        self.enemies = []
-        if getattr(lvl, "enemies", None):
-            first = lvl.enemies[0]  # one enemy per level for now
-            self.enemies.append(Enemy(first.pos, speed=getattr(first, "speed", 3.0)))
+        self.sim.load_level(i)
+        self.replay = None
+
+    @property
+    def world(self):
+        return self.sim.world
+
+    @property
+    def player(self):
+        return self.sim.player
+
+    @property
+    def enemies(self):
+        return self.sim.enemies
 
     # --- helpers ---
     def restart_level(self):
@@ -68,23 +103,77 @@ class Game:
 
     # --- visuals ---
     def gradient_bg(self):
-        for y in range(SCREEN_H):
-            t = y / SCREEN_H
-            r = int(BG_GRAD_TOP[0] * (1 - t) + BG_GRAD_BOTTOM[0] * t)
-            g = int(BG_GRAD_TOP[1] * (1 - t) + BG_GRAD_BOTTOM[1] * t)
-            b = int(BG_GRAD_TOP[2] * (1 - t) + BG_GRAD_BOTTOM[2] * t)
-            pygame.draw.line(self.screen, (r, g, b), (0, y), (SCREEN_W, y))
+        if self._bg is None:
+            self._bg = pygame.Surface((SCREEN_W, SCREEN_H)).convert()
+            for y in range(SCREEN_H):
+                t = y / SCREEN_H
+                r = int(BG_GRAD_TOP[0] * (1 - t) + BG_GRAD_BOTTOM[0] * t)
+                g = int(BG_GRAD_TOP[1] * (1 - t) + BG_GRAD_BOTTOM[1] * t)
+                b = int(BG_GRAD_TOP[2] * (1 - t) + BG_GRAD_BOTTOM[2] * t)
+                pygame.draw.line(self._bg, (r, g, b), (0, y), (SCREEN_W, y))
+        self.screen.blit(self._bg, (0, 0))
+
+    def darken(self, alpha: int):
+        """Full-screen black overlay; one reused surface per alpha."""
+        overlay = self._overlays.get(alpha)
+        if overlay is None:
+            overlay = pygame.Surface((SCREEN_W, SCREEN_H), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, alpha))
+            self._overlays[alpha] = overlay
+        self.screen.blit(overlay, (0, 0))
+
+    def status_line(self):
+        """The sidebar notice, until STATUS_SECONDS after it was set."""
+        text, until = self._status
+        return text if text and time.monotonic() < until else None
+
+    def dump_profile(self, ext: str):
+        """[F4] Write the profiler's frames to PROFILE_DUMP + ext and say so in the sidebar."""
+        path = PROFILE_DUMP + ext
+        try:
+            n = self.profiler.dump(path)
+            text = f"Saved {n} frames to {os.path.basename(path)}"
+        except OSError as e:
+            text = f"Profile not saved: {e.strerror or e}"
+        self._status = (text, time.monotonic() + STATUS_SECONDS)
+
+    def toggle_replay(self):
+        """
+        Trace the nearest enemy's query to the player (in the current mode, or
+        A* for modes that can't be traced) and replay it over the board.
+        """
+        if self.replay is not None or not self.enemies:
+            self.replay = None
+            return
+        px, py = self.player.grid_pos()
+        enemy = min(self.enemies, key=lambda e: abs(e.gx - px) + abs(e.gy - py))
+        if self._trace is None:
+            self._trace = Trace()
+        grid = self.world.grid
+        mode = self.pathfinder.mode if self.pathfinder.mode in TRACE_MODES else "astar"
+        traced_search(mode, grid, grid.index(*enemy.grid_pos()), grid.index(px, py),
+                      self._trace, self.pathfinder.heuristic, self.pathfinder.epsilon)
+        self.replay = Replay(self._trace, REPLAY_SPEED)
 
     # --- update ---
     def update(self, dt: float):
         if self.scene != "playing":
             return
-        # enemies are static for now; just check collision and win
-        ppos = self.player.grid_pos()
-        if any(e.grid_pos() == ppos for e in self.enemies):
+        prof = self.profiler
+        t = prof.start()
+        if self.replay is not None:
+            self.replay.advance(dt)
+        # enemies chase the player, then the core checks collision and win
+        self.sim.tick(dt)
+        self.apply_sim_status()
+        path_ns = self.sim.last_path_ns
+        prof.add("update", prof.start() - t - path_ns)
+        prof.add("pathfinding", path_ns)
+
+    def apply_sim_status(self):
+        if self.sim.status == CAUGHT:
             self.scene = "game_over"
-            return
-        if ppos == self.world.level.exit_pos:
+        elif self.sim.status == ESCAPED:
             if self.level_index < self.total_levels:
                 self.unlocked_to = max(self.unlocked_to, self.level_index + 1)
                 self.scene = "level_complete"
@@ -92,15 +181,81 @@ class Game:
                 self.scene = "game_complete"
 
     # --- draw ---
+    def _screen_state(self):
+        """Everything besides entity positions that a frame depends on."""
+        btn = self.play_btn_rect if self.scene == "main_menu" else self.back_btn_rect
+        hover = bool(btn and btn.collidepoint(pygame.mouse.get_pos()))
+        return (self.scene, id(self.world), self.world.version, self.level_index,
+                self.pathfinder.mode, self.pathfinder.heuristic, self.unlocked_to, hover,
+                self.show_minimap, self.camera.offset, self.camera.tile, self._profile_lines,
+                self.status_line())
+
+    def _entity_cells(self):
+        return [self.player.grid_pos()] + [e.grid_pos() for e in self.enemies]
+
+    def draw_minimap(self):
+        sight = self.world.visibility.visible(self.player.grid_pos(), SIGHT_RADIUS)
+        corner = (SCREEN_W - self.ui.panel_w - 12, SCREEN_H - 12)
+        return self.ui.draw_minimap(self.screen, self.world, self.player.grid_pos(),
+                                    self.enemies, sight, corner)
+
+    def draw_dirty(self) -> bool:
+        """
+        Repaint only the tiles entities moved off or onto since the last frame;
+        menus and overlays are static, so an unchanged one costs nothing.
+        Returns False when a full redraw is needed instead.
+        """
+        if self._frame_state != self._screen_state() or self.replay is not None:
+            return False
+        if self.scene != "playing":
+            return True
+        cells = self._entity_cells()
+        moved = {c for old, new in zip(self._drawn_cells, cells) if old != new for c in (old, new)}
+        if moved:
+            prof = self.profiler
+            cam = self.camera
+            t = prof.start()
+            rects = self.world.draw(self.screen, cam, moved)
+            prof.stop("world", t)
+            # redraw everyone standing on a restored tile, not just the movers
+            t = prof.start()
+            self.screen.set_clip(cam.view)
+            if self.player.grid_pos() in moved:
+                self.player.draw(self.screen, self.world, cam.offset, cam.tile)
+            for e in self.enemies:
+                pos = e.grid_pos()
+                if pos in moved and cam.sees(pos):
+                    e.draw(self.screen, cam.offset, cam.tile)
+            self.screen.set_clip(None)
+            prof.stop("entities", t)
+            if self.show_minimap:
+                t = prof.start()
+                rects.append(self.draw_minimap())
+                prof.stop("panel", t)
+            t = prof.start()
+            pygame.display.update(rects)
+            prof.stop("flip", t)
+        self._drawn_cells = cells
+        return True
+
     def draw(self):
+        if self.scene != "main_menu":
+            self.camera.follow(self.world, self.player.grid_pos())
+        if self.show_profile and (self._profile_lines is None or
+                                  self.profiler.frames % PROFILE_REFRESH == 0):
+            self._profile_lines = tuple(self.profiler.summary())
+        if self.dirty_rects and self.draw_dirty():
+            return
+
+        prof = self.profiler
+        t = prof.start()
         if self.scene == "main_menu":
             if self.menu_bg:
                 self.screen.blit(self.menu_bg, (0, 0))
-                overlay = pygame.Surface((SCREEN_W, SCREEN_H), pygame.SRCALPHA)
-                overlay.fill((0, 0, 0, 120))  # soften background
-                self.screen.blit(overlay, (0, 0))
+                self.darken(120)  # soften background
             else:
                 self.gradient_bg()
+            t = prof.stop("background", t)
 
             self.ui.draw_title(self.screen, "COOKIE RUN: ESCAPE THE OVEN", (255, 170, 120), y=180)
             cx, cy = SCREEN_W // 2, SCREEN_H // 2 + 30
@@ -108,28 +263,40 @@ class Game:
             self.ui.draw_subtitle(self.screen,
                                 "Use WASD/Arrows to move • Don't get caught!",
                                 (255, 235, 200), y=cy + 80)
+            t = prof.stop("panel", t)
 
         else:
             # Base world + entities always draw first
             self.gradient_bg()
-            self.world.draw(self.screen, self.offset)
-            self.player.draw(self.screen, self.world, self.offset)
+            t = prof.stop("background", t)
+            cam = self.camera
+            self.world.draw(self.screen, cam)
+            self.screen.set_clip(cam.view)  # sprites overhang their tiles a little
+            if self.replay is not None:
+                self.replay.draw(self.screen, cam.offset, cam.tile, cam.cells())
+            t = prof.stop("world", t)
+            self.player.draw(self.screen, self.world, cam.offset, cam.tile)
             for e in self.enemies:
-                e.draw(self.screen, self.offset)
+                if cam.sees(e.grid_pos()):
+                    e.draw(self.screen, cam.offset, cam.tile)
+            self.screen.set_clip(None)
+            t = prof.stop("entities", t)
+            if self.show_minimap:
+                self.draw_minimap()
 
             # Right sidebar (always on during gameplay-style scenes)
             self.back_btn_rect = self.ui.draw_panel(
                 self.screen,
                 self.level_index, self.total_levels,
                 self.pathfinder.mode, self.pathfinder.heuristic,
-                self.unlocked_to
+                self.unlocked_to,
+                profile=self._profile_lines if self.show_profile else None,
+                status=self.status_line()
             )
 
             # Overlay scenes: darken whole screen, then center the text
             if self.scene in ("level_complete", "game_over", "game_complete"):
-                overlay = pygame.Surface((SCREEN_W, SCREEN_H), pygame.SRCALPHA)
-                overlay.fill((0, 0, 0, 160))  # darker overlay
-                self.screen.blit(overlay, (0, 0))
+                self.darken(160)  # darker overlay
 
                 if self.scene == "level_complete":
                     self.ui.draw_title(self.screen, "LEVEL CLEARED!", (120, 200, 120),
@@ -152,14 +319,20 @@ class Game:
                     center_btn = self.ui.draw_button(self.screen, "BACK TO MENU",
                                                     (SCREEN_W // 2, SCREEN_H - 110))
                     self.back_btn_rect = center_btn
+            t = prof.stop("panel", t)
 
         pygame.display.flip()
+        prof.stop("flip", t)
+        self._frame_state = self._screen_state()
+        self._drawn_cells = self._entity_cells()
 
     # --- loop ---
     def run(self):
+        prof = self.profiler
         while self.running:
             dt = self.clock.tick(60) / 1000.0
 
+            t = prof.start()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
@@ -175,6 +348,9 @@ class Game:
                         self.unlocked_to = 1
                         self.load_level(self.level_index)
 
+                elif event.type == pygame.MOUSEWHEEL and self.scene != "main_menu":
+                    self.camera.zoom_by(1 if event.y > 0 else -1)
+
                 # keyboard
                 elif event.type == pygame.KEYDOWN:
                     # one-tile movement in playing scene
@@ -187,18 +363,9 @@ class Game:
                         }
                         if event.key in move_map:
                             dx, dy = move_map[event.key]
-                            self.player.try_move(dx, dy, self.world)
-
+                            self.sim.move_player(dx, dy)
                             # immediate checks
-                            ppos = self.player.grid_pos()
-                            if any(e.grid_pos() == ppos for e in self.enemies):
-                                self.scene = "game_over"
-                            elif ppos == self.world.level.exit_pos:
-                                if self.level_index < self.total_levels:
-                                    self.unlocked_to = max(self.unlocked_to, self.level_index + 1)
-                                    self.scene = "level_complete"
-                                else:
-                                    self.scene = "game_complete"
+                            self.apply_sim_status()
                             continue  # don't process other actions on this key press
 
                     # Enter / Return across scenes
@@ -228,19 +395,65 @@ class Game:
                         self.next_unlocked()
                         self.scene = "playing"
 
+                    elif event.key == pygame.K_m:
+                        self.show_minimap = not self.show_minimap
+
+                    elif event.key == pygame.K_F3:
+                        self.show_profile = not self.show_profile
+                        self._profile_lines = None
+                    elif event.key == pygame.K_F4:
+                        self.dump_profile(".json" if event.mod & pygame.KMOD_SHIFT else ".csv")
+
+                    elif event.key == pygame.K_h and self.scene == "playing":
+                        self.toggle_replay()
+                    elif event.key == pygame.K_LEFTBRACKET and self.replay is not None:
+                        self.replay.speed = max(1.0, self.replay.speed / 2)
+                    elif event.key == pygame.K_RIGHTBRACKET and self.replay is not None:
+                        self.replay.speed *= 2
+
+                    elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                        self.camera.zoom_by(1)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        self.camera.zoom_by(-1)
+
                     # algorithm toggles (placeholders for your teammate)
                     elif event.key == pygame.K_g:
                         self.pathfinder.set_mode("greedy", self.pathfinder.heuristic)
                     elif event.key == pygame.K_a:
                         self.pathfinder.set_mode("astar", self.pathfinder.heuristic)
+                    elif event.key == pygame.K_f:
+                        self.pathfinder.set_mode("flow", self.pathfinder.heuristic)
+                    elif event.key == pygame.K_i:
+                        self.pathfinder.set_mode("incremental", self.pathfinder.heuristic)
+                    elif event.key == pygame.K_j:
+                        self.pathfinder.set_mode("jps", self.pathfinder.heuristic)
+                    elif event.key == pygame.K_c:
+                        self.pathfinder.set_mode("hpa", self.pathfinder.heuristic)
+                    elif event.key == pygame.K_e:
+                        self.pathfinder.set_mode("weighted", self.pathfinder.heuristic)
+                    elif event.key == pygame.K_y:
+                        self.pathfinder.set_mode("ara", self.pathfinder.heuristic)
+                    elif event.key == pygame.K_o:
+                        self.pathfinder.set_mode("cooperative", self.pathfinder.heuristic)
                     elif event.key == pygame.K_1:
                         self.pathfinder.set_mode(self.pathfinder.mode, "manhattan")
                     elif event.key == pygame.K_2:
                         self.pathfinder.set_mode(self.pathfinder.mode, "euclidean")
+                    elif event.key == pygame.K_3:
+                        self.pathfinder.set_mode(self.pathfinder.mode, "alt")
+                        self.pathfinder.prepare(self.world)
+                    elif event.key == pygame.K_4:
+                        self.pathfinder.set_mode(self.pathfinder.mode, "differential")
+                        self.pathfinder.prepare(self.world)
+
+            prof.stop("events", t)
 
             self.update(dt)
             self.draw()
+            prof.end_frame()
 
+        if self.pathfinder.workers is not None:
+            self.pathfinder.workers.shutdown()
         pygame.quit()
         sys.exit()
 
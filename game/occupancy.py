@@ -0,0 +1,138 @@
+# game/occupancy.py
+"""
+Which entities stand on which cell, owned by World (world.occupancy).
+
+A flat count per cell in the grid's bordered layout answers "is anyone
+here" in O(1), and a spatial hash cell -> entities says who. Entities report
+their own moves (Player.try_move, Enemy.update) through move(), so rule
+checks and planners never scan the entity list:
+
+    occ.at(x, y)              entities on one cell
+    occ.within(x, y, r)       entities within Chebyshev radius r
+    occ.along(a, b)           entities on the cells of the segment a -> b
+    occ.counts                per-cell counts, usable as a soft-obstacle cost
+"""
+from array import array
+from typing import Any, Dict, Iterator, List, Tuple
+
+GridPos = Tuple[int, int]
+
+_EMPTY: Tuple[Any, ...] = ()
+
+
+def line_cells(a: GridPos, b: GridPos) -> Iterator[GridPos]:
+    """Cells of the Bresenham line from a to b, both ends included."""
+    (x0, y0), (x1, y1) = a, b
+    dx, dy = abs(x1 - x0), -abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    err = dx + dy
+    while True:
+        yield x0, y0
+        if x0 == x1 and y0 == y1:
+            return
+        e2 = 2 * err
+        if e2 >= dy:
+            err += dy
+            x0 += sx
+        if e2 <= dx:
+            err += dx
+            y0 += sy
+
+
+class Occupancy:
+    def __init__(self, grid):
+        self.w, self.h = grid.w, grid.h
+        self.stride = grid.stride
+        self.counts = array("H", [0]) * grid.size
+        self._cells: Dict[int, List[Any]] = {}  # cell -> entities on it
+        self._where: Dict[Any, int] = {}        # entity -> cell
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def _index(self, x: int, y: int) -> int:
+        return (y + 1) * self.stride + x + 1
+
+    # ---------- updates ----------
+    def add(self, entity: Any, pos: GridPos) -> None:
+        if entity in self._where:
+            self.move(entity, pos)
+            return
+        i = self._index(*pos)
+        self._where[entity] = i
+        self._cells.setdefault(i, []).append(entity)
+        self.counts[i] += 1
+
+    def remove(self, entity: Any) -> None:
+        i = self._where.pop(entity, None)
+        if i is None:
+            return
+        here = self._cells[i]
+        here.remove(entity)
+        if not here:
+            del self._cells[i]
+        self.counts[i] -= 1
+
+    def move(self, entity: Any, pos: GridPos) -> None:
+        """Record that 'entity' now stands on pos (adds it if it wasn't indexed)."""
+        i = self._index(*pos)
+        old = self._where.get(entity)
+        if old == i:
+            return
+        if old is not None:
+            self.remove(entity)
+        self._where[entity] = i
+        self._cells.setdefault(i, []).append(entity)
+        self.counts[i] += 1
+
+    def clear(self) -> None:
+        self.counts = array("H", [0]) * len(self.counts)
+        self._cells.clear()
+        self._where.clear()
+
+    # ---------- queries ----------
+    def occupied(self, x: int, y: int) -> bool:
+        if x < 0 or y < 0 or x >= self.w or y >= self.h:
+            return False
+        return self.counts[self._index(x, y)] > 0
+
+    def at(self, x: int, y: int) -> Tuple[Any, ...]:
+        if x < 0 or y < 0 or x >= self.w or y >= self.h:
+            return _EMPTY
+        here = self._cells.get(self._index(x, y))
+        return tuple(here) if here else _EMPTY
+
+    def within(self, x: int, y: int, radius: int) -> List[Any]:
+        """Entities with max(|dx|, |dy|) <= radius of (x, y)."""
+        if (2 * radius + 1) ** 2 > len(self._cells):
+            # sparse: cheaper to check the occupied cells than to sweep the square
+            stride = self.stride
+            found = []
+            for i, here in self._cells.items():
+                cy, cx = divmod(i, stride)
+                if abs(cx - 1 - x) <= radius and abs(cy - 1 - y) <= radius:
+                    found.extend(here)
+            return found
+        x0, x1 = max(0, x - radius), min(self.w - 1, x + radius)
+        found = []
+        cells = self._cells
+        for cy in range(max(0, y - radius), min(self.h - 1, y + radius) + 1):
+            base = (cy + 1) * self.stride + 1
+            for i in range(base + x0, base + x1 + 1):
+                here = cells.get(i)
+                if here:
+                    found.extend(here)
+        return found
+
+    def along(self, a: GridPos, b: GridPos) -> List[Any]:
+        """Entities on the cells from a to b (Bresenham), in order from a."""
+        found = []
+        for x, y in line_cells(a, b):
+            if self.occupied(x, y):
+                found.extend(self._cells[self._index(x, y)])
+        return found
+
+    def position(self, entity: Any) -> GridPos:
+        y, x = divmod(self._where[entity], self.stride)
+        return x - 1, y - 1
@@ -1,65 +1,395 @@
 # game/path_api.py
-from typing import List, Tuple, Optional
+import math
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, List, Tuple, Optional
+
+from ai.cooperative import CooperativePlanner
+from ai.flowfield import FlowField
+from ai.heuristics import LANDMARK, heuristic_fn, landmarks_for
+from ai.hpa import HPAGraph
+from ai.search import EPSILON, INF, MODES, IncrementalPlanner, SearchResult, search, soft_best_first
 
 GridPos = Tuple[int, int]
 
+# modes whose answer depends only on (start, goal, heuristic, grid), so it can be cached
+CACHEABLE = ("greedy", "astar", "dijkstra", "bfs", "jps", "weighted", "ara", "hpa")
+# ... and whose paths stay optimal from any cell on them, so a suffix answers a later start too
+SUFFIX_REUSE = ("astar", "dijkstra", "bfs", "jps")
+_MISSING = object()
+
 class Pathfinder:
     """
     Interface that the enemy uses to chase the player.
-    Your teammate replaces 'find_path' with Greedy / A* (select via mode string).
+    'mode' picks the search in ai/search.py (greedy / astar / dijkstra / bfs / jps,
+    "weighted": A* with the heuristic inflated by 'epsilon', "ara": anytime
+    ARA* from 'epsilon' down to optimal),
+    or "flow": one shared BFS from the player (ai/flowfield.py) that every
+    enemy reads its next step from,
+    or "incremental": one D* Lite planner per enemy that repairs its last
+    search when the player or the enemy moves a tile,
+    or "hpa": HPA* over world.hpa (ai/hpa.py), built here if the world has none,
+    or "cooperative": WHCA* (ai/cooperative.py): enemies step along windowed
+    plans that reserve their cells in space-time, so they don't stack up;
+    find_paths() plans a whole batch of them at once.
+    'heuristic' picks the distance estimate by name from ai/heuristics.py:
+    manhattan / euclidean / chebyshev, or "alt" / "differential" on landmark
+    distance arrays that prepare() builds at level load.
+
+    Results of CACHEABLE modes go into a bounded LRU keyed on
+    (start, goal, mode, heuristic, epsilon, grid version), with the bound the
+    search proved; in the SUFFIX_REUSE (optimal) modes a query whose start
+    already lies on a cached path to the same goal gets that path's suffix.
+    Any tile edit bumps the grid version and drops the whole cache.
+
+    With 'avoid_agents' > 0, "astar" and "weighted" treat cells other agents
+    stand on (world.occupancy) as soft obstacles worth that many extra steps;
+    those answers depend on where everyone is, so they skip the cache.
+
+    find_path_async() hands the search to 'workers' (game/path_workers.py)
+    and returns a Future of AsyncPath instead of blocking.
     """
-    def __init__(self, mode: str = "greedy", heuristic: str = "manhattan"):
+    MODES = MODES + ("flow", "incremental", "hpa", "cooperative")
+
+    def __init__(self, mode: str = "greedy", heuristic: str = "manhattan", cache_size: int = 256,
+                 workers=None, epsilon: float = EPSILON, avoid_agents: float = 0.0):
         self.mode = mode
         self.heuristic = heuristic
+        self.epsilon = epsilon
+        self.avoid_agents = avoid_agents  # extra steps worth taking to pass around an agent
+        self.workers = workers  # PathWorkers for find_path_async(); a thread pool is made on first use
+        self.last_result: Optional[SearchResult] = None  # stats of the latest query
+        self._flow: Optional[FlowField] = None
+        self._planners = weakref.WeakKeyDictionary()  # agent -> IncrementalPlanner
+        self._hpa: Optional[HPAGraph] = None
+        self._coop: Optional[CooperativePlanner] = None
+        self.tick_dt = 1 / 60  # seconds per simulation tick, as last passed to advance()
+
+        # path cache
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, Tuple[Optional[Tuple[GridPos, ...]], float]]" = OrderedDict()
+        self._on_path: Dict[tuple, Dict[GridPos, Tuple[tuple, int]]] = {}  # goal key -> cell -> (key, index)
+        self._cache_grid = None
+        self._cache_version = -1
+        self.cache_hits = 0
+        self.cache_suffix_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
 
     def set_mode(self, mode: str, heuristic: str):
         self.mode = mode
         self.heuristic = heuristic
 
-    def find_path(self, start: GridPos, goal: GridPos, grid_is_blocked) -> Optional[List[GridPos]]:
+    def prepare(self, world) -> None:
         """
-        Return a list of grid cells from start to goal (inclusive).
-        'grid_is_blocked(x,y) -> bool' indicates walls.
-        NOTE: this fallback is intentionally simple so your scene runs now.
+        Level-load work for the current heuristic: the landmark distance arrays,
+        so the first chase doesn't pay for them. Other heuristics need nothing.
         """
-        if start == goal:
-            return [start]
+        if self.heuristic in LANDMARK:
+            landmarks_for(world.grid)
 
-        # naive step-by-step "greedy" toward goal (placeholder)
-        path = [start]
-        cx, cy = start
-        gx, gy = goal
-
-        safety = 500
-        while safety > 0 and (cx, cy) != (gx, gy):
-            safety -= 1
-            step_x = 0 if cx == gx else (1 if gx > cx else -1)
-            step_y = 0 if cy == gy else (1 if gy > cy else -1)
-
-            # try horizontal first
-            nx, ny = cx + step_x, cy
-            if step_x != 0 and not grid_is_blocked(nx, ny):
-                cx, cy = nx, ny
-                path.append((cx, cy))
-                continue
+    def find_path(self, start: GridPos, goal: GridPos, world, agent: Any = None,
+                  deadline: Optional[float] = None, max_nodes: Optional[int] = None) -> Optional[List[GridPos]]:
+        """
+        Return a list of grid cells from start to goal (inclusive), or None.
+        Searches run on world.grid (see ai/grid.py).
+        'agent' (usually the Enemy) owns the planner state in "incremental" mode.
+        'deadline' (a time.perf_counter() value) / 'max_nodes' cap "astar",
+        "weighted" and "ara": the best path found by then comes back, and
+        self.last_result.bound says how far from optimal it may be (INF with
+        no path: out of time before any was found).
+        Nodes expanded and elapsed time are left in self.last_result.
+        """
+        grid = world.grid
+        if not (grid.in_bounds(*start) and grid.in_bounds(*goal)) or \
+                world.connected(start, goal) is False:
+            # out of bounds, or in different components per the level pack: no search needed
+            self.last_result = SearchResult(None, float("inf"), 0, 0.0)
+            return None
+
+        if self.mode == "flow":
+            return self._walk_flow(start, goal, world)
+        if deadline is None and max_nodes is None and self.avoids_agents(world):
+            return self._find_path_soft(start, goal, world)
+
+        use_cache = self.cache_size > 0 and self.mode in CACHEABLE
+        if use_cache:
+            t0 = time.perf_counter()
+            cached = self._cache_get(start, goal, grid)
+            if cached is not _MISSING:
+                cached, bound = cached
+                self.last_result = SearchResult(None, len(cached) - 1 if cached else float("inf"), 0,
+                                                (time.perf_counter() - t0) * 1000.0, bound)
+                return list(cached) if cached is not None else None
+
+        if self.mode == "incremental":
+            res = self._planner_for(agent, grid).plan(grid.index(*start), grid.index(*goal))
+        elif self.mode == "cooperative":
+            # a whole single path; the cooperative part is next_step / find_paths
+            res = search("astar", grid, grid.index(*start), grid.index(*goal), self.heuristic)
+        elif self.mode == "hpa":
+            res = self._hpa_for(world).find_path(grid.index(*start), grid.index(*goal))
+        else:
+            res = search(self.mode, grid, grid.index(*start), grid.index(*goal), self.heuristic,
+                         self.epsilon, deadline, max_nodes)
+        self.last_result = res
+        path = None
+        if res.path is not None:
+            pos = grid.pos
+            path = [pos(i) for i in res.path]
+        if use_cache and (deadline is None and max_nodes is None or res.bound <= self._full_bound()):
+            self._cache_put(start, goal, path, res.bound)
+        return path
+
+    def find_path_async(self, start: GridPos, goal: GridPos, world, agent: Any = None) -> Future:
+        """
+        Like find_path, but returns a Future of path_workers.AsyncPath right
+        away. Searches run on self.workers; cache hits, unreachable goals and
+        modes the workers can't run (flow / incremental / hpa, or anything
+        avoiding agents: occupancy changes every tick) are answered here and
+        come back already done. Check AsyncPath.is_current() before
+        using the path: the tiles or the goal may have changed since.
+        """
+        from .path_workers import AsyncPath, PathWorkers
+        grid = world.grid
+        if self.workers is None:
+            self.workers = PathWorkers("thread", 1)
+        fut = Future()
+        if self.mode in CACHEABLE and self.cache_size > 0 and grid.in_bounds(*start) \
+                and grid.in_bounds(*goal) and world.connected(start, goal) is not False:
+            cached = self._cache_get(start, goal, grid)
+            if cached is not _MISSING:
+                cached, bound = cached
+                path = list(cached) if cached is not None else None
+                res = SearchResult(None, len(cached) - 1 if cached else float("inf"), 0, 0.0, bound)
+                fut.set_result(AsyncPath(path, res, start, goal, grid.version))
+                return fut
+        if not self.workers.supports(self.mode) or self.avoids_agents(world) or not (grid.in_bounds(*start) and grid.in_bounds(*goal)) \
+                or world.connected(start, goal) is False:
+            path = self.find_path(start, goal, world, agent)
+            fut.set_result(AsyncPath(path, self.last_result, start, goal, grid.version))
+            return fut
+        return self.workers.submit(grid, self.mode, self.heuristic, start, goal, self.epsilon)
+
+    def next_step(self, start: GridPos, goal: GridPos, world,
+                  agent: Any = None) -> Optional[GridPos]:
+        """
+        Cell to move to from 'start' towards 'goal' ('start' itself when already
+        there), or None if the goal can't be reached.
+        "flow" reads the shared flow field in O(1); other modes plan a full path.
+        """
+        grid = world.grid
+        if self.mode == "flow":
+            if not (grid.in_bounds(*start) and grid.in_bounds(*goal)):
+                return None
+            nxt = self._flow_to(goal, world).next_cell(grid.index(*start))
+            return None if nxt is None else grid.pos(nxt)
+
+        if self.mode == "cooperative":
+            if not (grid.in_bounds(*start) and grid.in_bounds(*goal)):
+                return None
+            coop = self._coop_for(world)
+            nxt = coop.next_cell(self if agent is None else agent, grid.index(*start), grid.index(*goal),
+                                 self._ticks_per_step(agent))
+            self.last_result = SearchResult(None, INF, coop.expanded, coop.last_ms)
+            return None if nxt is None else grid.pos(nxt)
+
+        if self.mode == "hpa" and self.cache_size <= 0:
+            if not (grid.in_bounds(*start) and grid.in_bounds(*goal)) or \
+                    world.connected(start, goal) is False:
+                return None
+            # uncached, only the first abstract hop needs refining for one step
+            res = self.last_result = self._hpa_for(world).find_path(
+                grid.index(*start), grid.index(*goal), max_hops=1)
+            if res.path is None:
+                return None
+            return grid.pos(res.path[1] if len(res.path) > 1 else res.path[0])
+
+        path = self.find_path(start, goal, world, agent)
+        if not path:
+            return None
+        return path[1] if len(path) > 1 else path[0]
 
-            # then try vertical
-            nx, ny = cx, cy + step_y
-            if step_y != 0 and not grid_is_blocked(nx, ny):
-                cx, cy = nx, ny
-                path.append((cx, cy))
+    def find_paths(self, starts: List[GridPos], goal: GridPos, world,
+                   agents: Optional[List[Any]] = None) -> List[Optional[List[GridPos]]]:
+        """
+        Plan many chasers towards 'goal' together (WHCA*, ai/cooperative.py):
+        in priority order, each against the space-time reservations of the
+        ones before it. Paths are windowed (at most cooperative.WINDOW steps)
+        and may repeat a cell where that agent waits for another to pass.
+        'agents' (e.g. the Enemies) key the reservations, so their later
+        next_step() calls in "cooperative" mode carry on from these plans.
+        """
+        grid = world.grid
+        if not grid.in_bounds(*goal):
+            return [None] * len(starts)
+        keys = list(agents) if agents is not None else list(range(len(starts)))
+        coop = self._coop_for(world)
+        expanded = coop.expanded
+        cells = coop.plan_all(keys, [grid.index(*s) for s in starts], grid.index(*goal),
+                              [self._ticks_per_step(a) for a in keys])
+        self.last_result = SearchResult(None, INF, coop.expanded - expanded, coop.last_ms)
+        pos = grid.pos
+        return [[pos(i) for i in c] if c is not None else None for c in cells]
+
+    def forget(self, agent: Any) -> None:
+        """Drop what is kept for 'agent' (its reservations, its planner) when it stops chasing."""
+        self._planners.pop(agent, None)
+        if self._coop is not None:
+            self._coop.forget(agent)
+
+    def advance(self, dt: Optional[float] = None) -> None:
+        """Call once per simulation tick (of dt seconds): cooperative reservations are in ticks."""
+        if dt:
+            self.tick_dt = dt
+        if self._coop is not None:
+            self._coop.advance()
+
+    def on_player_moved(self, goal: GridPos, world) -> None:
+        """
+        Call after Player.try_move succeeds: rebuilds the flow field once for
+        everyone instead of letting each enemy plan on its own.
+        """
+        if self.mode == "flow" and world.grid.in_bounds(*goal):
+            self._flow_to(goal, world)
+
+    def avoids_agents(self, world) -> bool:
+        """Whether queries on 'world' currently route around other agents (see avoid_agents)."""
+        return self.avoid_agents > 0 and self.mode in ("astar", "weighted") and \
+            getattr(world, "occupancy", None) is not None
+
+    def _find_path_soft(self, start: GridPos, goal: GridPos, world) -> Optional[List[GridPos]]:
+        grid = world.grid
+        s, t = grid.index(*start), grid.index(*goal)
+        if grid.walls[s] or grid.walls[t]:
+            self.last_result = SearchResult(None, INF, 0, 0.0)
+            return None
+        hw = max(self.epsilon, 1.0) if self.mode == "weighted" else 1.0
+        res = self.last_result = soft_best_first(grid, s, t, heuristic_fn(self.heuristic, grid, t, s),
+                                                 world.occupancy.counts, self.avoid_agents, hw)
+        if res.path is None:
+            return None
+        pos = grid.pos
+        return [pos(i) for i in res.path]
+
+    def _full_bound(self) -> float:
+        """Suboptimality bound of an unbudgeted query in the current mode."""
+        return max(self.epsilon, 1.0) if self.mode == "weighted" else 1.0
+
+    # ---------- path cache ----------
+    def cache_stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._cache),
+            "hits": self.cache_hits,
+            "suffix_hits": self.cache_suffix_hits,
+            "misses": self.cache_misses,
+            "evictions": self.cache_evictions,
+        }
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+        self._on_path.clear()
+
+    def _cache_get(self, start: GridPos, goal: GridPos, grid):
+        """(path, bound) from the cache, or _MISSING."""
+        if self._cache_grid is not grid or self._cache_version != grid.version:
+            self.clear_cache()
+            self._cache_grid = grid
+            self._cache_version = grid.version
+
+        key = (start, goal, self.mode, self.heuristic, self.epsilon, grid.version)
+        entry = self._cache.get(key, _MISSING)
+        if entry is not _MISSING:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return entry
+
+        hit = self._on_path.get(key[1:], {}).get(start)
+        if hit is not None:
+            pkey, i = hit
+            self._cache.move_to_end(pkey)
+            self.cache_suffix_hits += 1
+            return self._cache[pkey][0][i:], 1.0
+
+        self.cache_misses += 1
+        return _MISSING
+
+    def _cache_put(self, start: GridPos, goal: GridPos, path: Optional[List[GridPos]],
+                   bound: float = 1.0) -> None:
+        key = (start, goal, self.mode, self.heuristic, self.epsilon, self._cache_version)
+        stored = tuple(path) if path is not None else None
+        self._cache[key] = (stored, bound)
+        self._cache.move_to_end(key)
+        if stored is not None and self.mode in SUFFIX_REUSE:
+            index = self._on_path.setdefault(key[1:], {})
+            for i, cell in enumerate(stored):
+                index[cell] = (key, i)
+        while len(self._cache) > self.cache_size:
+            old_key, (old, _) = self._cache.popitem(last=False)
+            self.cache_evictions += 1
+            index = self._on_path.get(old_key[1:])
+            if old is None or index is None:
                 continue
+            for cell in old:
+                if index.get(cell, (None,))[0] == old_key:
+                    del index[cell]
+            if not index:
+                del self._on_path[old_key[1:]]
+
+    # ---------- incremental ----------
+    def _planner_for(self, agent: Any, grid) -> IncrementalPlanner:
+        key = self if agent is None else agent
+        planner = self._planners.get(key)
+        if planner is None or planner.grid is not grid or planner.heuristic != self.heuristic:
+            planner = self._planners[key] = IncrementalPlanner(grid, self.heuristic)
+        return planner
 
-            # try orthogonal detours
-            tried = False
-            for dx, dy in ((1,0),(-1,0),(0,1),(0,-1)):
-                nx, ny = cx + dx, cy + dy
-                if not grid_is_blocked(nx, ny):
-                    cx, cy = nx, ny
-                    path.append((cx, cy))
-                    tried = True
-                    break
-            if not tried:
-                return None  # stuck
-
-        return path if (cx, cy) == (gx, gy) else None
+    # ---------- cooperative ----------
+    def _ticks_per_step(self, agent: Any) -> Optional[int]:
+        """Ticks between an agent's steps, from its 'speed' (tiles/s); None if it has none."""
+        speed = getattr(agent, "speed", 0)
+        if not speed or speed <= 0:
+            return None
+        return max(1, math.ceil(1.0 / (speed * self.tick_dt) - 1e-6))
+
+    def _coop_for(self, world) -> CooperativePlanner:
+        if self._coop is None or self._coop.grid is not world.grid:
+            self._coop = CooperativePlanner(world.grid)
+        return self._coop
+
+    # ---------- hpa ----------
+    def _hpa_for(self, world) -> HPAGraph:
+        hpa = getattr(world, "hpa", None)
+        if hpa is not None:
+            return hpa
+        if self._hpa is None or self._hpa.grid is not world.grid:
+            self._hpa = HPAGraph(world.grid)
+        return self._hpa
+
+    # ---------- flow field ----------
+    def _flow_to(self, goal: GridPos, world) -> FlowField:
+        grid = world.grid
+        ff = self._flow
+        if ff is None or ff.grid is not grid:
+            ff = self._flow = FlowField(grid)
+        target = grid.index(*goal)
+        if not ff.is_current(target):
+            t0 = time.perf_counter()
+            ff.build(target)
+            self.last_result = SearchResult(None, float("inf"), ff.expanded,
+                                            (time.perf_counter() - t0) * 1000.0)
+        return ff
+
+    def _walk_flow(self, start: GridPos, goal: GridPos, world) -> Optional[List[GridPos]]:
+        grid = world.grid
+        ff = self._flow_to(goal, world)
+        cur = grid.index(*start)
+        if ff.distance(cur) < 0:
+            return None
+        path = [start]
+        while ff.distance(cur) > 0:
+            cur = ff.next_cell(cur)
+            path.append(grid.pos(cur))
+        return path
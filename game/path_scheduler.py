@@ -0,0 +1,311 @@
+# game/path_scheduler.py
+"""
+Frame-budgeted path planning between Enemy.update and Pathfinder.
+
+Enemies call next_step() exactly as they would on the Pathfinder, but
+instead of searching on the spot the scheduler queues a request and keeps
+walking them along their last path. run(), once per frame, works through the
+queue until its millisecond budget is spent: nearest enemies first, with
+every frame of waiting moving a request up (AGE_WEIGHT), so far ones are not
+starved. Aging moves every queued request up by the same amount per frame,
+so the order only depends on distance + AGE_WEIGHT * frame queued: requests
+sit in a heap on that, re-pushed when their start or goal changes (the old
+entry is skipped when it comes up), and picking one is O(log n). A*, greedy, Dijkstra and BFS searches pause at the budget
+(ai.search.SearchJob) and carry on next frame, so a burst of replans is
+spread over frames instead of landing in one.
+
+"flow" needs no per-enemy planning and "cooperative" plans a short
+window at a time with its own staggering; both go straight to the Pathfinder;
+jps / hpa / incremental can't pause, so each of those runs whole once
+started (and still counts against the budget). "ara" gets the rest of the
+frame's budget and hands back whatever bounded path it has by then; if it
+had none yet the request stays queued and gets twice the time next frame.
+
+If the Pathfinder has workers (game/path_workers.py), searches the workers
+can run are submitted there instead, at most 'max_inflight' at a time, and
+run() picks up the finished ones on a later frame. An answer for an older
+grid version, or for a goal the agent has since moved on from, is dropped.
+"""
+import heapq
+import itertools
+import time
+import weakref
+from typing import Any, List, Optional, Tuple
+
+from ai.search import INF, SearchJob, Workspace
+from .path_api import Pathfinder
+
+GridPos = Tuple[int, int]
+
+AGE_WEIGHT = 2.0  # tiles of distance that one frame of waiting is worth
+SLICEABLE = ("greedy", "astar", "dijkstra", "bfs", "weighted")
+PASS_THROUGH = ("flow", "cooperative")  # O(1)-ish per step already; no queueing
+
+
+class _Track:
+    """A planned path and how far along it the agent is."""
+    __slots__ = ("path", "index", "goal", "version")
+
+    def __init__(self, path: Optional[List[GridPos]], goal: GridPos, version: int):
+        self.path = path
+        self.index = 0
+        self.goal = goal
+        self.version = version
+
+    def locate(self, pos: GridPos) -> bool:
+        p = self.path
+        if p is None:
+            return True
+        i = self.index
+        if p[i] == pos:
+            return True
+        if i + 1 < len(p) and p[i + 1] == pos:
+            self.index = i + 1
+            return True
+        try:
+            self.index = p.index(pos)
+        except ValueError:
+            return False
+        return True
+
+    def next_cell(self) -> Optional[GridPos]:
+        p = self.path
+        if p is None:
+            return None
+        return p[self.index + 1] if self.index + 1 < len(p) else p[self.index]
+
+
+class _Request:
+    __slots__ = ("start", "goal", "frame", "misses", "entry")
+
+    def __init__(self, start: GridPos, goal: GridPos, frame: int):
+        self.start = start
+        self.goal = goal
+        self.frame = frame
+        self.misses = 0  # "ara" runs that ran out of time before a first path
+        self.entry = None  # its live heap entry; older ones are skipped
+
+    def priority(self) -> float:
+        """Lower first: distance, less AGE_WEIGHT per frame queued (relative to frame 0)."""
+        (sx, sy), (gx, gy) = self.start, self.goal
+        return abs(sx - gx) + abs(sy - gy) + AGE_WEIGHT * self.frame
+
+
+class PathScheduler:
+    DEFAULT_BUDGET_MS = 2.0
+
+    def __init__(self, pathfinder: Pathfinder, budget_ms: float = 2.0, max_inflight: Optional[int] = None):
+        self.pathfinder = pathfinder
+        self.budget_ms = budget_ms
+        self.max_inflight = max_inflight  # worker searches at once; default 2 per worker
+        self.frame = 0
+        self._tracks = weakref.WeakKeyDictionary()    # agent -> _Track being followed
+        self._fresh = weakref.WeakKeyDictionary()     # agent -> finished _Track not picked up yet
+        self._requests = weakref.WeakKeyDictionary()  # agent -> _Request
+        self._heap: list = []                         # [priority, seq, weakref(agent), _Request]
+        self._seq = itertools.count()                 # ties: first queued first
+        self._inflight = weakref.WeakKeyDictionary()  # agent -> (_Request, Future) on the workers
+        self._job = None                              # (agent, request, SearchJob) paused mid-search
+        self._ws: Optional[Workspace] = None          # private: the shared one may be reused in between
+        # stats
+        self.last_run_ms = 0.0
+        self.completed = 0
+        self.paused = 0
+        self.dropped = 0
+
+    @property
+    def mode(self) -> str:
+        return self.pathfinder.mode
+
+    def pending(self) -> int:
+        return len(self._requests) + len(self._inflight) + (self._job is not None)
+
+    def clear(self) -> None:
+        """Forget all paths and requests (new level)."""
+        for _, fut in self._inflight.values():
+            fut.cancel()
+        self._tracks = weakref.WeakKeyDictionary()
+        self._fresh = weakref.WeakKeyDictionary()
+        self._requests = weakref.WeakKeyDictionary()
+        self._heap = []
+        self._inflight = weakref.WeakKeyDictionary()
+        self._job = None
+
+    # ---------- enemy side ----------
+    def forget(self, agent: Any) -> None:
+        """Stop planning for 'agent' (it went back to its patrol)."""
+        self._tracks.pop(agent, None)
+        self._fresh.pop(agent, None)
+        self._requests.pop(agent, None)
+        self.pathfinder.forget(agent)
+
+    def request(self, agent: Any, start: GridPos, goal: GridPos) -> None:
+        """Queue (or update) a path request; its age is kept when only start/goal change."""
+        req = self._requests.get(agent)
+        if req is None:
+            self._queue(agent, _Request(start, goal, self.frame))
+        elif req.start != start or req.goal != goal:
+            req.start, req.goal = start, goal
+            self._push(agent, req)
+
+    def _queue(self, agent: Any, req: _Request) -> None:
+        self._requests[agent] = req
+        self._push(agent, req)
+
+    def _push(self, agent: Any, req: _Request) -> None:
+        req.entry = [req.priority(), next(self._seq), weakref.ref(agent), req]
+        heapq.heappush(self._heap, req.entry)
+        if len(self._heap) > 2 * len(self._requests) + 64:
+            # mostly superseded entries: rebuild from the live ones
+            self._heap = [r.entry for r in self._requests.values()]
+            heapq.heapify(self._heap)
+
+    def next_step(self, start: GridPos, goal: GridPos, world,
+                  agent: Any = None) -> Optional[GridPos]:
+        """
+        Like Pathfinder.next_step, but never searches: the next cell of the
+        agent's current path, or None to wait (no path yet, or it's blocked).
+        A new path is requested whenever the goal or the tiles changed.
+        """
+        pf = self.pathfinder
+        if agent is None or pf.mode in PASS_THROUGH:
+            return pf.next_step(start, goal, world, agent)
+        version = world.grid.version
+
+        fresh = self._fresh.pop(agent, None)
+        if fresh is not None and fresh.version == version:
+            if fresh.locate(start):
+                self._tracks[agent] = fresh
+            else:
+                self.request(agent, start, goal)  # the agent moved off it meanwhile
+
+        track = self._tracks.get(agent)
+        if track is None or track.goal != goal or track.version != version:
+            self.request(agent, start, goal)
+        if track is None or not track.locate(start):
+            return None
+        nxt = track.next_cell()
+        if nxt is None:
+            return None  # unreachable; asked again once the goal or tiles change
+        if world.is_blocked(*nxt):
+            self.request(agent, start, goal)
+            return None
+        return nxt
+
+    # ---------- frame side ----------
+    def run(self, world, budget_ms: Optional[float] = None) -> int:
+        """
+        Work on queued requests until the budget (ms) is used up; returns how
+        many finished. Call once per frame.
+        """
+        t0 = time.perf_counter()
+        if budget_ms is None:
+            budget_ms = self.budget_ms
+        deadline = t0 + budget_ms / 1000.0
+        self.frame += 1
+        pf = self.pathfinder
+        grid = world.grid
+        completed = self.completed
+        if self._inflight:
+            self._collect(grid)
+        soft = pf.avoids_agents(world)  # needs the live occupancy: searched whole, on this thread
+        workers = pf.workers if pf.workers is not None and pf.workers.supports(pf.mode) and not soft else None
+        cap = self.max_inflight or (2 * workers.workers if workers is not None else 0)
+
+        while time.perf_counter() < deadline:
+            if self._job is None:
+                if workers is not None and len(self._inflight) >= cap:
+                    break
+                agent = self._pick()
+                if agent is None:
+                    break
+                req = self._requests.pop(agent)
+                if not (grid.in_bounds(*req.start) and grid.in_bounds(*req.goal)) or \
+                        world.connected(req.start, req.goal) is False:
+                    self._finish(agent, req, None, grid.version)
+                elif workers is not None:
+                    self._inflight[agent] = (req, pf.find_path_async(req.start, req.goal, world, agent))
+                elif pf.mode in SLICEABLE and not soft:
+                    if self._ws is None or len(self._ws.g) != grid.size:
+                        self._ws = Workspace(grid.size)
+                    job = SearchJob(grid, grid.index(*req.start), grid.index(*req.goal),
+                                    pf.mode, pf.heuristic, self._ws, pf.epsilon)
+                    self._job = (agent, req, job)
+                elif pf.mode == "ara":
+                    allowance = max(deadline, t0 + (budget_ms / 1000.0) * (1 << min(req.misses, 6)))
+                    path = pf.find_path(req.start, req.goal, world, agent, deadline=allowance)
+                    if path is None and pf.last_result.bound == INF:
+                        req.misses += 1
+                        self._queue(agent, req)  # out of time before a first path
+                        break
+                    self._finish(agent, req, path, grid.version)
+                else:
+                    path = pf.find_path(req.start, req.goal, world, agent)
+                    self._finish(agent, req, path, grid.version)
+                continue
+
+            agent, req, job = self._job
+            newer = self._requests.get(agent)
+            if job.grid is not grid or job.version != grid.version or \
+                    (newer is not None and newer.goal != req.goal):
+                self._job = None  # outdated half-done search: start over from the queue
+                if newer is None:
+                    self.request(agent, req.start, req.goal)
+                continue
+            if job.step(deadline):
+                self._job = None
+                pf.last_result = job.result
+                pos = grid.pos
+                path = [pos(i) for i in job.result.path] if job.result.path else None
+                self._finish(agent, req, path, job.version)
+            else:
+                self.paused += 1
+                break
+
+        self.last_run_ms = (time.perf_counter() - t0) * 1000.0
+        return self.completed - completed
+
+    def _collect(self, grid) -> None:
+        """Take in finished worker searches, dropping the ones that went stale meanwhile."""
+        for agent, (req, fut) in list(self._inflight.items()):
+            if not fut.done():
+                continue
+            del self._inflight[agent]
+            try:
+                ap = fut.result()
+            except Exception:  # cancelled, or the worker died: plan it again
+                self.dropped += 1
+                if agent not in self._requests:
+                    self.request(agent, req.start, req.goal)
+                continue
+            newer = self._requests.get(agent)
+            if ap.version != grid.version or (newer is not None and newer.goal != req.goal):
+                self.dropped += 1
+                if newer is None:
+                    self.request(agent, req.start, req.goal)
+                continue
+            self.pathfinder.last_result = ap.result
+            self._finish(agent, req, ap.path, ap.version)
+
+    def _pick(self):
+        """The queued agent to plan next (popped from the heap; run() takes its request)."""
+        heap, requests, inflight = self._heap, self._requests, self._inflight
+        waiting = []  # still on the workers: back on the heap afterwards
+        best = None
+        while heap:
+            entry = heapq.heappop(heap)
+            agent = entry[2]()
+            if agent is None or requests.get(agent) is not entry[3] or entry[3].entry is not entry:
+                continue  # gone, served or forgotten, or re-pushed since
+            if agent in inflight:
+                waiting.append(entry)
+                continue
+            best = agent
+            break
+        for entry in waiting:
+            heapq.heappush(heap, entry)
+        return best
+
+    def _finish(self, agent, req: _Request, path: Optional[List[GridPos]], version: int) -> None:
+        self._fresh[agent] = _Track(path, req.goal, version)
+        self.completed += 1
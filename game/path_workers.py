@@ -0,0 +1,134 @@
+# game/path_workers.py
+"""
+Worker pool for Pathfinder.find_path_async(): searches run off the main
+thread and come back as concurrent.futures Futures of AsyncPath.
+
+    workers = PathWorkers("process", 2)     # or "thread"
+    pf = Pathfinder("astar", workers=workers)
+    fut = pf.find_path_async(start, goal, world)
+    ...
+    ap = fut.result()
+    if ap.is_current(world, goal): use(ap.path)
+
+Workers never get the grid pickled with a request. For each grid version
+the walls are published once: thread workers share a read-only Grid
+snapshot, process workers attach a multiprocessing.shared_memory block by
+name and build their own Grid from it once. Tile edits after a submit make
+the answer stale, which AsyncPath.is_current() reports.
+
+Only the stateless ai/search.py modes run in workers; Pathfinder answers
+"flow", "incremental" and "hpa" on the calling thread.
+"""
+import weakref
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+from ai.grid import Grid
+from ai.search import EPSILON, MODES, SearchResult, search
+
+GridPos = Tuple[int, int]
+
+KINDS = ("thread", "process")
+RETIRED_SEGMENTS = 4  # old grid versions kept mapped for searches still queued
+
+
+@dataclass
+class AsyncPath:
+    path: Optional[List[GridPos]]
+    result: SearchResult
+    start: GridPos
+    goal: GridPos
+    version: int  # grid version the search ran on
+
+    def is_current(self, world, goal: Optional[GridPos] = None) -> bool:
+        """False if the tiles changed since, or the goal moved away from this answer."""
+        return self.version == world.grid.version and (goal is None or goal == self.goal)
+
+
+def _run(grid: Grid, version: int, mode: str, heuristic: str,
+         start: GridPos, goal: GridPos, epsilon: float = EPSILON) -> AsyncPath:
+    res = search(mode, grid, grid.index(*start), grid.index(*goal), heuristic, epsilon)
+    path = [grid.pos(i) for i in res.path] if res.path is not None else None
+    return AsyncPath(path, res, start, goal, version)
+
+
+# ---------- process side ----------
+_attached: dict = {}  # worker process: segment name -> Grid built from it
+
+
+def _run_shared(name: str, width: int, height: int, version: int, mode: str, heuristic: str,
+                start: GridPos, goal: GridPos, epsilon: float = EPSILON) -> AsyncPath:
+    grid = _attached.get(name)
+    if grid is None:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            size = (width + 2) * (height + 2)
+            grid = Grid(width, height, None, walls=shm.buf[:size])
+        finally:
+            shm.close()  # the Grid holds its own copy; the parent unlinks the block
+        _attached.clear()  # one grid version at a time per worker
+        _attached[name] = grid
+    return _run(grid, version, mode, heuristic, start, goal, epsilon)
+
+
+def _release(segments) -> None:
+    for shm in segments:
+        try:
+            shm.close()
+            shm.unlink()
+        except (OSError, BufferError):
+            pass
+    segments.clear()
+
+
+# ---------- pool ----------
+class PathWorkers:
+    def __init__(self, kind: str = "thread", workers: int = 2):
+        if kind not in KINDS:
+            raise ValueError(f"unknown worker kind {kind!r}, expected one of {KINDS}")
+        self.kind = kind
+        self.workers = workers
+        if kind == "thread":
+            self._pool = ThreadPoolExecutor(workers, thread_name_prefix="path-worker")
+        else:
+            self._pool = ProcessPoolExecutor(workers)
+        self._snapshots = weakref.WeakKeyDictionary()  # grid -> (version, Grid or segment name)
+        self._segments = deque()                       # live shared blocks, newest last
+        self._finalizer = weakref.finalize(self, _release, self._segments)
+        self.submitted = 0
+
+    def supports(self, mode: str) -> bool:
+        return mode in MODES
+
+    def submit(self, grid: Grid, mode: str, heuristic: str, start: GridPos, goal: GridPos,
+               epsilon: float = EPSILON) -> "Future[AsyncPath]":
+        self.submitted += 1
+        snap = self._publish(grid)
+        if self.kind == "thread":
+            return self._pool.submit(_run, snap, grid.version, mode, heuristic, start, goal, epsilon)
+        return self._pool.submit(_run_shared, snap, grid.w, grid.h, grid.version,
+                                 mode, heuristic, start, goal, epsilon)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._finalizer()
+
+    def _publish(self, grid: Grid):
+        """The read-only copy of 'grid' at its current version, made once per version."""
+        entry = self._snapshots.get(grid)
+        if entry is not None and entry[0] == grid.version:
+            return entry[1]
+        if self.kind == "thread":
+            snap = Grid(grid.w, grid.h, None, walls=grid.walls)
+        else:
+            shm = shared_memory.SharedMemory(create=True, size=grid.size)
+            shm.buf[:grid.size] = grid.walls
+            self._segments.append(shm)
+            while len(self._segments) > RETIRED_SEGMENTS:
+                _release([self._segments.popleft()])
+            snap = shm.name
+        self._snapshots[grid] = (grid.version, snap)
+        return snap
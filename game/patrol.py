@@ -0,0 +1,114 @@
+# game/patrol.py
+"""
+Patrol routes from EnemySpawn.patrol, built once per level load.
+
+A route is the closed loop through its waypoints: the A* paths between
+consecutive waypoints (last back to first) joined into one array of cell
+indices, plus a reverse distance map (one multi-source BFS from every loop
+cell) that leads from anywhere back to the nearest point on the loop.
+Segment paths are cached per level, and enemies with the same waypoint list
+share one PatrolRoute, so a level with many guards on a few routes pays for
+a few searches at load and none while they walk.
+
+Enemies only search again when they break off to chase the player (in
+line of sight within CHASE_RADIUS); once the player is LOSE_RADIUS away they walk back down the
+return map and pick the loop up where they meet it.
+"""
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ai.flowfield import UNREACHED, FlowField
+from ai.search import search
+
+GridPos = Tuple[int, int]
+
+CHASE_RADIUS = 5  # tiles within which a patrolling enemy that sees the player chases
+LOSE_RADIUS = 8   # ... and at which it gives up and returns to its loop
+
+
+class PatrolRoute:
+    def __init__(self, routes: "PatrolRoutes", waypoints: Sequence[GridPos]):
+        self._routes = routes
+        self.grid = routes.world.grid
+        self.waypoints = tuple(waypoints)
+        self._build()
+
+    def _build(self) -> None:
+        grid = self.grid
+        self.version = grid.version
+        marks = [grid.index(*p) for p in self.waypoints if grid.in_bounds(*p)]
+        loop = array("i")
+        for a, b in zip(marks, marks[1:] + marks[:1]):
+            seg = self._routes.segment(a, b)
+            if seg is None:
+                loop = array("i")  # a waypoint can't be reached: no loop, enemies stay put
+                break
+            loop.extend(seg[:-1])  # b starts the next segment
+        if not loop and len(marks) == 1 and not grid.walls[marks[0]]:
+            loop.append(marks[0])  # a single waypoint: stand guard there
+        self.cells = loop
+        self.index_of: Dict[int, int] = {}
+        for i, c in enumerate(loop):
+            self.index_of.setdefault(c, i)
+        self.home = FlowField(grid)
+        self.home.build_many(loop)
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def follow(self, pos: GridPos, i: int) -> Tuple[Optional[GridPos], int]:
+        """
+        Next cell for an enemy on 'pos' that was at loop index 'i' (-1: off
+        the loop), and its new index. Off the loop it heads back first.
+        None if the loop is empty or out of reach.
+        """
+        if self.version != self.grid.version:
+            self._build()  # tiles changed under the loop
+        if not self.cells:
+            return None, -1
+        grid = self.grid
+        c = grid.index(*pos)
+        if i < 0 or i >= len(self.cells) or self.cells[i] != c:
+            i = self.index_of.get(c, -1)
+        if i >= 0:
+            i = (i + 1) % len(self.cells)
+            return grid.pos(self.cells[i]), i
+        if self.home.distance(c) == UNREACHED:
+            return None, -1
+        return grid.pos(self.home.next_cell(c)), -1
+
+
+class PatrolRoutes:
+    """The patrol routes of one World, one per distinct waypoint list."""
+    def __init__(self, world):
+        self.world = world
+        self._routes: Dict[Tuple[GridPos, ...], PatrolRoute] = {}
+        self._segments: Dict[Tuple[int, int], Optional[List[int]]] = {}
+        self._version = world.grid.version  # the segments' grid version
+        self.searches = 0  # segment searches run so far
+
+    def route(self, waypoints: Sequence[GridPos]) -> Optional[PatrolRoute]:
+        if not waypoints:
+            return None
+        key = tuple(tuple(p) for p in waypoints)
+        r = self._routes.get(key)
+        if r is None:
+            r = self._routes[key] = PatrolRoute(self, key)
+        return r
+
+    def segment(self, a: int, b: int) -> Optional[List[int]]:
+        """Cells of a shortest path a -> b, searched once per level (and per direction pair)."""
+        if self._version != self.world.grid.version:
+            self._segments.clear()
+            self._version = self.world.grid.version
+        segments = self._segments
+        if (a, b) in segments:
+            return segments[(a, b)]  # None too: unreachable pairs are cached as well
+        if (b, a) in segments:
+            back = segments[(b, a)]
+            seg = back[::-1] if back is not None else None
+        else:
+            self.searches += 1
+            seg = search("astar", self.world.grid, a, b).path
+        segments[(a, b)] = seg
+        return seg
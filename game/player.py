@@ -1,39 +1,43 @@
 # game/player.py
-import os
-import pygame
 from typing import Tuple
 from .world import TILE
+from . import asset_cache
+
+try:
+    import pygame
+except ImportError:  # headless runs (game/sim.py) don't need it
+    pygame = None
 
 COOKIE_FALLBACK = (230, 160, 90)   # fallback color if image missing
 OUTLINE = (90, 50, 30)
 
 class Player:
+    SPRITE = ("cookie.png", (TILE - 6, TILE - 6))  # slightly smaller than a tile to leave padding
+
     def __init__(self, start_grid: Tuple[int, int]):
         self.gx, self.gy = start_grid  # grid coordinates (integers)
-
-        # Try to load cookie sprite (game/assets/cookie.png)
         self.sprite = None
-        try:
-            here = os.path.dirname(__file__)
-            img_path = os.path.join(here, "assets", "cookie.png")
-            if os.path.exists(img_path):
-                img = pygame.image.load(img_path).convert_alpha()
-                # scale slightly smaller than a tile to leave padding
-                self.sprite = pygame.transform.smoothscale(img, (TILE - 6, TILE - 6))
-        except Exception:
-            self.sprite = None
+        self._sprite_tried = False  # sprite is fetched on first draw, never headless
+
+    def _load_sprite(self):
+        # cookie sprite (game/assets/cookie.png), shared by every Player
+        self._sprite_tried = True
+        self.sprite = asset_cache.image(*self.SPRITE)
 
     def grid_pos(self) -> Tuple[int, int]:
         return (self.gx, self.gy)
 
-    def try_move(self, dx: int, dy: int, world) -> None:
+    def try_move(self, dx: int, dy: int, world) -> bool:
         """
         Attempt to move exactly one tile in (dx, dy).
-        Only moves if target is inside bounds and not a wall.
+        Only moves if target is inside bounds and not a wall. Returns True if it moved.
         """
         nx, ny = self.gx + dx, self.gy + dy
         if not world.is_blocked(nx, ny):
             self.gx, self.gy = nx, ny
+            world.occupancy.move(self, (nx, ny))
+            return True
+        return False
 
     def update(self, dt: float, world, input_dir: Tuple[int, int]) -> None:
         """
@@ -42,12 +46,17 @@ class Player:
         """
         return
 
-    def draw(self, surf: pygame.Surface, world, offset=(0, 0)) -> None:
-        px, py = world.pix_from_grid(self.gx, self.gy, offset)
-        if self.sprite:
-            rect = self.sprite.get_rect(center=(px, py))
-            surf.blit(self.sprite, rect)
+    def draw(self, surf, world, offset=(0, 0), tile=TILE) -> None:
+        if not self._sprite_tried:
+            self._load_sprite()
+        px, py = world.pix_from_grid(self.gx, self.gy, offset, tile)
+        sprite = self.sprite
+        if sprite and tile != TILE:
+            sprite = asset_cache.image(self.SPRITE[0], (tile - 6, tile - 6))  # zoomed, cached per size
+        if sprite:
+            rect = sprite.get_rect(center=(px, py))
+            surf.blit(sprite, rect)
         else:
             # fallback cookie-looking circle
-            pygame.draw.circle(surf, COOKIE_FALLBACK, (px, py), TILE // 2 - 6)
-            pygame.draw.circle(surf, OUTLINE, (px, py), TILE // 2 - 6, 2)
\ No newline at end of file
+            pygame.draw.circle(surf, COOKIE_FALLBACK, (px, py), tile // 2 - 6)
+            pygame.draw.circle(surf, OUTLINE, (px, py), tile // 2 - 6, 2)
\ No newline at end of file
@@ -0,0 +1,107 @@
+# game/profiler.py
+"""
+Per-phase frame timings for Game.run, cheap enough to leave on.
+
+    t = prof.start()
+    ... draw the world ...
+    t = prof.stop("world", t)      # adds perf_counter_ns() - t to this frame
+    ... draw the entities ...      # and returns the clock, for the next phase
+    prof.stop("entities", t)
+    prof.end_frame()               # files the frame into the ring buffers
+
+Each phase keeps the last HISTORY frames in an array("q") ring of
+nanoseconds, plus a "total" ring of the per-frame sums; percentiles() sorts
+a copy of the filled part when asked (the HUD asks a few times a second),
+so recording is two clock reads and an add. dump() writes the frames still
+in the rings, oldest first, as CSV or JSON (by file extension), in ms.
+"""
+import csv
+import json
+import time
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+PHASES = ("events", "update", "pathfinding", "background", "world", "entities", "panel", "flip")
+HISTORY = 600  # frames kept per phase (10 s at 60 fps)
+QUANTILES = (0.50, 0.95, 0.99)
+
+
+class FrameProfiler:
+    def __init__(self, phases: Sequence[str] = PHASES, history: int = HISTORY):
+        self.phases = tuple(phases)
+        self.history = history
+        self.rings: Dict[str, array] = {p: array("q", [0]) * history
+                                        for p in self.phases + ("total",)}
+        self.frames = 0  # frames recorded so far
+        self._now = dict.fromkeys(self.phases, 0)  # ns spent in each phase this frame
+
+    # ---------- recording ----------
+    start = staticmethod(time.perf_counter_ns)
+
+    def stop(self, phase: str, t0: int) -> int:
+        now = time.perf_counter_ns()
+        self._now[phase] += now - t0
+        return now
+
+    def add(self, phase: str, ns: int) -> None:
+        """Time measured elsewhere (e.g. by Simulation.tick) counted towards 'phase'."""
+        self._now[phase] += ns
+
+    def end_frame(self) -> None:
+        slot = self.frames % self.history
+        now, rings = self._now, self.rings
+        total = 0
+        for p in self.phases:
+            ns = now[p]
+            rings[p][slot] = ns
+            total += ns
+            now[p] = 0
+        rings["total"][slot] = total
+        self.frames += 1
+
+    # ---------- reading ----------
+    def __len__(self) -> int:
+        return min(self.frames, self.history)
+
+    def _window(self, ring: array) -> List[int]:
+        """The filled part of a ring, oldest frame first."""
+        n = len(self)
+        if self.frames <= self.history:
+            return list(ring[:n])
+        slot = self.frames % self.history
+        return list(ring[slot:]) + list(ring[:slot])
+
+    def percentiles(self, phase: str, qs: Sequence[float] = QUANTILES) -> Tuple[float, ...]:
+        """Rolling percentiles of 'phase' (or "total") in ms, nearest rank."""
+        values = sorted(self._window(self.rings[phase]))
+        if not values:
+            return tuple(0.0 for _ in qs)
+        last = len(values) - 1
+        return tuple(values[min(last, int(q * len(values)))] / 1e6 for q in qs)
+
+    def summary(self) -> List[Tuple[str, float, float, float]]:
+        """(phase, p50, p95, p99) in ms for every phase, then "total"."""
+        return [(p,) + self.percentiles(p) for p in self.phases + ("total",)]
+
+    def dump(self, path: str) -> int:
+        """Write the frames in the rings to 'path' (.json, else CSV); returns how many."""
+        names = self.phases + ("total",)
+        columns = [self._window(self.rings[p]) for p in names]
+        first = self.frames - len(self)
+        rows = [[first + k] + [col[k] / 1e6 for col in columns] for k in range(len(self))]
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"phases": list(names), "unit": "ms",
+                           "frames": [dict(zip(("frame",) + names, r)) for r in rows]}, f)
+        else:
+            with open(path, "w", newline="") as f:
+                out = csv.writer(f)
+                out.writerow(("frame",) + names)
+                out.writerows(rows)
+        return len(rows)
+
+    def clear(self) -> None:
+        for ring in self.rings.values():
+            ring[:] = array("q", [0]) * self.history
+        self.frames = 0
+        self._now = dict.fromkeys(self.phases, 0)
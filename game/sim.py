@@ -0,0 +1,136 @@
+# game/sim.py
+"""
+Headless game core: level state, player moves, enemy updates and the
+caught / escaped rules, with no display, sprites or fonts.
+
+Game (main.py) drives one Simulation per session and only adds scenes,
+input and drawing on top; game/headless.py drives it as fast as it can.
+"""
+import time
+from typing import Optional
+
+from . import level_pack
+from .world import World
+from .player import Player
+from .enemy import Enemy
+from .path_api import Pathfinder
+from .path_scheduler import PathScheduler
+from .patrol import PatrolRoutes
+
+PLAYING = "playing"
+CAUGHT = "caught"
+ESCAPED = "escaped"
+
+SIGHT_RADIUS = 7  # tiles the player sees (and explores) around them
+
+
+class Simulation:
+    """
+    With 'budget_ms', enemies plan through a PathScheduler that spends at most
+    that much time on searches per tick; otherwise they search on the spot.
+    A Pathfinder with workers always goes through the scheduler, which hands
+    the searches to the workers and picks the answers up on later ticks.
+    """
+    def __init__(self, pathfinder: Optional[Pathfinder] = None, cluster_size: Optional[int] = None,
+                 budget_ms: Optional[float] = None):
+        self.pathfinder = pathfinder or Pathfinder()
+        self.cluster_size = cluster_size  # passed on to World for HPA* (built on first use)
+        if budget_ms or self.pathfinder.workers is not None:
+            self.scheduler = PathScheduler(self.pathfinder, budget_ms or PathScheduler.DEFAULT_BUDGET_MS)
+        else:
+            self.scheduler = None
+        self.level_index = 0
+        self.level = None
+        self.world = None
+        self.player = None
+        self.enemies = []
+        self.last_path_ns = 0  # time the last tick spent on searches (frame profiler)
+        self.status = PLAYING
+        self.ticks = 0
+
+    # --- level ---
+    def load_level(self, i: int) -> None:
+        self.level_index = i
+        self.load(level_pack.load(i))
+
+    def load(self, lvl) -> None:
+        """Start playing an already parsed Level."""
+        self.level = lvl
+        self.world = World(lvl, cluster_size=self.cluster_size)
+        self.player = Player(lvl.player_start)
+        # patrol loops are planned here, once, and shared by enemies on the same waypoints
+        self.patrols = PatrolRoutes(self.world)
+        self.enemies = [Enemy(e.pos, speed=getattr(e, "speed", 3.0),
+                              route=self.patrols.route(getattr(e, "patrol", None)))
+                        for e in lvl.enemies]
+        occ = self.world.occupancy
+        occ.add(self.player, self.player.grid_pos())
+        for e in self.enemies:
+            occ.add(e, e.grid_pos())
+        self._reveal()
+        self.status = PLAYING
+        self.pathfinder.prepare(self.world)
+        self.pathfinder.on_player_moved(self.player.grid_pos(), self.world)
+        chasers = [e for e in self.enemies if e.chasing]
+        if self.pathfinder.mode == "cooperative" and chasers:
+            # everyone planned together up front, in priority order
+            self.pathfinder.find_paths([e.grid_pos() for e in chasers], self.player.grid_pos(),
+                                       self.world, agents=chasers)
+        if self.scheduler is not None:
+            # first paths get planned before anyone's first step is due
+            self.scheduler.clear()
+            for e in self.enemies:
+                if e.chasing:
+                    self.scheduler.request(e, e.grid_pos(), self.player.grid_pos())
+
+    def restart(self) -> None:
+        self.load_level(self.level_index)
+
+    # --- stepping ---
+    def move_player(self, dx: int, dy: int) -> bool:
+        """
+        One-tile player move (a keypress). Returns True if the player moved.
+        """
+        if self.status != PLAYING:
+            return False
+        moved = self.player.try_move(dx, dy, self.world)
+        if moved:
+            # one shared sweep from the player for all chasers
+            self.pathfinder.on_player_moved(self.player.grid_pos(), self.world)
+            self._reveal()
+        self._check_rules()
+        return moved
+
+    def tick(self, dt: float) -> str:
+        """
+        Advance enemies by dt seconds and apply the rules; returns the status.
+        """
+        if self.status != PLAYING:
+            self.last_path_ns = 0
+            return self.status
+        self.ticks += 1
+        self.pathfinder.advance(dt)
+        ppos = self.player.grid_pos()
+        planner = self.scheduler or self.pathfinder
+        t0 = time.perf_counter_ns()
+        for e in self.enemies:
+            e.update(dt, self.world, ppos, planner)
+        t1 = time.perf_counter_ns()
+        if self.scheduler is not None:
+            self.scheduler.run(self.world)
+            self.last_path_ns = time.perf_counter_ns() - t1
+        else:
+            self.last_path_ns = t1 - t0  # enemies search inline
+        self._check_rules()
+        return self.status
+
+    def _reveal(self) -> None:
+        world = self.world
+        world.explored.reveal(world.visibility.visible(self.player.grid_pos(), SIGHT_RADIUS))
+
+    def _check_rules(self) -> None:
+        ppos = self.player.grid_pos()
+        if self.world.occupancy.counts[self.world.grid.index(*ppos)] > 1:  # someone besides the player
+            self.status = CAUGHT
+        elif ppos == self.world.level.exit_pos:
+            self.status = ESCAPED
@@ -7,27 +7,72 @@ TEXT = (60, 40, 50)
 ACCENT = (255, 170, 60)
 OK = (60, 200, 140)
 
+MINIMAP_BG = (60, 30, 90, 170)        # unexplored: see-through deep purple
+MINIMAP_FLOOR = (255, 225, 235)
+MINIMAP_WALL = (180, 50, 100)
+MINIMAP_PLAYER = (255, 170, 60)
+MINIMAP_ENEMY = (220, 40, 60)
+MINIMAP_MAX = 200  # px, longest side
+
 class UI:
     def __init__(self, screen_w: int, screen_h: int):
         self.font = pygame.font.Font(None, 24)
         self.big = pygame.font.Font(None, 36)
         self.huge = pygame.font.Font(None, 64)
+        self.small = pygame.font.Font(None, 20)
         self.screen_w = screen_w
         self.screen_h = screen_h
         self.panel_w = 320
 
-    def draw_panel(self, surf, level_i, total_levels, mode, heuristic, unlocked_to):
+        # render caches: text by content, the panel by what it shows
+        self._text = {}
+        self._panel = None
+        self._panel_key = None
+        self._minimap = None
+        self._minimap_key = None
+
+    def text(self, txt, fnt, color):
+        """font.render() through a cache keyed by (text, font, color)."""
+        key = (txt, id(fnt), color)
+        s = self._text.get(key)
+        if s is None:
+            s = self._text[key] = fnt.render(txt, True, color)
+        return s
+
+    def draw_panel(self, surf, level_i, total_levels, mode, heuristic, unlocked_to,
+                   profile=None, status=None):
         """
         Draws the right-side control panel. Also draws a small 'Back to Menu' button at the bottom
         and RETURNS its rect so the game can detect clicks.
+        The panel is composited to its own surface and only redrawn when its content
+        or the button hover changes; other frames just blit it.
+        'profile' (FrameProfiler.summary() rows) replaces the controls list
+        with a table of frame timings; 'status' is a one-line notice above
+        the button (e.g. where F4 saved the profile).
         """
         x = self.screen_w - self.panel_w + 10
         y = 10
         w = self.panel_w - 20
         h = self.screen_h - 20
+        btn_w, btn_h = w - 28, 46
+        btn_rect = pygame.Rect(x + 14, y + h - btn_h - 14, btn_w, btn_h)
+        hover = btn_rect.collidepoint(pygame.mouse.get_pos())
+
+        key = (level_i, total_levels, mode, heuristic, unlocked_to, hover, profile, status)
+        if key != self._panel_key:
+            self._panel = self._render_panel(w, h, btn_rect.move(-x, -y), *key)
+            self._panel_key = key
+        surf.blit(self._panel, (x, y))
+        return btn_rect
+
+    def _render_panel(self, w, h, btn_rect, level_i, total_levels, mode, heuristic,
+                      unlocked_to, hover, profile, status):
+        # reach to the screen edge: the title overhangs the panel a little
+        panel = pygame.Surface((self.panel_w - 10, h), pygame.SRCALPHA)
+        x, y = 0, 0
         rect = pygame.Rect(x, y, w, h)
-        pygame.draw.rect(surf, PANEL_BG, rect, border_radius=16)
-        pygame.draw.rect(surf, PANEL_STROKE, rect, 3, border_radius=16)
+        pygame.draw.rect(panel, PANEL_BG, rect, border_radius=16)
+        pygame.draw.rect(panel, PANEL_STROKE, rect, 3, border_radius=16)
 
         lines = [
             ("COOKIE RUN: DUNGEON", self.big, ACCENT),
@@ -36,52 +81,116 @@ class UI:
             ("", self.font, TEXT),
             ("Mode (toggle):", self.font, TEXT),
             ("[G] Greedy  |  [A] A*", self.font, TEXT),
+            ("[F] Flow field  |  [I] D* Lite", self.font, TEXT),
+            ("[J] Jump Points  |  [C] HPA*", self.font, TEXT),
+            ("[E] Weighted A*  |  [Y] ARA*", self.font, TEXT),
+            ("[O] Cooperative (WHCA*)", self.font, TEXT),
             (f"Current: {mode.upper()}", self.font, ACCENT),
             ("", self.font, TEXT),
             ("Heuristic:", self.font, TEXT),
             ("[1] Manhattan  [2] Euclidean", self.font, TEXT),
+            ("[3] Landmarks  [4] Differential", self.font, TEXT),
             (f"Current: {heuristic}", self.font, ACCENT),
             ("", self.font, TEXT),
-            ("Controls:", self.font, TEXT),
-            ("Arrows/WASD: Move", self.font, TEXT),
-            ("N: Next unlocked level", self.font, TEXT),
-            ("R: Restart level", self.font, TEXT),
-            ("ENTER: Confirm / Continue", self.font, TEXT),
         ]
+        if profile is None:
+            lines += [
+                ("Controls:", self.font, TEXT),
+                ("Arrows/WASD: Move", self.font, TEXT),
+                ("N: Next unlocked level", self.font, TEXT),
+                ("R: Restart level", self.font, TEXT),
+                ("M: Minimap  |  +/-: Zoom", self.font, TEXT),
+                ("H: Search replay  |  [ ]: Speed", self.font, TEXT),
+                ("F3: Profiler  |  F4: Dump", self.font, TEXT),
+                ("ENTER: Confirm / Continue", self.font, TEXT),
+            ]
+        else:
+            lines.append(("Frame time (ms):", self.font, TEXT))
         ty = y + 16
         for txt, fnt, col in lines:
             if txt == "":
                 ty += 6
                 continue
-            surf.blit(fnt.render(txt, True, col), (x + 14, ty))
+            panel.blit(self.text(txt, fnt, col), (x + 14, ty))
             ty += fnt.get_height() + 6
+        if profile is not None:
+            self._render_profile(panel, x + 14, ty, profile)
+        if status:
+            img = self.small.render(status, True, OK)
+            panel.blit(img, (x + 14, btn_rect.y - img.get_height() - 8))
 
         # Small “Back to Menu” button at the bottom of the panel
-        btn_w, btn_h = w - 28, 46
-        btn_rect = pygame.Rect(x + 14, y + h - btn_h - 14, btn_w, btn_h)
-        mouse = pygame.mouse.get_pos()
-        hover = btn_rect.collidepoint(mouse)
         base = (255, 160, 90)
         edge = (220, 120, 70)
         glow = (255, 200, 150) if hover else (255, 180, 130)
-        pygame.draw.rect(surf, base, btn_rect, border_radius=14)
-        pygame.draw.rect(surf, edge, btn_rect, 3, border_radius=14)
+        pygame.draw.rect(panel, base, btn_rect, border_radius=14)
+        pygame.draw.rect(panel, edge, btn_rect, 3, border_radius=14)
         hi = pygame.Rect(btn_rect.x + 8, btn_rect.y + 8, btn_rect.w - 16, btn_rect.h // 3)
-        pygame.draw.rect(surf, glow, hi, border_radius=10)
-        label = self.big.render("Back to Menu", True, (255, 255, 255))
-        surf.blit(label, label.get_rect(center=btn_rect.center))
-        return btn_rect
+        pygame.draw.rect(panel, glow, hi, border_radius=10)
+        label = self.text("Back to Menu", self.big, (255, 255, 255))
+        panel.blit(label, label.get_rect(center=btn_rect.center))
+        return panel
+
+    def _render_profile(self, panel, x, y, profile):
+        # phase name then right-aligned p50/p95/p99 columns; the numbers change
+        # every refresh, so they skip the text cache
+        fnt = self.small
+        cols = (x + 150, x + 200, x + 250)  # right edges
+        for name, vals, col in [("", ("p50", "p95", "p99"), TEXT)] + [
+                (p, tuple(f"{v:.2f}" for v in qs), ACCENT if p == "total" else TEXT)
+                for p, *qs in profile]:
+            panel.blit(fnt.render(name, True, col), (x, y))
+            for right, v in zip(cols, vals):
+                img = fnt.render(v, True, col)
+                panel.blit(img, (right - img.get_width(), y))
+            y += fnt.get_height() + 2
+        panel.blit(self.text("F3: Hide  |  F4: CSV  |  Shift+F4: JSON", fnt, OK), (x, y + 4))
+
+    def draw_minimap(self, surf, world, player_pos, enemies, sight, bottomright):
+        """
+        Explored cells of 'world' scaled down, with the player and the enemies
+        inside 'sight' (the player's FOV, cell indices). The explored map is
+        kept on its own surface and only the newly explored cells get painted
+        (world.explored.take_fresh()). Returns the rect drawn.
+        """
+        grid, explored = world.grid, world.explored
+        cell = max(1, min(10, MINIMAP_MAX // max(grid.w, grid.h)))
+        key = (id(explored), grid.version)
+        if key != self._minimap_key:
+            self._minimap = pygame.Surface((grid.w * cell, grid.h * cell), pygame.SRCALPHA)
+            self._minimap.fill(MINIMAP_BG)
+            self._minimap_key = key
+            explored.take_fresh()
+            fresh = [i for i in range(grid.size) if i in explored]
+        else:
+            fresh = explored.take_fresh()
+        mm, walls = self._minimap, grid.walls
+        for i in fresh:
+            x, y = grid.pos(i)
+            mm.fill(MINIMAP_WALL if walls[i] else MINIMAP_FLOOR, (x * cell, y * cell, cell, cell))
+
+        rect = mm.get_rect(bottomright=bottomright)
+        surf.blit(mm, rect)
+        pygame.draw.rect(surf, PANEL_STROKE, rect.inflate(4, 4), 2)
+        dot = max(2, cell)
+        for e in enemies:
+            ex, ey = e.grid_pos()
+            if grid.index(ex, ey) in sight:
+                surf.fill(MINIMAP_ENEMY, (rect.x + ex * cell, rect.y + ey * cell, dot, dot))
+        px, py = player_pos
+        surf.fill(MINIMAP_PLAYER, (rect.x + px * cell, rect.y + py * cell, dot, dot))
+        return rect.inflate(4, 4)
 
     def draw_banner(self, surf, text, color):
-        s = self.big.render(text, True, color)
+        s = self.text(text, self.big, color)
         surf.blit(s, s.get_rect(center=(self.screen_w // 2, 28)))
 
     def draw_title(self, surf, text, color, y=160):
-        s = self.huge.render(text, True, color)
+        s = self.text(text, self.huge, color)
         surf.blit(s, s.get_rect(center=(self.screen_w // 2, y)))
 
     def draw_subtitle(self, surf, text, color, y=220):
-        s = self.big.render(text, True, color)
+        s = self.text(text, self.big, color)
         surf.blit(s, s.get_rect(center=(self.screen_w // 2, y)))
 
     def draw_button(self, surf, label, center_xy, enabled=True):
@@ -89,7 +198,7 @@ class UI:
         Big rounded candy-style button (used on main menu and congratulations screen).
         Returns its rect for click detection.
         """
-        text_surf = self.huge.render(label, True, (255, 255, 255))
+        text_surf = self.text(label, self.huge, (255, 255, 255))
         pad_x, pad_y = 32, 16
         w = text_surf.get_width() + pad_x * 2
         h = text_surf.get_height() + pad_y * 2
@@ -1,6 +1,16 @@
 # game/world.py
-import pygame
-from typing import List, Tuple
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from ai.grid import Grid
+from ai.hpa import HPAGraph
+from ai.visibility import Explored, Visibility
+from .occupancy import Occupancy
+
+try:
+    import pygame
+except ImportError:  # headless runs (game/sim.py) only use the grid side of World
+    pygame = None
 
 GridPos = Tuple[int, int]
 
@@ -17,47 +27,100 @@ EXIT_BORDER       = (160, 90, 200)    # bold purple outline
 EXIT_TEXT         = (255, 255, 255)   # white text on exit
 
 TILE = 48  # tile size (px)
+BOARD_MARGIN = 24  # room around the tiles for the frame, shadow and badge overhang
+CHUNK = 16         # tiles per side of a pre-rendered board piece
+CHUNK_CACHE = 96   # chunk surfaces kept, over all zoom levels
+
+_BADGE_FONT = None
+_BADGE_TEXT = None
 
 class World:
     """
     tiles[y][x] == 1 -> wall, 0 -> floor
+    Collision and pathfinding go through self.grid (ai/grid.py), which is
+    built once here; use set_tile() to change a tile so both stay in sync.
+    With 'cluster_size', self.hpa is the HPA* abstraction (ai/hpa.py) at that
+    cluster size, built the first time something asks for it.
+    Levels from the compiled pack (game/level_pack.py) carry their analysis,
+    which answers connected() in O(1) until the first tile edit.
+    self.occupancy (game/occupancy.py) indexes the entities by cell; they
+    keep it current themselves as they move. self.visibility answers cached
+    FOV/LOS queries and self.explored remembers what the player has seen
+    (ai/visibility.py).
     """
-    def __init__(self, level):
+    def __init__(self, level, cluster_size: Optional[int] = None):
         self.level = level
         self.w = level.width
         self.h = level.height
         self.tiles = level.tiles
+        self.analysis = getattr(level, "analysis", None)
+        walls = self.analysis.walls if self.analysis is not None else None
+        self.grid = Grid(self.w, self.h, self.tiles, walls=walls)
+        self.cluster_size = cluster_size
+        self._hpa: Optional[HPAGraph] = None
+        self.occupancy = Occupancy(self.grid)
+        self.visibility = Visibility(self.grid)
+        self.explored = Explored(self.grid)
 
         # precompute a board rect (centered with a small border)
         self.board_pad = 16
+        self._chunks = OrderedDict()  # (cx, cy, tile) -> rendered chunk, see draw()
+        self._chunks_version = self.grid.version
+
+    @property
+    def hpa(self) -> Optional[HPAGraph]:
+        """HPA* abstraction at cluster_size, built on first use (None without one)."""
+        if self._hpa is None and self.cluster_size:
+            self._hpa = HPAGraph(self.grid, self.cluster_size)
+        return self._hpa
+
+    @property
+    def version(self) -> int:
+        """Bumped by every set_tile(); caches built on the grid compare against it."""
+        return self.grid.version
 
     def is_blocked(self, x: int, y: int) -> bool:
-        if x < 0 or y < 0 or x >= self.w or y >= self.h:
-            return True
-        return self.tiles[y][x] == 1
+        return self.grid.is_blocked(x, y)
 
-    def pix_from_grid(self, gx: int, gy: int, offset=(0,0)) -> Tuple[int,int]:
+    def connected(self, a: GridPos, b: GridPos) -> Optional[bool]:
+        """
+        Whether a can reach b, from the baked component labels; None when
+        unknown (no analysis, or tiles changed since the level was loaded).
+        """
+        if self.analysis is None or self.grid.version != 0:
+            return None
+        return self.analysis.connected(a, b)
+
+    def set_tile(self, x: int, y: int, value: int) -> None:
+        self.tiles[y][x] = value
+        self.grid.set_wall(x, y, value == 1)
+
+    def pix_from_grid(self, gx: int, gy: int, offset=(0,0), tile=TILE) -> Tuple[int,int]:
         ox, oy = offset
-        return ox + gx*TILE + TILE//2, oy + gy*TILE + TILE//2
+        return ox + gx*tile + tile//2, oy + gy*tile + tile//2
 
     def neighbors_4(self, x: int, y: int) -> List[GridPos]:
-        out = []
-        for dx, dy in ((1,0),(-1,0),(0,1),(0,-1)):
-            nx, ny = x+dx, y+dy
-            if not self.is_blocked(nx, ny):
-                out.append((nx, ny))
-        return out
+        g = self.grid
+        if not g.in_bounds(x, y):
+            return []
+        i = g.index(x, y)
+        return [(x + dx, y + dy) for dx, dy in g.open_dirs(i)]
 
     # ---------- drawing ----------
-    def _board_rect(self, offset):
+    # The tiles are rendered in CHUNK x CHUNK pieces, per zoom, on first sight
+    # and kept in an LRU; a tile edit only re-renders the chunk it's in.
+    # draw() blits the chunks the camera (game/camera.py) sees and draws the
+    # frame and exit badge on top, clipped to the view, or with 'cells'
+    # restores just those tiles for dirty-rect updates.
+    def _board_rect(self, offset, tile=TILE):
         ox, oy = offset
-        wpx = self.w * TILE
-        hpx = self.h * TILE
+        wpx = self.w * tile
+        hpx = self.h * tile
         return pygame.Rect(ox - self.board_pad, oy - self.board_pad,
                            wpx + self.board_pad*2, hpx + self.board_pad*2)
 
-    def _draw_frame(self, surf, offset):
-        R = self._board_rect(offset)
+    def _draw_frame(self, surf, offset, tile=TILE):
+        R = self._board_rect(offset, tile)
 
         # outer shadow
         shadow = R.inflate(10, 10)
@@ -69,11 +132,13 @@ class World:
         inner = R.inflate(-8, -8)
         pygame.draw.rect(surf, BOARD_FRAME_INNER, inner, border_radius=14, width=6)
 
-    def _draw_grid(self, surf, offset):
+    def _draw_grid(self, surf, offset, tile=TILE, cells=None):
         ox, oy = offset
-        for y in range(self.h):
-            for x in range(self.w):
-                r = pygame.Rect(ox + x*TILE, oy + y*TILE, TILE, TILE)
+        x0, y0, x1, y1 = cells or (0, 0, self.w, self.h)
+        pad = max(2, tile // 6)
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                r = pygame.Rect(ox + x*tile, oy + y*tile, tile, tile)
 
                 # checker pastel “ice” floor
                 if self.tiles[y][x] == 0:
@@ -81,34 +146,117 @@ class World:
                     pygame.draw.rect(surf, col, r)
                 else:
                     # solid licorice wall with a subtle highlight stripe
-                    bar = r.inflate(-8, -8)   # make it look like a bar inside the cell
-                    pygame.draw.rect(surf, LICORICE, bar, border_radius=6)
+                    bar = r.inflate(-pad, -pad)   # make it look like a bar inside the cell
+                    pygame.draw.rect(surf, LICORICE, bar, border_radius=tile // 8)
                     # highlight
-                    shine = pygame.Rect(bar.x+3, bar.y+3, bar.w-6, 4)
+                    edge = max(1, tile // 16)
+                    shine = pygame.Rect(bar.x+edge, bar.y+edge, bar.w-2*edge, max(2, tile // 12))
                     pygame.draw.rect(surf, LICORICE_SHINE, shine, border_radius=2)
 
                 # fine grid line
                 pygame.draw.rect(surf, (210, 220, 230), r, 1)
 
-    def _draw_exit_badge(self, surf, offset):
-        ox, oy = offset
+    def _badge_rect(self, offset, tile=TILE):
         ex, ey = self.level.exit_pos
-        r = pygame.Rect(ox + ex*TILE, oy + ey*TILE, TILE, TILE)
-
+        r = self.tile_rect(ex, ey, offset, tile)
         # a rounded candy badge that overhangs slightly on the right
-        badge = r.inflate(14, -8).move(10, 0)
+        return r.inflate(tile * 7 // 24, -tile // 6).move(tile * 5 // 24, 0)
+
+    def _draw_exit_badge(self, surf, offset, tile=TILE):
+        badge = self._badge_rect(offset, tile)
         pygame.draw.rect(surf, EXIT_BG, badge, border_radius=14)
         pygame.draw.rect(surf, EXIT_BORDER, badge, 3, border_radius=14)
 
         # EXIT text
-        font = pygame.font.Font(None, 24)
-        s = font.render("EXIT", True, EXIT_TEXT)
+        s = _badge_text()
         surf.blit(s, s.get_rect(center=badge.center))
 
-    def draw(self, surf: pygame.Surface, offset: Tuple[int,int]=(0,0)):
-        # board frame
-        self._draw_frame(surf, offset)
-        # grid + walls
-        self._draw_grid(surf, offset)
-        # exit
-        self._draw_exit_badge(surf, offset)
\ No newline at end of file
+    def _sync_chunks(self):
+        grid = self.grid
+        if self._chunks_version == grid.version:
+            return
+        changed = grid.changes_since(self._chunks_version)
+        self._chunks_version = grid.version
+        if changed is None:
+            self._chunks.clear()
+            return
+        stale = set()
+        for i in changed:
+            x, y = grid.pos(i)
+            stale.add((x // CHUNK, y // CHUNK))
+        for key in [k for k in self._chunks if k[:2] in stale]:
+            del self._chunks[key]
+
+    def _chunk(self, cx: int, cy: int, tile: int):
+        key = (cx, cy, tile)
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+        x0, y0 = cx * CHUNK, cy * CHUNK
+        x1, y1 = min(self.w, x0 + CHUNK), min(self.h, y0 + CHUNK)
+        chunk = pygame.Surface(((x1 - x0) * tile, (y1 - y0) * tile))
+        if pygame.display.get_surface() is not None:
+            chunk = chunk.convert()
+        self._draw_grid(chunk, (-x0 * tile, -y0 * tile), tile, (x0, y0, x1, y1))
+        self._chunks[key] = chunk
+        if len(self._chunks) > CHUNK_CACHE:
+            self._chunks.popitem(last=False)
+        return chunk
+
+    def tile_rect(self, x: int, y: int, offset=(0, 0), tile=TILE):
+        ox, oy = offset
+        return pygame.Rect(ox + x*tile, oy + y*tile, tile, tile)
+
+    def draw(self, surf: "pygame.Surface", camera, cells=None):
+        """
+        Draw the part of the board 'camera' sees. With 'cells' (grid
+        positions), only those tiles are restored, e.g. under entities that
+        moved. Returns the screen rects that were touched, ready for
+        pygame.display.update().
+        """
+        self._sync_chunks()
+        tile, offset = camera.tile, camera.offset
+        ox, oy = offset
+        view = pygame.Rect(camera.view)
+        clip = surf.get_clip()
+        if cells is None:
+            surf.set_clip(view)
+            self._draw_frame(surf, offset, tile)
+            x0, y0, x1, y1 = camera.cells()
+            x0, y0 = max(0, x0), max(0, y0)
+            x1, y1 = min(self.w, x1), min(self.h, y1)
+            span = CHUNK * tile
+            for cy in range(y0 // CHUNK, (y1 - 1) // CHUNK + 1):
+                for cx in range(x0 // CHUNK, (x1 - 1) // CHUNK + 1):
+                    surf.blit(self._chunk(cx, cy, tile), (ox + cx * span, oy + cy * span))
+            self._draw_exit_badge(surf, offset, tile)
+            surf.set_clip(clip)
+            return [view]
+        rects = []
+        badge = self._badge_rect(offset, tile)
+        for x, y in cells:
+            if not (self.grid.in_bounds(x, y) and camera.sees((x, y))):
+                continue
+            r = self.tile_rect(x, y, offset, tile).clip(view)
+            src = r.move(-ox - (x - x % CHUNK) * tile, -oy - (y - y % CHUNK) * tile)
+            rects.append(surf.blit(self._chunk(x // CHUNK, y // CHUNK, tile), r, src))
+            if r.colliderect(badge):
+                surf.set_clip(r)  # the badge overhangs its tile; put back just this part
+                self._draw_exit_badge(surf, offset, tile)
+                surf.set_clip(clip)
+        return rects
+
+
+def _badge_text():
+    global _BADGE_TEXT
+    if _BADGE_TEXT is None:
+        _BADGE_TEXT = _badge_font().render("EXIT", True, EXIT_TEXT)
+    return _BADGE_TEXT
+
+
+def _badge_font():
+    global _BADGE_FONT
+    if _BADGE_FONT is None:
+        _BADGE_FONT = pygame.font.Font(None, 24)
+    return _BADGE_FONT
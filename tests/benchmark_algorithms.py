@@ -0,0 +1,255 @@
+# tests/benchmark_algorithms.py
+"""
+Pathfinding benchmark over the shipped levels and generated ones.
+
+    python tests/benchmark_algorithms.py                       # table + bench.json
+    python tests/benchmark_algorithms.py --sizes 64 256 --queries 50 --out run.json
+    python tests/benchmark_algorithms.py --compare old.json    # diff p50s against an older run
+
+Every Pathfinder mode (and heuristic, where it matters) answers the same
+fixed, seeded start/goal pairs on each map. Per run it records wall-time
+percentiles, nodes expanded, path length, optimality gap against BFS and
+tracemalloc peak memory. The path cache is off so every query really
+searches. The first query of a mode is a warm-up (JPS tables, HPA* clusters)
+and is reported as prep_ms, not in the timings.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from ai.search import search                                 # noqa: E402
+from game import generator                                    # noqa: E402
+from game.level_loader import Level, load_level               # noqa: E402
+from game.path_api import Pathfinder                          # noqa: E402
+from game.world import World                                  # noqa: E402
+
+HEURISTIC_MODES = ("greedy", "astar", "jps", "weighted", "ara", "incremental")
+HEURISTICS = ("manhattan", "euclidean", "alt", "differential")
+
+
+# ---------- maps ----------
+def load_maps(sizes, kinds, seed):
+    maps = []
+    levels_dir = os.path.join(os.path.dirname(HERE), "game", "levels")
+    for path in sorted(glob.glob(os.path.join(levels_dir, "level*.json"))):
+        maps.append((os.path.splitext(os.path.basename(path))[0], load_level(path)))
+    for kind in kinds:
+        for size in sizes:
+            maps.append((f"{kind}{size}", generator.generate(kind, size, size, seed)))
+    return maps
+
+
+def query_pairs(level: Level, world: World, n: int, seed: int):
+    """Spawn -> exit and enemy -> spawn first, then seeded random floor pairs."""
+    pairs = [(level.player_start, level.exit_pos)]
+    pairs += [(e.pos, level.player_start) for e in level.enemies]
+    free = [(x, y) for y in range(level.height) for x in range(level.width)
+            if not world.is_blocked(x, y)]
+    rnd = random.Random(seed)
+    while len(pairs) < n and len(free) > 1:
+        pairs.append((rnd.choice(free), rnd.choice(free)))
+    return pairs[:n]
+
+
+# ---------- measuring ----------
+def percentile(sorted_vals, q: float) -> float:
+    if not sorted_vals:
+        return float("nan")
+    k = (len(sorted_vals) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def optimal_lengths(world: World, pairs):
+    grid = world.grid
+    out = []
+    for a, b in pairs:
+        res = search("bfs", grid, grid.index(*a), grid.index(*b))
+        out.append(res.cost if res.path else None)
+    return out
+
+
+def bench_mode(world: World, pairs, optimal, mode: str, heuristic: str) -> dict:
+    pf = Pathfinder(mode, heuristic, cache_size=0)
+
+    t0 = time.perf_counter()
+    pf.find_path(pairs[0][0], pairs[0][1], world)
+    prep_ms = (time.perf_counter() - t0) * 1000.0
+
+    times, expanded, lengths, gaps = [], [], [], []
+    mismatches = 0
+    for (a, b), best in zip(pairs, optimal):
+        t0 = time.perf_counter()
+        path = pf.find_path(a, b, world)
+        times.append((time.perf_counter() - t0) * 1000.0)
+        expanded.append(pf.last_result.expanded if pf.last_result else 0)
+        if (path is None) != (best is None):
+            mismatches += 1
+        elif path is not None:
+            lengths.append(len(path) - 1)
+            gaps.append((len(path) - 1) / best - 1.0 if best else 0.0)
+
+    # second pass under tracemalloc: it slows everything down, so no timings here
+    pf = Pathfinder(mode, heuristic, cache_size=0)
+    tracemalloc.start()
+    for a, b in pairs:
+        pf.find_path(a, b, world)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times.sort()
+    return {
+        "mode": mode,
+        "heuristic": heuristic if mode in HEURISTIC_MODES else "-",
+        "queries": len(pairs),
+        "prep_ms": prep_ms,
+        "p50_ms": percentile(times, 0.50),
+        "p90_ms": percentile(times, 0.90),
+        "p99_ms": percentile(times, 0.99),
+        "max_ms": times[-1] if times else float("nan"),
+        "expanded_mean": sum(expanded) / len(expanded) if expanded else 0,
+        "expanded_total": sum(expanded),
+        "path_len_mean": sum(lengths) / len(lengths) if lengths else 0,
+        "gap_mean": sum(gaps) / len(gaps) if gaps else 0.0,
+        "gap_max": max(gaps) if gaps else 0.0,
+        "reachability_mismatches": mismatches,
+        "peak_kb": peak / 1024.0,
+    }
+
+
+def bench_chase(world: World, level: Level, steps: int, seed: int) -> dict:
+    """
+    Moving-target replans: the goal wanders one tile per step and the chaser
+    follows its path; incremental D* Lite against A* from scratch.
+    """
+    grid = world.grid
+    rnd = random.Random(seed)
+    free = [i for i in range(grid.size) if not grid.walls[i]]
+    start, goal = grid.pos(rnd.choice(free)), grid.pos(rnd.choice(free))
+    inc = Pathfinder("incremental", cache_size=0)
+    full = Pathfinder("astar", cache_size=0)
+    inc_exp = full_exp = 0
+    inc_ms = full_ms = 0.0
+    for i in range(steps):
+        path = inc.find_path(start, goal, world)
+        full.find_path(start, goal, world)
+        if i:  # first plan is a full search for both
+            inc_exp += inc.last_result.expanded
+            full_exp += full.last_result.expanded
+            inc_ms += inc.last_result.elapsed_ms
+            full_ms += full.last_result.elapsed_ms
+        nbrs = world.neighbors_4(*goal)
+        if nbrs:
+            goal = rnd.choice(nbrs)
+        if path and len(path) > 2:
+            start = path[1]
+    return {
+        "steps": steps,
+        "incremental_expanded": inc_exp,
+        "astar_expanded": full_exp,
+        "expanded_ratio": inc_exp / full_exp if full_exp else float("nan"),
+        "incremental_ms": inc_ms,
+        "astar_ms": full_ms,
+    }
+
+
+# ---------- reporting ----------
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def print_table(results) -> None:
+    print(f"{'map':<10} {'mode':<12} {'heur':<9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'expanded':>9} {'len':>6} {'gap':>6} {'peak KB':>8}")
+    for r in results:
+        print(f"{r['map']:<10} {r['mode']:<12} {r['heuristic']:<9} {r['p50_ms']:>8.3f} "
+              f"{r['p99_ms']:>8.3f} {r['expanded_mean']:>9.0f} {r['path_len_mean']:>6.1f} "
+              f"{r['gap_mean']:>6.3f} {r['peak_kb']:>8.0f}")
+
+
+def print_compare(results, old_path: str) -> None:
+    with open(old_path) as f:
+        old = json.load(f)
+    before = {(r["map"], r["mode"], r["heuristic"]): r for r in old["results"]}
+    print(f"\nvs {old_path} ({old['meta'].get('commit', '?')}): p50 ratio new/old")
+    for r in results:
+        o = before.get((r["map"], r["mode"], r["heuristic"]))
+        if o and o["p50_ms"] > 0:
+            print(f"{r['map']:<10} {r['mode']:<12} {r['heuristic']:<9} "
+                  f"{r['p50_ms'] / o['p50_ms']:>6.2f}x  expanded "
+                  f"{o['expanded_mean']:.0f} -> {r['expanded_mean']:.0f}")
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Pathfinding benchmark")
+    ap.add_argument("--sizes", type=int, nargs="*", default=[64, 128, 256],
+                    help="generated grid sizes")
+    ap.add_argument("--kinds", nargs="*", default=["rooms", "caves"], choices=generator.KINDS,
+                    help="generator kinds (game/generator.py)")
+    ap.add_argument("--queries", type=int, default=30, help="start/goal pairs per map")
+    ap.add_argument("--modes", nargs="*", default=list(Pathfinder.MODES))
+    ap.add_argument("--chase-steps", type=int, default=60)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--out", default="bench.json")
+    ap.add_argument("--compare", help="earlier JSON output to compare against")
+    args = ap.parse_args(argv)
+
+    results, chases = [], []
+    for name, level in load_maps(args.sizes, args.kinds, args.seed):
+        world = World(level)
+        pairs = query_pairs(level, world, args.queries, args.seed)
+        optimal = optimal_lengths(world, pairs)
+        for mode in args.modes:
+            for heuristic in (HEURISTICS if mode in HEURISTIC_MODES else HEURISTICS[:1]):
+                row = bench_mode(world, pairs, optimal, mode, heuristic)
+                row["map"] = name
+                row["cells"] = level.width * level.height
+                results.append(row)
+        if args.chase_steps:
+            chase = bench_chase(world, level, args.chase_steps, args.seed)
+            chase["map"] = name
+            chases.append(chase)
+
+    print_table(results)
+    if chases:
+        print(f"\n{'map':<9} {'D* Lite exp':>11} {'A* exp':>9} {'ratio':>6}")
+        for c in chases:
+            print(f"{c['map']:<10} {c['incremental_expanded']:>11} {c['astar_expanded']:>9} "
+                  f"{c['expanded_ratio']:>6.3f}")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+        },
+        "results": results,
+        "chase": chases,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {args.out}")
+    if args.compare:
+        print_compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# tests/test_cooperative.py
+"""
+WHCA* (ai/cooperative.py) with agents stepping at different rates on one
+shared clock: nobody may share a cell on a tick or swap cells head-on.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.cooperative import CooperativePlanner  # noqa: E402
+from ai.grid import Grid                       # noqa: E402
+
+
+def _run(grid, agents, goal, ticks, leave=None):
+    """
+    Tick the planner, stepping each agent every 'period' ticks; returns
+    {tick: {agent: cell}}. 'leave' = (agent, tick_out, tick_back) drops an
+    agent with forget() and lets it rejoin later; while away it's left out
+    of the timeline (nobody plans around it).
+    """
+    planner = CooperativePlanner(grid)
+    pos = {name: grid.index(*start) for name, (start, _) in agents.items()}
+    timeline = {}
+    for tick in range(ticks):
+        moves = {}
+        for name, (_, period) in agents.items():
+            if leave and name == leave[0]:
+                if tick == leave[1]:
+                    planner.forget(name)
+                if leave[1] <= tick < leave[2]:
+                    continue
+            if tick % period == 0:
+                nxt = planner.next_cell(name, pos[name], goal, period)
+                assert nxt is not None
+                moves[name] = (pos[name], nxt)
+        for name, (frm, to) in moves.items():
+            for other, (o_frm, o_to) in moves.items():
+                assert not (other != name and frm != to and o_frm == to and o_to == frm), \
+                    f"{name} and {other} swapped cells on tick {tick}"
+            pos[name] = to
+        away = leave[0] if leave and leave[1] <= tick < leave[2] else None
+        timeline[tick] = {name: c for name, c in pos.items() if name != away}
+        planner.advance()
+    return timeline
+
+
+def _assert_apart(timeline):
+    for tick, cells in timeline.items():
+        assert len(set(cells.values())) == len(cells), f"agents share a cell on tick {tick}: {cells}"
+
+
+def test_different_rates_never_collide():
+    grid = Grid(7, 3, [[0] * 7, [1, 1, 1, 0, 1, 1, 1], [0] * 7])
+    goal = grid.index(3, 1)
+    # both head for the gap in the middle row; the fast one has to cross the
+    # slow one's path while it stands between steps
+    agents = {"fast": ((6, 0), 1), "slow": ((2, 0), 3)}
+    timeline = _run(grid, agents, goal, 60)
+    _assert_apart(timeline)
+    assert goal in timeline[59].values()
+
+
+def test_slow_agent_keeps_its_cell_between_steps():
+    grid = Grid(5, 1, [[0] * 5])
+    goal = grid.index(4, 0)
+    # the slow one stands in the corridor for 4 ticks at a time; the fast one
+    # behind it must not move onto it in between
+    agents = {"slow": ((1, 0), 4), "fast": ((0, 0), 1)}
+    timeline = _run(grid, agents, goal, 40)
+    _assert_apart(timeline)
+
+
+def test_rejoining_agent_plans_on_the_shared_clock():
+    grid = Grid(7, 7, [[0] * 7 for _ in range(7)])
+    goal = grid.index(3, 3)
+    agents = {"a": ((0, 3), 1), "b": ((6, 3), 2), "c": ((3, 1), 3)}
+    timeline = _run(grid, agents, goal, 80, leave=("c", 4, 20))
+    _assert_apart(timeline)
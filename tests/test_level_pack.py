@@ -0,0 +1,72 @@
+# tests/test_level_pack.py
+"""
+level_pack.open_pack() on a copy of the levels: a fresh pack costs one stat
+of the directory, and a compile that failed isn't retried until the
+directory changes.
+
+    python -m pytest tests
+"""
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from game import level_pack  # noqa: E402
+
+
+@pytest.fixture
+def levels(tmp_path, monkeypatch):
+    """A copy of three levels, the module's cached state cleared, and call counters."""
+    for k in (1, 2, 3):
+        shutil.copy(os.path.join(level_pack.LEVELS_DIR, f"level{k:02d}.json"), tmp_path)
+    for name in ("_pack", "_fresh", "_failed"):
+        monkeypatch.setattr(level_pack, name, None)
+    calls = {"is_stale": 0, "compile_pack": 0}
+    for name in calls:
+        def counted(*args, _name=name, _fn=getattr(level_pack, name), **kw):
+            calls[_name] += 1
+            return _fn(*args, **kw)
+        monkeypatch.setattr(level_pack, name, counted)
+    return str(tmp_path), str(tmp_path / "levels.pack"), calls
+
+
+def _bump(path):
+    """Move the mtime forward: fast filesystems can land two writes on one tick."""
+    t = os.path.getmtime(path) + 2
+    os.utime(path, (t, t))
+
+
+def test_fresh_pack_skips_the_file_sweep(levels):
+    levels_dir, pack_path, calls = levels
+    pack = level_pack.open_pack(levels_dir, pack_path)
+    assert pack is not None and len(pack) == 3
+    assert calls == {"is_stale": 1, "compile_pack": 1}
+    for _ in range(5):
+        assert level_pack.open_pack(levels_dir, pack_path) is pack
+    assert calls == {"is_stale": 1, "compile_pack": 1}
+
+    shutil.copy(os.path.join(level_pack.LEVELS_DIR, "level04.json"), levels_dir)
+    _bump(levels_dir)
+    pack = level_pack.open_pack(levels_dir, pack_path)
+    assert pack is not None and "level04" in pack
+    assert calls == {"is_stale": 2, "compile_pack": 2}
+
+
+def test_failed_compile_waits_for_the_directory(levels):
+    levels_dir, pack_path, calls = levels
+    with open(os.path.join(levels_dir, "level04.json"), "w") as f:
+        f.write('{"width": 2, "height": 2, "player_start": [5, 5], "exit_pos": [0, 0], '
+                '"tiles": [[0, 0], [0, 0]]}')
+    _bump(levels_dir)
+    for _ in range(5):
+        assert level_pack.open_pack(levels_dir, pack_path) is None
+    assert calls == {"is_stale": 1, "compile_pack": 1}
+
+    os.remove(os.path.join(levels_dir, "level04.json"))
+    _bump(levels_dir)
+    pack = level_pack.open_pack(levels_dir, pack_path)
+    assert pack is not None and len(pack) == 3
+    assert calls == {"is_stale": 2, "compile_pack": 2}
@@ -0,0 +1,35 @@
+# tests/test_search.py
+"""
+ARA* (ai/search.py ara_star) cut short by a node budget: the reported cost
+is the returned path's, and the path keeps within the reported bound.
+
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.grid import Grid                  # noqa: E402
+from ai.heuristics import heuristic_fn    # noqa: E402
+from ai.search import ara_star, search    # noqa: E402
+
+
+def test_budgeted_ara_cost_matches_path():
+    rnd = random.Random(0)
+    checked = 0
+    for _ in range(300):
+        n = rnd.choice((20, 40))
+        grid = Grid(n, n, [[int(rnd.random() < 0.3) for _ in range(n)] for _ in range(n)])
+        free = [grid.index(x, y) for y in range(n) for x in range(n) if not grid.is_blocked(x, y)]
+        s, t = rnd.choice(free), rnd.choice(free)
+        optimal = search("bfs", grid, s, t).path
+        for budget in (20, 50, 100, 400, None):
+            res = ara_star(grid, s, t, heuristic_fn("manhattan", grid, t), 3.0, max_nodes=budget)
+            if res.path is None:
+                continue
+            checked += 1
+            assert res.cost == len(res.path) - 1
+            assert res.cost <= res.bound * (len(optimal) - 1) + 1e-9
+    assert checked > 500
@@ -0,0 +1,46 @@
+# tests/test_visibility.py
+"""
+Line of sight (ai/visibility.py) at the shortest distances, where the
+Bresenham walk has no cells in between.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.grid import Grid                                # noqa: E402
+from ai.visibility import Visibility, line_of_sight    # noqa: E402
+
+
+def _open(w=5, h=5):
+    return Grid(w, h, [[0] * w for _ in range(h)])
+
+
+def test_same_cell_is_in_sight():
+    grid = _open()
+    for x, y in ((2, 2), (0, 0), (4, 4), (0, 4)):
+        assert line_of_sight(grid, (x, y), (x, y))
+
+
+def test_adjacent_cells_are_in_sight():
+    grid = _open()
+    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, 1), (1, -1), (-1, -1)):
+        assert line_of_sight(grid, (2, 2), (2 + dx, 2 + dy))
+    # the end cells may be walls themselves: a wall next to you can be seen
+    grid.set_wall(3, 2, True)
+    assert line_of_sight(grid, (2, 2), (3, 2))
+
+
+def test_wall_in_between_blocks():
+    grid = _open()
+    grid.set_wall(2, 2, True)
+    assert not line_of_sight(grid, (1, 2), (3, 2))
+
+
+def test_can_see_on_the_same_cell():
+    # an enemy standing on the player's cell keeps seeing them
+    vis = Visibility(_open())
+    assert vis.can_see((2, 2), (2, 2), 5)
+    assert vis.can_see((2, 2), (3, 2), 5)
@@ -0,0 +1,41 @@
+# tests/test_visualize.py
+"""
+traced_search() (ai/visualize.py) runs its own copies of the search loops:
+on generated levels it must find the same paths and expand as many nodes as
+Pathfinder.find_path does untraced, in every traceable mode.
+
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from ai.search import search                         # noqa: E402
+from ai.visualize import TRACE_MODES, Trace, traced_search  # noqa: E402
+from game.generator import KINDS, generate           # noqa: E402
+from game.path_api import Pathfinder                 # noqa: E402
+from game.world import World                         # noqa: E402
+
+
+@pytest.mark.parametrize("heuristic", ("manhattan", "alt"))
+@pytest.mark.parametrize("mode", TRACE_MODES)
+def test_traced_search_matches_pathfinder(mode, heuristic):
+    trace = Trace(1 << 16)
+    for seed, kind in enumerate(KINDS):
+        world = World(generate(kind, 41, 31, seed), cluster_size=None)
+        grid = world.grid
+        free = [grid.pos(i) for i in range(grid.size) if not grid.walls[i]]
+        pf = Pathfinder(mode, heuristic, cache_size=0, epsilon=2.0)
+        rnd = random.Random(seed)
+        for _ in range(10):
+            a, b = rnd.choice(free), rnd.choice(free)
+            if search("bfs", grid, grid.index(*a), grid.index(*b)).path is None:
+                continue
+            path = pf.find_path(a, b, world)
+            res = traced_search(mode, grid, grid.index(*a), grid.index(*b), trace, heuristic, 2.0)
+            assert [grid.pos(i) for i in res.path] == path, (kind, a, b)
+            assert res.expanded == pf.last_result.expanded, (kind, a, b)